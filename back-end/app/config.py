@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict, List
 
 
 class Settings(BaseSettings):
@@ -14,11 +14,33 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: Optional[str] = None
     DEFAULT_LLM_PROVIDER: str = "groq"
     DEFAULT_MODEL: str = "openai/gpt-oss-120b"
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_PROVIDER_CONCURRENCY: Dict[str, int] = {}  # e.g. {"groq": 16}
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    
+    # LLM Response Cache Settings
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_CACHE_TTL_SECONDS: float = 24 * 3600
+    LLM_CACHE_DISK_PATH: Optional[str] = None  # e.g. /var/cache/paragon/llm_cache.sqlite3
     
     # MongoDB Settings
     MONGODB_URL: str = "mongodb://mongodb:27017"
     MONGODB_DB: str = "paragonai"
     MONGODB_DB_NAME: Optional[str] = None  # For backward compatibility
+    MONGODB_MAX_POOL_SIZE: int = 50
+    MONGODB_MIN_POOL_SIZE: int = 5
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 10000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 30000
+    REPOSITORY_CACHE_MAX_ENTRIES: int = 2048  # hot Generation/Deployment records per process
+    REPOSITORY_CACHE_TTL_SECONDS: float = 5.0  # bounds staleness from other replicas' writes
     
     # Docker Settings
     DOCKER_REGISTRY: str = "docker.io"
@@ -44,6 +66,14 @@ class Settings(BaseSettings):
     # Kubernetes Settings
     KUBECONFIG_PATH: Optional[str] = None
     DEFAULT_NAMESPACE: str = "default"
+    KUBERNETES_BACKEND: str = "auto"  # "api", "kubectl", or "auto" (API when configured, else kubectl)
+    KUBERNETES_API_URL: Optional[str] = None  # overrides kubeconfig, e.g. a local fake API server
+    KUBERNETES_API_TOKEN: Optional[str] = None
+    KUBERNETES_API_VERIFY_SSL: bool = True
+    KUBERNETES_API_MAX_CONNECTIONS: int = 10
+    KUBERNETES_API_TIMEOUT_SECONDS: float = 30.0
+    KUBERNETES_WATCH_ENABLED: bool = True
+    KUBERNETES_WATCH_TIMEOUT_SECONDS: int = 300
     
     # Security Settings
     ENABLE_SECURITY_SCAN: bool = True
@@ -53,6 +83,60 @@ class Settings(BaseSettings):
     PROMETHEUS_ENABLED: bool = True
     GRAFANA_ENABLED: bool = True
     
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    REQUEST_LOG_SAMPLE_RATE: float = 0.1  # share of successful requests logged
+    REQUEST_LOG_ERROR_SAMPLE_RATE: float = 1.0  # share of 4xx/5xx responses logged
+    REQUEST_LOG_BODY_MAX_BYTES: int = 2048  # 0 disables body capture
+    REQUEST_LOG_BODY_ROUTES: List[str] = []  # route templates to capture bodies for; empty means all
+    
+    HTTP_METRICS_ENABLED: bool = True
+    # Latency histogram buckets in seconds; the long tail covers LLM-backed endpoints
+    HTTP_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+    
+    # Request metric rollups (per-minute, per-hour and per-day counts)
+    METRICS_ROLLUP_ENABLED: bool = True
+    METRICS_ROLLUP_INTERVAL_SECONDS: float = 60.0
+    METRICS_ROLLUP_LAG_SECONDS: float = 60.0  # grace period for late request_metrics writes
+    METRICS_RAW_RETENTION_DAYS: int = 7
+    METRICS_ROLLUP_1M_RETENTION_DAYS: int = 30
+    METRICS_ROLLUP_1H_RETENTION_DAYS: int = 400  # per-day rollups are kept indefinitely
+    
+    # Prometheus exporter for request_metrics
+    METRICS_EXPORTER_MODE: str = "scrape"  # "scrape" or "change_stream" (falls back to scrape)
+    METRICS_EXPORTER_CACHE_TTL_SECONDS: float = 5.0  # scrapes within this share one query
+    METRICS_EXPORTER_LAG_SECONDS: float = 5.0  # how far polling trails the clock for in-flight inserts
+    
+    # Generation Worker Settings
+    GENERATION_MAX_WORKERS: int = 4
+    GENERATION_MAX_PENDING: int = 32
+    GENERATION_STAGE_WORKERS: int = 16
+    GENERATION_JOB_HISTORY: int = 500
+    GENERATION_IDEMPOTENCY_ENABLED: bool = True  # deduplicate identical requests; Idempotency-Key always applies
+    GENERATION_IDEMPOTENCY_TTL_SECONDS: float = 86400.0  # how long a successful generation is replayed
+    GENERATION_ARCHIVE_CACHE_DIR: str = "/tmp/paragon_archives"  # finished downloads, served with Range
+    GENERATION_ARCHIVE_ZSTD_LEVEL: int = 3
+    
+    # Content-addressed store that deduplicates generated files
+    ARTIFACT_STORE_ENABLED: bool = True
+    ARTIFACT_STORE_DIR: str = "/tmp/paragon_artifacts"  # same filesystem as the generations, for hardlinks
+    ARTIFACT_MATERIALIZE_MODE: str = "hardlink"  # "hardlink", "reflink" (copy-on-write) or "copy"
+    ARTIFACT_PRUNE_GENERATION_DIRS: bool = False  # keep only manifests; directories are rebuilt on demand
+    ARTIFACT_GC_INTERVAL_SECONDS: float = 3600.0  # 0 disables the background collector
+    ARTIFACT_GC_GRACE_SECONDS: float = 600.0  # blobs linked more recently than this are never collected
+    
+    # Retention of generation outputs; generations a live deployment uses are always kept
+    GENERATION_RETENTION_ENABLED: bool = True
+    GENERATION_RETENTION_INTERVAL_SECONDS: float = 600.0
+    GENERATION_RETENTION_MAX_AGE_HOURS: float = 168.0  # 0 disables the age limit
+    GENERATION_RETENTION_MAX_TOTAL_BYTES: int = 10 * 1024 ** 3  # 0 disables the size limit
+    GENERATION_RETENTION_KEEP_LAST_PER_AGENT_TYPE: int = 10  # kept whatever their age or size
+    
+    # Template Settings
+    TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = "/tmp/paragon_jinja_cache"
+    TEMPLATE_BUNDLE_PROCESS_THRESHOLD: int = 10000  # below this, spawning workers costs more than it saves
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,178 @@
+"""Prometheus instrumentation and request logging for the HTTP API"""
+
+from typing import Optional
+import logging
+import random
+import time
+
+from prometheus_client import Gauge, Histogram, Summary
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+# Requests that match no route share one label value, keeping cardinality bounded
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency in seconds, from receipt to the last byte of the response",
+    ["method", "route", "status"],
+    buckets=settings.HTTP_LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+)
+REQUEST_SIZE = Summary(
+    "http_request_size_bytes",
+    "HTTP request body size in bytes",
+    ["method", "route"],
+)
+RESPONSE_SIZE = Summary(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes",
+    ["method", "route"],
+)
+
+
+def route_template(scope: Scope) -> str:
+    """The path template of the route a request will be dispatched to"""
+    router = scope["app"].router
+    partial: Optional[str] = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            # Path matched but the method did not (405)
+            partial = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return partial or UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """Records latency, in-flight count and body sizes per route template.
+
+    Labels use the path template ("/deployments/{deployment_id}"), never
+    the raw URL. Written as plain ASGI rather than BaseHTTPMiddleware so
+    streamed responses (such as the SSE generation stream) are timed and
+    sized to their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message):
+            nonlocal response_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method, route=route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            in_progress.dec()
+            REQUEST_DURATION.labels(method=method, route=route, status=str(status)).observe(
+                time.perf_counter() - start)
+            REQUEST_SIZE.labels(method=method, route=route).observe(request_bytes)
+            RESPONSE_SIZE.labels(method=method, route=route).observe(response_bytes)
+
+
+request_logger = logging.getLogger("app.requests")
+
+
+class RequestLoggingMiddleware:
+    """Logs a sample of requests as structured records.
+
+    Requests answered with 4xx/5xx are logged at REQUEST_LOG_ERROR_SAMPLE_RATE
+    and the rest at REQUEST_LOG_SAMPLE_RATE. Bodies are copied as they
+    stream past, never read ahead, and only while they stay within
+    REQUEST_LOG_BODY_MAX_BYTES (and, if REQUEST_LOG_BODY_ROUTES is set, for
+    those routes); larger bodies are logged by size alone. Decoding and
+    formatting happen on the logging listener thread.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.sample_rate = settings.REQUEST_LOG_SAMPLE_RATE
+        self.error_sample_rate = settings.REQUEST_LOG_ERROR_SAMPLE_RATE
+        self.body_max_bytes = settings.REQUEST_LOG_BODY_MAX_BYTES
+        self.body_routes = set(settings.REQUEST_LOG_BODY_ROUTES)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not request_logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        capture = self.body_max_bytes > 0 and (not self.body_routes or route in self.body_routes)
+        chunks = []
+        request_bytes = 0
+        status = 500
+
+        async def teeing_receive() -> Message:
+            nonlocal request_bytes, capture
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                request_bytes += len(body)
+                if capture:
+                    if request_bytes <= self.body_max_bytes:
+                        chunks.append(body)
+                    else:
+                        capture = False
+                        chunks.clear()
+            return message
+
+        async def status_send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, teeing_receive, status_send)
+        finally:
+            rate = self.error_sample_rate if status >= 400 else self.sample_rate
+            if rate >= 1.0 or random.random() < rate:
+                duration_ms = round((time.perf_counter() - start) * 1000, 2)
+                fields = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": duration_ms,
+                    "request_bytes": request_bytes,
+                    "client": scope["client"][0] if scope.get("client") else None,
+                }
+                if capture and chunks:
+                    # Left as bytes; the formatter decodes them off the request path
+                    fields["body"] = b"".join(chunks)
+                # Lazy %-arguments: the message is built by the listener thread too
+                request_logger.info("%s %s %s %.2fms", scope["method"], scope["path"], status, duration_ms,
+                                    extra={"http": fields})
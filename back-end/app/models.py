@@ -6,12 +6,17 @@ from pydantic import BaseModel, Field
 class Generation(BaseModel):
     id: str = Field(alias="_id")
     prompt: str
-    agent_type: str
+    agent_type: Optional[str] = None  # known once the prompt is parsed, unless requested
     cloud_provider: str
     status: str
     files_generated: List[str] = []
     output_path: Optional[str] = None
     error_message: Optional[str] = None
+    idempotency_key: Optional[str] = None  # Idempotency-Key hash, or request_fingerprint
+    request_fingerprint: Optional[str] = None
+    request: Dict[str, Any] = {}  # the GenerateRequest, for regeneration
+    stage_outputs: Dict[str, Dict[str, Any]] = {}  # stage -> input fingerprint, files written, result
+    base_generation_id: Optional[str] = None  # the generation this one was regenerated from
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -22,6 +27,7 @@ class Generation(BaseModel):
 class Deployment(BaseModel):
     id: str = Field(alias="_id")
     generation_id: str
+    app_name: str
     agent_type: str
     cloud_provider: str
     cluster_name: Optional[str] = None
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Iterator, List, Literal, Optional, Dict, Any, Tuple
+from app.models import Deployment
 from app.schemas import (
-    DeploymentRequest, DeploymentResponse, DeploymentInfo,
-    RollbackRequest, DeploymentStatus
+    DeploymentRequest, DeploymentResponse, DeploymentInfo, DeploymentPage,
+    RollbackRequest, DeploymentStatus, RolloutStatusResponse, AgentType, CloudProvider
 )
 from app.services.deployment_service import deployment_service
 from app.services.kubernetes_service import kubernetes_service
+from app.services.kube_watch_service import kube_watch_service, rollout_complete, endpoint_assigned
+from app.services.repositories import (
+    RepositoryUnavailableError, deployment_repository, generation_repository, metrics_repository
+)
+import base64
+import itertools
+import json
 import logging
 import uuid
 
@@ -13,6 +24,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/deployments", tags=["deployments"])
 
+# Fields a listing can project; config and previous_versions only when asked for
+LIST_FIELDS = set(Deployment.model_fields) - {"id"}
+DEFAULT_LIST_FIELDS = sorted(LIST_FIELDS - {"config", "previous_versions"})
+MAX_PAGE_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 @router.post("/", response_model=DeploymentResponse)
 async def create_deployment(request: DeploymentRequest):
@@ -25,23 +42,28 @@ async def create_deployment(request: DeploymentRequest):
     try:
         logger.info(f"Deploying generation {request.generation_id}")
         
-        result = deployment_service.deploy_to_kubernetes(
-            generation_id=request.generation_id,
-            namespace=request.namespace,
-            replicas=request.replicas
-        )
-        
-        if result["status"] == "failed":
-            raise HTTPException(status_code=500, detail=result.get("error", "Deployment failed"))
-        
-        deployment_id = str(uuid.uuid4())
+        # Protected from retention until the deployment record takes over
+        with deployment_service.deploying(request.generation_id):
+            result = deployment_service.deploy_to_kubernetes(
+                generation_id=request.generation_id,
+                namespace=request.namespace,
+                replicas=request.replicas
+            )
+            
+            if result["status"] == "failed":
+                raise HTTPException(status_code=500, detail=result.get("error", "Deployment failed"))
+            
+            deployment_id = str(uuid.uuid4())
+            status = DeploymentStatus.RUNNING if result["status"] == "deployed" else DeploymentStatus.DEPLOYING
+            dashboard_url = f"/api/v1/deployments/{deployment_id}/metrics"
+            await run_in_threadpool(_record_deployment, deployment_id, request, result, status, dashboard_url)
         
         return DeploymentResponse(
             deployment_id=deployment_id,
-            status=DeploymentStatus.RUNNING if result["status"] == "deployed" else DeploymentStatus.DEPLOYING,
+            status=status,
             message="Deployment successful" if result["status"] == "deployed" else "Deployment in progress",
             endpoint=result.get("endpoint"),
-            dashboard_url=f"/api/v1/deployments/{deployment_id}/metrics"
+            dashboard_url=dashboard_url
         )
     
     except Exception as e:
@@ -49,37 +71,267 @@ async def create_deployment(request: DeploymentRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _record_deployment(deployment_id: str, request: DeploymentRequest, result: Dict[str, Any],
+                       status: DeploymentStatus, dashboard_url: str):
+    """Store the deployment so later lookups, deletes and rollbacks know what was deployed where"""
+    from pymongo.errors import PyMongoError
+    app_name = result["app_name"]
+    try:
+        generation = generation_repository.get(request.generation_id)
+        deployment_repository.insert(Deployment(
+            _id=deployment_id,
+            generation_id=request.generation_id,
+            app_name=app_name,
+            # Generated apps are named "<agent_type>-agent"
+            agent_type=(generation.agent_type if generation else None) or app_name.removesuffix("-agent"),
+            cloud_provider=request.cloud_provider.value,
+            cluster_name=request.cluster_name,
+            namespace=request.namespace,
+            status=status.value,
+            endpoint=result.get("endpoint"),
+            dashboard_url=dashboard_url,
+            replicas=request.replicas,
+            config={
+                "auto_scale": request.auto_scale,
+                "min_replicas": request.min_replicas,
+                "max_replicas": request.max_replicas,
+            },
+        ))
+    except (RepositoryUnavailableError, PyMongoError) as e:
+        # The rollout itself succeeded; only the record is missing
+        logger.error(f"Could not record deployment {deployment_id} of {app_name}: {e}")
+
+
+async def _load_deployment(deployment_id: str) -> Deployment:
+    try:
+        record = await run_in_threadpool(deployment_repository.get, deployment_id)
+    except RepositoryUnavailableError:
+        raise HTTPException(status_code=503, detail="Deployment store unavailable")
+    if record is None:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    return record
+
+
+@router.get("/", response_model=DeploymentPage)
+async def list_deployments(
+    request: Request,
+    status: Optional[DeploymentStatus] = None,
+    agent_type: Optional[AgentType] = None,
+    cloud_provider: Optional[CloudProvider] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    output_format: Optional[Literal["json", "ndjson"]] = Query(None, alias="format"),
+):
+    """
+    List deployments, most recently updated first.
+    
+    Pages are keyset-paginated on (updated_at, _id): pass the returned
+    ``next_cursor`` to get the next page. Filters are applied in MongoDB and
+    only the requested fields are read. With ``format=ndjson`` (or
+    ``Accept: application/x-ndjson``) records are streamed one per line as
+    they are read, followed by a ``{"next_cursor": ...}`` line.
+    """
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_LIST_FIELDS
+    unknown = set(selected) - LIST_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    query: Dict[str, Any] = {}
+    if status:
+        query["status"] = status.value
+    if agent_type:
+        query["agent_type"] = agent_type.value
+    if cloud_provider:
+        query["cloud_provider"] = cloud_provider.value
+    after = _decode_cursor(cursor) if cursor else None
+    # One extra record tells whether there is a next page
+    docs = deployment_repository.page(query, after, limit + 1, selected)
+    
+    if output_format == "ndjson" or (output_format is None and
+                                     NDJSON_MEDIA_TYPE in request.headers.get("accept", "")):
+        try:
+            # Read the first record before answering, so an outage is a 503 rather than a cut stream
+            first = await run_in_threadpool(next, docs, None)
+        except RepositoryUnavailableError:
+            raise HTTPException(status_code=503, detail="Deployment store unavailable")
+        return StreamingResponse(_ndjson_page(first, docs, limit, selected), media_type=NDJSON_MEDIA_TYPE)
+    
+    try:
+        page = await run_in_threadpool(list, docs)
+    except RepositoryUnavailableError:
+        raise HTTPException(status_code=503, detail="Deployment store unavailable")
+    return DeploymentPage(
+        items=[_list_item(doc, selected) for doc in page[:limit]],
+        next_cursor=_encode_cursor(page[limit - 1]) if len(page) > limit else None,
+    )
+
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    raw = json.dumps([doc["updated_at"].isoformat(), doc["_id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, record_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), str(record_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _list_item(doc: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    item = {"deployment_id": doc["_id"]}
+    for field in fields:
+        item[field] = doc.get(field)
+    return item
+
+
+def _ndjson_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _ndjson_page(first: Optional[Dict[str, Any]], docs: Iterator[Dict[str, Any]], limit: int,
+                 fields: List[str]) -> Iterator[str]:
+    """Serialise records as they come off the cursor; StreamingResponse runs this in the threadpool"""
+    last = None
+    count = 0
+    for doc in itertools.chain([first] if first is not None else [], docs):
+        if count == limit:
+            docs.close()
+            yield json.dumps({"next_cursor": _encode_cursor(last)}) + "\n"
+            return
+        yield json.dumps(_list_item(doc, fields), default=_ndjson_default) + "\n"
+        last = doc
+        count += 1
+    yield json.dumps({"next_cursor": None}) + "\n"
+
+
+def _rollout_status(app_name: str, namespace: str, deployment: Optional[Dict[str, Any]],
+                    service: Optional[Dict[str, Any]], source: str) -> RolloutStatusResponse:
+    status = (deployment or {}).get("status", {})
+    return RolloutStatusResponse(
+        app_name=app_name,
+        namespace=namespace,
+        found=deployment is not None,
+        rollout_complete=rollout_complete(deployment) if deployment else False,
+        replicas=status.get("replicas", 0),
+        ready_replicas=status.get("readyReplicas", 0),
+        updated_replicas=status.get("updatedReplicas", 0),
+        available_replicas=status.get("availableReplicas", 0),
+        endpoint=kubernetes_service._service_endpoint(service) if service else None,
+        source=source,
+    )
+
+
+@router.get("/kubernetes/{namespace}/{app_name}/status", response_model=RolloutStatusResponse)
+async def get_rollout_status(namespace: str, app_name: str):
+    """
+    Current rollout state of an app, served from the watch cache.
+    
+    Falls back to querying the cluster when the watch is not running.
+    """
+    if not (kube_watch_service.running and kube_watch_service.is_synced("Deployment")):
+        status = await run_in_threadpool(kubernetes_service.get_deployment_status, app_name, namespace)
+        endpoint = await run_in_threadpool(kubernetes_service.get_service_endpoint, f"{app_name}-service", namespace)
+        return RolloutStatusResponse(
+            app_name=app_name,
+            namespace=namespace,
+            found="error" not in status,
+            rollout_complete=bool(status.get("ready")),
+            replicas=status.get("replicas", 0),
+            ready_replicas=status.get("ready_replicas", 0),
+            available_replicas=status.get("available_replicas", 0),
+            endpoint=endpoint,
+            source="cluster",
+        )
+    
+    deployment = kube_watch_service.get("Deployment", namespace, app_name)
+    service = kube_watch_service.get("Service", namespace, f"{app_name}-service")
+    return _rollout_status(app_name, namespace, deployment, service, "watch")
+
+
+@router.get("/kubernetes/{namespace}/{app_name}/wait", response_model=RolloutStatusResponse)
+async def wait_for_rollout(
+    namespace: str,
+    app_name: str,
+    condition: Literal["rollout", "endpoint"] = "rollout",
+    timeout: float = Query(60.0, gt=0, le=600),
+):
+    """
+    Wait until the rollout completes or the service gets an external endpoint.
+    
+    Resolves from watch events rather than polling; ``condition_met`` is false
+    if the timeout expires first.
+    """
+    if not kube_watch_service.running:
+        raise HTTPException(status_code=503, detail="Kubernetes watch is not running")
+    
+    if condition == "rollout":
+        obj = await kube_watch_service.wait_until("Deployment", namespace, app_name, rollout_complete, timeout)
+    else:
+        obj = await kube_watch_service.wait_until("Service", namespace, f"{app_name}-service",
+                                                  endpoint_assigned, timeout)
+    
+    deployment = kube_watch_service.get("Deployment", namespace, app_name)
+    service = kube_watch_service.get("Service", namespace, f"{app_name}-service")
+    response = _rollout_status(app_name, namespace, deployment, service, "watch")
+    response.condition_met = obj is not None
+    return response
+
+
 @router.get("/{deployment_id}", response_model=DeploymentInfo)
 async def get_deployment(deployment_id: str):
     """
-    Get deployment information and status.
+    Get deployment information and status, with its latest metrics snapshot.
     """
+    record = await _load_deployment(deployment_id)
     try:
-        # In a real implementation, this would query MongoDB
-        # For now, return a mock response
-        raise HTTPException(status_code=404, detail="Deployment not found")
-    except Exception as e:
-        logger.error(f"Failed to get deployment: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        metrics = await run_in_threadpool(metrics_repository.latest, deployment_id)
+    except RepositoryUnavailableError:
+        metrics = None
+    
+    return DeploymentInfo(
+        deployment_id=record.id,
+        generation_id=record.generation_id,
+        agent_type=record.agent_type,
+        cloud_provider=record.cloud_provider,
+        status=record.status,
+        endpoint=record.endpoint,
+        dashboard_url=record.dashboard_url,
+        created_at=record.created_at,
+        updated_at=record.updated_at,
+        metrics=metrics.model_dump(exclude={"id", "deployment_id"}) if metrics else None,
+    )
 
 
 @router.delete("/{deployment_id}")
-async def delete_deployment(deployment_id: str, namespace: str = "default"):
+async def delete_deployment(deployment_id: str, namespace: Optional[str] = None):
     """
     Delete a deployment from Kubernetes.
+    
+    The app and namespace come from the deployment record; ``namespace``
+    only overrides the recorded one.
     """
+    record = await _load_deployment(deployment_id)
+    app_name = record.app_name
+    namespace = namespace or record.namespace
     try:
-        # In a real implementation, extract app_name from deployment record
-        app_name = "agent-app"  # Placeholder
-        
-        success = kubernetes_service.delete_resource("deployment", app_name, namespace)
+        success = await run_in_threadpool(kubernetes_service.delete_resource, "deployment", app_name, namespace)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete deployment")
         
-        kubernetes_service.delete_resource("service", f"{app_name}-service", namespace)
+        await run_in_threadpool(kubernetes_service.delete_resource, "service", f"{app_name}-service", namespace)
+        await run_in_threadpool(deployment_repository.update, deployment_id,
+                                {"status": DeploymentStatus.STOPPED.value})
         
         return {"message": "Deployment deleted successfully"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to delete deployment: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -89,20 +341,27 @@ async def delete_deployment(deployment_id: str, namespace: str = "default"):
 async def rollback_deployment(deployment_id: str, request: RollbackRequest):
     """
     Rollback deployment to a previous version.
+    
+    Without ``target_version`` the deployment goes back one revision.
     """
+    record = await _load_deployment(deployment_id)
     try:
-        # In a real implementation, extract app_name and namespace from deployment record
-        app_name = "agent-app"  # Placeholder
-        namespace = "default"
-        
         revision = int(request.target_version) if request.target_version else None
-        success = kubernetes_service.rollback_deployment(app_name, namespace, revision)
+        success = await run_in_threadpool(kubernetes_service.rollback_deployment,
+                                          record.app_name, record.namespace, revision)
         
         if not success:
             raise HTTPException(status_code=500, detail="Rollback failed")
         
+        target = request.target_version or (record.previous_versions[-1] if record.previous_versions else None)
+        if target:
+            await run_in_threadpool(deployment_repository.update, deployment_id, {"version": target},
+                                    {"previous_versions": record.version})
+        
         return {"message": "Rollback successful"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Rollback failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
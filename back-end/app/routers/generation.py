@@ -35,50 +35,238 @@ async def generate(req: GenerateRequest):
         logger.error(f"Generation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from app.schemas import GenerateRequest, GenerateResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from app.schemas import GenerateRequest, GenerateResponse, GenerationStatusResponse, RegenerateRequest
+from app.services.archive_service import archive_service, FORMATS
 from app.services.deployment_service import deployment_service
+from app.services.generation_job_service import (
+    generation_job_service, request_key, GenerationNotFoundError, IdempotencyKeyConflictError, JobQueueFullError,
+    RegenerationError
+)
+from app.services.repositories import RepositoryUnavailableError
+from app.config import settings
+from pydantic import ValidationError
+from typing import Optional
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/generate", tags=["generation"])
 
+SSE_HEARTBEAT_SECONDS = 15
+
 
-@router.post("/", response_model=GenerateResponse)
-async def generate_deployment(request: GenerateRequest, background_tasks: BackgroundTasks):
+@router.post("/", response_model=GenerateResponse, status_code=202)
+async def generate_deployment(request: GenerateRequest, response: Response,
+                              idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key",
+                                                                      max_length=255)):
     """
     Generate complete deployment package from natural language prompt.
     
-    This endpoint:
+    The generation is queued on a bounded worker pool and this endpoint
+    returns immediately with a generation_id. The job:
     - Parses the user's deployment requirements
     - Generates agent code, Dockerfile, K8s manifests
     - Creates CI/CD pipelines and monitoring configs
-    - Returns a package ready for deployment
+    
+    Poll ``GET /generate/{generation_id}`` for stage-by-stage progress.
+    
+    Duplicates are not run twice. A request with the same ``Idempotency-Key``
+    header, or without one but with the same normalised payload, gets the
+    generation already running for it (202), or the generation it already
+    produced (200); both carry ``Idempotent-Replayed: true``.
     """
+    key = None
+    if idempotency_key or settings.GENERATION_IDEMPOTENCY_ENABLED:
+        key = request_key(request, idempotency_key)
     try:
         logger.info(f"Received generation request: {request.prompt[:100]}...")
-        
-        result = deployment_service.generate_full_deployment(
-            prompt=request.prompt,
-            agent_type=request.agent_type,
-            cloud_provider=request.cloud_provider,
-            enable_monitoring=request.enable_monitoring,
-            enable_cicd=request.enable_cicd,
-            enable_security_scan=request.enable_security_scan
-        )
-        
-        if result["status"] == "failed":
-            raise HTTPException(status_code=500, detail=result.get("error", "Generation failed"))
-        
-        return GenerateResponse(
-            generation_id=result["generation_id"],
-            status="success",
-            message=f"Generated {len(result['files_generated'])} files successfully",
-            files_generated=result["files_generated"],
-            download_url=f"/api/v1/generate/{result['generation_id']}/download"
-        )
+        # May look the key up in MongoDB
+        job, replayed = await run_in_threadpool(generation_job_service.submit, request, key)
+    except JobQueueFullError as e:
+        logger.warning(f"Rejecting generation request: {e}")
+        raise HTTPException(status_code=503, detail="Generation queue is full, retry later")
+    except IdempotencyKeyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
-    except Exception as e:
-        logger.error(f"Generation failed: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    message = "Generation queued"
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+        message = "Generation already in progress"
+        if job.finished:
+            response.status_code = 200
+            message = "Generation already completed"
+    return GenerateResponse(
+        generation_id=job.generation_id,
+        status=job.status.value,
+        message=message,
+        files_generated=list(job.files_generated),
+        download_url=f"/generate/{job.generation_id}/download"
+    )
+
+
+@router.post("/{generation_id}/regenerate", response_model=GenerateResponse, status_code=202)
+async def regenerate_deployment(generation_id: str, changes: RegenerateRequest, response: Response,
+                                idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key",
+                                                                        max_length=255)):
+    """
+    Queue a new generation from an earlier one's request with some fields changed.
+    
+    Each stage's inputs were fingerprinted when the earlier generation ran;
+    stages whose inputs are unchanged copy its files instead of running, so
+    toggling ``enable_monitoring`` does not call the LLM again. They are
+    reported with status ``reused``. The earlier generation is kept as it
+    was. Duplicates are replayed as for ``POST /generate/``.
+    """
+    try:
+        job, replayed = await run_in_threadpool(generation_job_service.regenerate, generation_id,
+                                                changes.model_dump(exclude_unset=True), idempotency_key)
+    except GenerationNotFoundError:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    except RegenerationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    except RepositoryUnavailableError:
+        raise HTTPException(status_code=503, detail="Generation store unavailable")
+    except JobQueueFullError as e:
+        logger.warning(f"Rejecting regeneration of {generation_id}: {e}")
+        raise HTTPException(status_code=503, detail="Generation queue is full, retry later")
+    except IdempotencyKeyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    message = f"Regeneration of {generation_id} queued"
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+        message = "Generation already in progress"
+        if job.finished:
+            response.status_code = 200
+            message = "Generation already completed"
+    return GenerateResponse(
+        generation_id=job.generation_id,
+        status=job.status.value,
+        message=message,
+        files_generated=list(job.files_generated),
+        download_url=f"/generate/{job.generation_id}/download"
+    )
+
+
+@router.get("/{generation_id}", response_model=GenerationStatusResponse)
+async def get_generation_status(generation_id: str):
+    """
+    Get the status of a generation job, including per-stage progress.
+    
+    Generations evicted from the in-memory job history are served from the
+    stored record, without stage detail.
+    """
+    # Finished jobs drop out of memory; older ones are read from MongoDB
+    try:
+        snapshot = await run_in_threadpool(generation_job_service.load, generation_id)
+    except RepositoryUnavailableError:
+        raise HTTPException(status_code=503, detail="Generation store unavailable")
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    return GenerationStatusResponse(**snapshot)
+
+
+@router.get("/{generation_id}/stream")
+async def stream_generation(generation_id: str, request: Request):
+    """
+    Stream a generation as Server-Sent Events.
+    
+    Emits ``status`` and ``stage`` progress events, ``token`` events carrying
+    the agent code as the LLM produces it, and a final ``done`` event with the
+    generated files. Events published before the client connected are
+    replayed first, except the ``token`` events of a finished generation.
+    ``main.py`` is still written to the output directory.
+    """
+    subscription = generation_job_service.subscribe(generation_id)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    queue, backlog = subscription
+    
+    def format_event(item) -> str:
+        return f"event: {item['event']}\ndata: {json.dumps(item['data'], default=str)}\n\n"
+    
+    async def event_stream():
+        try:
+            for item in backlog:
+                yield format_event(item)
+                if item["event"] == "done":
+                    return
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(item)
+                if item["event"] == "done":
+                    return
+        finally:
+            generation_job_service.unsubscribe(generation_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{generation_id}/download")
+async def download_generation(generation_id: str, request: Request,
+                              archive_format: str = Query("zip", alias="format")):
+    """
+    Download the generated package as a ``zip`` or ``tar.zst`` archive.
+    
+    The archive is streamed as it is built, so memory use does not grow with
+    the package. Responses carry a strong ETag: ``If-None-Match`` returns 304
+    while the files are unchanged, and once an archive has been sent in full
+    it is kept so that ``Range`` requests can resume an interrupted download.
+    """
+    if not archive_service.available(archive_format):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {archive_format}")
+    job = generation_job_service.get(generation_id)
+    if job is not None and not job.finished:
+        raise HTTPException(status_code=409, detail="Generation still in progress")
+    
+    base_dir = deployment_service.output_base_dir.resolve()
+    if (base_dir / generation_id).resolve().parent != base_dir:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    root = await run_in_threadpool(deployment_service.generation_dir, generation_id)
+    if root is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    try:
+        files = await run_in_threadpool(archive_service.list_files, root)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Generation not found")
+    
+    etag = archive_service.etag(files, archive_format)
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    media_type, extension = FORMATS[archive_format]
+    filename = f"{generation_id}.{extension}"
+    cached = await run_in_threadpool(archive_service.cached, generation_id, etag, archive_format)
+    if cached is None and "range" in request.headers:
+        # A resumed download needs the whole archive to seek into
+        cached = await run_in_threadpool(archive_service.build, generation_id, files, etag, archive_format)
+    if cached is not None:
+        # FileResponse answers Range / If-Range with 206 from the cached copy
+        return FileResponse(cached, media_type=media_type, filename=filename, headers={"ETag": etag})
+    
+    return StreamingResponse(
+        archive_service.stream(generation_id, files, etag, archive_format),
+        media_type=media_type,
+        headers={
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
@@ -21,13 +21,17 @@ async def get_metrics(deployment_id: str):
         last_updated=datetime.utcnow(),
     )
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import TYPE_CHECKING, List
 from pydantic import BaseModel
-import pymongo
 import logging
 from app.config import settings
+from app.services.mongo_service import get_db, mongo_service
+from app.services.request_metrics_service import request_metrics_service
+
+if TYPE_CHECKING:
+    from pymongo.database import Database
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/metrics", tags=["metrics"])
@@ -37,58 +41,35 @@ class ChartData(BaseModel):
     datasets: List[dict]
 
 @router.get("/requests/count", response_model=ChartData)
-async def get_request_counts(
+def get_request_counts(
     time_range: str = "24h", 
-    interval: str = "1h"
+    interval: str = "1h",
+    db: "Database" = Depends(get_db)
 ):
+    # A plain def: pymongo blocks, so FastAPI runs this in its threadpool
+    from pymongo.errors import ServerSelectionTimeoutError
     try:
         logger.info(f"Fetching request counts for {time_range} with interval {interval}")
         
-        client = pymongo.MongoClient(
-            settings.MONGODB_URL,
-            serverSelectionTimeoutMS=5000,  # 5 second timeout
-            connectTimeoutMS=10000,        # 10 second connection timeout
-            socketTimeoutMS=30000          # 30 second socket timeout
-        )
-        
+        end_time = datetime.utcnow()
+        start_time = calculate_start_time(time_range, end_time)
         try:
-            # Test the connection
-            client.admin.command('ping')
-            db = client[settings.MONGODB_DB]
-            
-            # Check if collection exists and has data
-            if 'request_metrics' not in db.list_collection_names():
-                logger.warning("request_metrics collection does not exist")
-                return create_empty_response("No metrics data available")
-            
-            collection = db.request_metrics
-            if collection.estimated_document_count() == 0:
-                logger.warning("request_metrics collection is empty")
-                return create_empty_response("No metrics data available")
-            
-            # Calculate time range
-            end_time = datetime.utcnow()
-            start_time = calculate_start_time(time_range, end_time)
-            
-            # Generate time buckets
-            time_buckets = generate_time_buckets(start_time, end_time, interval)
-            if not time_buckets:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid time range or interval"
-                )
-            
-            # Rest of your aggregation pipeline...
-            
-        except pymongo.errors.ServerSelectionTimeoutError:
-            logger.error("MongoDB connection timeout")
-            raise HTTPException(
-                status_code=503,
-                detail="Database connection timeout"
-            )
-        finally:
-            client.close()
-            
+            chart = request_metrics_service.request_counts(db, start_time, end_time, interval)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid time range or interval: {e}")
+        
+        if not any(chart["datasets"][0]["data"]):
+            return create_empty_response("No metrics data available")
+        return ChartData(**chart)
+    
+    except HTTPException:
+        raise
+    except ServerSelectionTimeoutError:
+        logger.error("MongoDB connection timeout")
+        raise HTTPException(
+            status_code=503,
+            detail="Database connection timeout"
+        )
     except Exception as e:
         logger.error(f"Error in get_request_counts: {str(e)}")
         raise HTTPException(
@@ -96,6 +77,27 @@ async def get_request_counts(
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.get("/llm-cache")
+async def get_llm_cache_stats():
+    """Hit/miss/eviction counters and the latency and tokens saved by the LLM response cache"""
+    from app.services.llm_cache import llm_response_cache
+    if llm_response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_response_cache.stats()}
+
+@router.get("/mongo-pool")
+async def get_mongo_pool_stats():
+    """Open and checked-out connections per server in the shared MongoDB pool"""
+    return mongo_service.pool_stats()
+
+@router.get("/artifact-store")
+def get_artifact_store_stats():
+    """Stored versus logical bytes of the generation artifact store (scans the store, so runs in the threadpool)"""
+    from app.services.artifact_store import artifact_store
+    if not settings.ARTIFACT_STORE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **artifact_store.stats()}
+
 def create_empty_response(message: str) -> ChartData:
     """Helper to create an empty response with a message"""
     return ChartData(
@@ -119,31 +121,3 @@ def calculate_start_time(time_range: str, end_time: datetime) -> datetime:
     elif time_range == "30d":
         return end_time - timedelta(days=30)
     return end_time - timedelta(days=1)  # Default to 24h
-
-def generate_time_buckets(start: datetime, end: datetime, interval: str) -> List[datetime]:
-    """Generate time buckets based on interval"""
-    buckets = []
-    current = start
-    delta = parse_interval(interval)
-    
-    if not delta:
-        return []
-        
-    while current <= end:
-        buckets.append(current)
-        current += delta
-        
-    return buckets
-
-def parse_interval(interval: str) -> Optional[timedelta]:
-    """Parse interval string into timedelta"""
-    try:
-        if interval.endswith('m'):
-            return timedelta(minutes=int(interval[:-1]))
-        elif interval.endswith('h'):
-            return timedelta(hours=int(interval[:-1]))
-        elif interval.endswith('d'):
-            return timedelta(days=int(interval[:-1]))
-    except ValueError:
-        return None
-    return None
\ No newline at end of file
@@ -27,6 +27,13 @@ class DeploymentStatus(str, Enum):
     STOPPED = "stopped"
 
 
+class GenerationStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+
+
 class GenerateRequest(BaseModel):
     prompt: str = Field(..., description="Natural language description of the agent to deploy")
     agent_type: Optional[AgentType] = None
@@ -36,6 +43,16 @@ class GenerateRequest(BaseModel):
     enable_security_scan: bool = True
 
 
+class RegenerateRequest(BaseModel):
+    """Fields of the original GenerateRequest to change; omitted ones keep their value"""
+    prompt: Optional[str] = None
+    agent_type: Optional[AgentType] = None
+    cloud_provider: Optional[CloudProvider] = None
+    enable_monitoring: Optional[bool] = None
+    enable_cicd: Optional[bool] = None
+    enable_security_scan: Optional[bool] = None
+
+
 class GenerateResponse(BaseModel):
     generation_id: str
     status: str
@@ -44,6 +61,24 @@ class GenerateResponse(BaseModel):
     download_url: Optional[str] = None
 
 
+class GenerationStage(BaseModel):
+    name: str
+    status: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class GenerationStatusResponse(BaseModel):
+    generation_id: str
+    status: GenerationStatus
+    stages: List[GenerationStage] = []
+    files_generated: List[str] = []
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class AgentDefaultConfig(BaseModel):
     model: str = "mixtral-8x7b-32768"
     temperature: float = 0.1
@@ -79,6 +114,20 @@ class DeploymentResponse(BaseModel):
     dashboard_url: Optional[str] = None
 
 
+class RolloutStatusResponse(BaseModel):
+    app_name: str
+    namespace: str
+    found: bool
+    rollout_complete: bool = False
+    replicas: int = 0
+    ready_replicas: int = 0
+    updated_replicas: int = 0
+    available_replicas: int = 0
+    endpoint: Optional[str] = None
+    condition_met: Optional[bool] = None
+    source: str
+
+
 class DeploymentInfo(BaseModel):
     deployment_id: str
     generation_id: str
@@ -92,6 +141,11 @@ class DeploymentInfo(BaseModel):
     metrics: Optional[Dict[str, Any]] = None
 
 
+class DeploymentPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
 class MetricsResponse(BaseModel):
     deployment_id: str
     request_count: int
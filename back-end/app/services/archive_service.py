@@ -0,0 +1,224 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import io
+import os
+import tarfile
+import time
+import uuid
+import zipfile
+import logging
+
+from app.config import settings
+from app.services.lazy import Lazy
+
+try:
+    import zstandard
+except ImportError:  # optional, tar.zst downloads are refused without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Files are read and archive bytes handed out in pieces of this size
+CHUNK_SIZE = 64 * 1024
+
+# format -> (media type, file extension)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "zip": ("application/zip", "zip"),
+    "tar.zst": ("application/zstd", "tar.zst"),
+}
+
+# (path relative to the generation directory, absolute path, size, mtime in ns)
+FileEntry = Tuple[str, str, int, int]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects whatever is written to it until drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArchiveService:
+    """Zip and tar.zst packages of generation directories, produced as a stream.
+
+    Archives are deterministic: entries are sorted and carry each file's
+    own mtime, so the same directory always yields the same bytes. That
+    makes the ETag (a digest of paths, sizes and mtimes) a strong
+    validator, and lets a download cut short be resumed with Range from a
+    cached copy. The copy is written alongside the first full download and
+    served with FileResponse afterwards.
+    """
+
+    def __init__(self):
+        self.cache_dir = Path(settings.GENERATION_ARCHIVE_CACHE_DIR)
+
+    @staticmethod
+    def available(archive_format: str) -> bool:
+        return archive_format in FORMATS and (archive_format != "tar.zst" or zstandard is not None)
+
+    @staticmethod
+    def list_files(root: Path) -> List[FileEntry]:
+        """Every regular file under ``root``, sorted by relative path"""
+        entries: List[FileEntry] = []
+        pending = [(str(root), "")]
+        while pending:
+            directory, prefix = pending.pop()
+            with os.scandir(directory) as it:
+                for entry in it:
+                    relative = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, f"{relative}/"))
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        entries.append((relative, entry.path, stat.st_size, stat.st_mtime_ns))
+        entries.sort()
+        return entries
+
+    @staticmethod
+    def etag(files: List[FileEntry], archive_format: str) -> str:
+        digest = hashlib.sha256(archive_format.encode("utf-8"))
+        for relative, _, size, mtime_ns in files:
+            digest.update(f"{relative}\0{size}\0{mtime_ns}\n".encode("utf-8"))
+        return f'"{digest.hexdigest()[:32]}"'
+
+    def cache_path(self, generation_id: str, etag: str, archive_format: str) -> Path:
+        return self.cache_dir / f"{generation_id}.{etag.strip(chr(34))}.{FORMATS[archive_format][1]}"
+
+    def cached(self, generation_id: str, etag: str, archive_format: str) -> Optional[Path]:
+        path = self.cache_path(generation_id, etag, archive_format)
+        return path if path.is_file() else None
+
+    def stream(self, generation_id: str, files: List[FileEntry], etag: str,
+               archive_format: str) -> Iterator[bytes]:
+        """Yield the archive chunk by chunk, keeping a copy in the cache once it is complete.
+
+        Memory use is bounded by CHUNK_SIZE plus the compressor's window,
+        whatever the size of the generation.
+        """
+        target = self.cache_path(generation_id, etag, archive_format)
+        partial: Optional[Path] = None
+        copy = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            partial = target.with_name(f"{target.name}.{uuid.uuid4().hex}.part")
+            copy = open(partial, "wb")
+        except OSError as e:
+            logger.warning(f"Not caching archive of {generation_id}: {e}")
+
+        complete = False
+        try:
+            chunks = self._zip_chunks(files) if archive_format == "zip" else self._tar_zst_chunks(files)
+            for chunk in chunks:
+                if copy is not None:
+                    copy.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            if copy is not None:
+                copy.close()
+                if complete:
+                    os.replace(partial, target)
+                    self._drop_stale(generation_id, target, archive_format)
+                else:
+                    # Client went away; the next request starts over
+                    partial.unlink(missing_ok=True)
+
+    def build(self, generation_id: str, files: List[FileEntry], etag: str,
+              archive_format: str) -> Optional[Path]:
+        """Write the archive to the cache without sending it, for a Range request with nothing cached"""
+        for _ in self.stream(generation_id, files, etag, archive_format):
+            pass
+        return self.cached(generation_id, etag, archive_format)
+
+    def drop(self, generation_id: str) -> int:
+        """Remove every cached archive of a generation; returns the bytes freed"""
+        freed = 0
+        for path in self.cache_dir.glob(f"{generation_id}.*"):
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return freed
+
+    def _drop_stale(self, generation_id: str, current: Path, archive_format: str):
+        """Remove cached archives of earlier contents of the same generation"""
+        for path in self.cache_dir.glob(f"{generation_id}.*.{FORMATS[archive_format][1]}"):
+            if path != current:
+                path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _zip_chunks(files: List[FileEntry]) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        # An unseekable sink makes zipfile write sizes in data descriptors after each entry
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for relative, path, size, mtime_ns in files:
+                info = zipfile.ZipInfo(relative, date_time=time.gmtime(max(mtime_ns // 10**9, 315532800))[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                with open(path, "rb") as source, archive.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dest:
+                    for block in iter(lambda: source.read(CHUNK_SIZE), b""):
+                        dest.write(block)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                data = sink.drain()
+                if data:
+                    yield data
+        # Central directory
+        data = sink.drain()
+        if data:
+            yield data
+
+    @staticmethod
+    def _tar_zst_chunks(files: List[FileEntry]) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        compressor = zstandard.ZstdCompressor(level=settings.GENERATION_ARCHIVE_ZSTD_LEVEL)
+        with compressor.stream_writer(sink, closefd=False) as writer:
+            written = 0
+            for relative, path, size, mtime_ns in files:
+                info = tarfile.TarInfo(relative)
+                info.size = size
+                info.mtime = mtime_ns // 10**9
+                info.mode = 0o644
+                # Headers and data are written by hand so large files stream in chunks too
+                header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+                writer.write(header)
+                written += len(header)
+                with open(path, "rb") as source:
+                    remaining = size
+                    while remaining > 0:
+                        block = source.read(min(CHUNK_SIZE, remaining))
+                        if not block:
+                            raise OSError(f"{relative} shrank while being archived")
+                        writer.write(block)
+                        remaining -= len(block)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                padding = -size % tarfile.BLOCKSIZE
+                writer.write(tarfile.NUL * padding)
+                written += size + padding
+            # End-of-archive marker, padded to a whole record as tarfile does
+            trailer = 2 * tarfile.BLOCKSIZE
+            trailer += -(written + trailer) % tarfile.RECORDSIZE
+            writer.write(tarfile.NUL * trailer)
+        data = sink.drain()
+        if data:
+            yield data
+
+
+archive_service = Lazy(ArchiveService)
@@ -0,0 +1,334 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import logging
+
+from app.config import settings
+from app.services.lazy import Lazy
+
+logger = logging.getLogger(__name__)
+
+# Files are hashed and copied in pieces of this size
+CHUNK_SIZE = 1024 * 1024
+
+# ioctl that makes a file share another's extents (Btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+MATERIALIZE_MODES = ("hardlink", "reflink", "copy")
+
+# relative path -> (sha256 digest, size)
+Manifest = Dict[str, Tuple[str, int]]
+
+
+class ArtifactStore:
+    """Content-addressed store for generated files.
+
+    Every file is kept once under ``blobs/<aa>/<sha256>``, however many
+    generations produced it, and ``manifests/<generation_id>.json`` maps
+    a generation's relative paths to blob digests. After ingesting, files
+    in the generation directory are hardlinks (or reflinks) to their blobs,
+    so the near-identical Dockerfiles, manifests and monitoring configs of
+    thousands of generations share storage and inodes.
+
+    Blobs are made read-only because they are shared: code that rewrites a
+    materialised file has to replace it (write elsewhere, then rename)
+    rather than open it for writing. ``gc`` deletes blobs no manifest
+    refers to; a generation is released by removing its manifest. With
+    ARTIFACT_PRUNE_GENERATION_DIRS the directory itself is dropped after
+    ingesting and ``materialize`` rebuilds it when it is next needed.
+    """
+
+    def __init__(self):
+        self.root = Path(settings.ARTIFACT_STORE_DIR)
+        self.blob_dir = self.root / "blobs"
+        self.manifest_dir = self.root / "manifests"
+        self.mode = settings.ARTIFACT_MATERIALIZE_MODE
+        if self.mode not in MATERIALIZE_MODES:
+            raise ValueError(f"ARTIFACT_MATERIALIZE_MODE must be one of {MATERIALIZE_MODES}, got {self.mode!r}")
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        # Held by gc's sweep and by ingest, so a blob is never swept between
+        # being found and being linked to a new manifest in this process
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="artifact-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(settings.ARTIFACT_GC_INTERVAL_SECONDS):
+            try:
+                self.gc()
+            except OSError as e:
+                logger.warning(f"Artifact garbage collection failed: {e}")
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    def manifest_path(self, generation_id: str) -> Path:
+        return self.manifest_dir / f"{generation_id}.json"
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _walk(directory: Path) -> List[Tuple[str, str]]:
+        """(relative path, absolute path) of every regular file under ``directory``"""
+        files: List[Tuple[str, str]] = []
+        pending = [(str(directory), "")]
+        while pending:
+            current, prefix = pending.pop()
+            with os.scandir(current) as it:
+                for entry in it:
+                    relative = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, f"{relative}/"))
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append((relative, entry.path))
+        files.sort()
+        return files
+
+    def ingest(self, generation_id: str, directory: Path) -> Dict[str, Any]:
+        """Store every file of ``directory`` and record the generation's manifest.
+
+        Files whose content is already stored are swapped, atomically, for
+        a link to the existing blob.
+        """
+        manifest: Manifest = {}
+        new_blobs = 0
+        new_bytes = 0
+        with self._lock:
+            for relative, path in self._walk(directory):
+                digest = self._hash_file(path)
+                size = os.stat(path).st_size
+                blob = self.blob_path(digest)
+                manifest[relative] = (digest, size)
+                if self._add_blob(path, blob):
+                    new_blobs += 1
+                    new_bytes += size
+                elif not os.path.samefile(path, blob):
+                    self._materialize_file(blob, Path(path))
+            self._write_manifest(generation_id, manifest)
+        logger.info(f"Stored {len(manifest)} artifacts of {generation_id}, {new_blobs} new ({new_bytes} bytes)")
+        return {"files": len(manifest), "new_blobs": new_blobs, "new_bytes": new_bytes}
+
+    def _add_blob(self, path: str, blob: Path) -> bool:
+        """Put the content of ``path`` at ``blob``; False if it was already there"""
+        if blob.exists():
+            return False
+        blob.parent.mkdir(exist_ok=True)
+        if self.mode == "hardlink":
+            try:
+                # The generated file itself becomes the blob: no copy at all
+                os.link(path, blob)
+                os.chmod(blob, 0o444)
+                return True
+            except FileExistsError:
+                return False
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+        partial = blob.with_name(f"{blob.name}.{uuid.uuid4().hex}.part")
+        try:
+            self._clone_or_copy(Path(path), partial)
+            os.chmod(partial, 0o444)
+            os.replace(partial, blob)
+        finally:
+            partial.unlink(missing_ok=True)
+        return True
+
+    def _materialize_file(self, blob: Path, target: Path):
+        """Atomically make ``target`` a link to (or copy of) ``blob``"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+        try:
+            linked = False
+            if self.mode == "hardlink":
+                try:
+                    os.link(blob, partial)
+                    linked = True
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+            if not linked:
+                self._clone_or_copy(blob, partial)
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def _clone_or_copy(self, source: Path, target: Path):
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            if self.mode == "reflink":
+                try:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    return
+                except OSError:
+                    pass  # filesystem without reflinks; fall through to a copy
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    def _write_manifest(self, generation_id: str, manifest: Manifest):
+        target = self.manifest_path(generation_id)
+        partial = target.with_name(f"{target.name}.{uuid.uuid4().hex}.part")
+        document = {
+            "generation_id": generation_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "files": {relative: [digest, size] for relative, (digest, size) in manifest.items()},
+        }
+        partial.write_text(json.dumps(document, separators=(",", ":")))
+        os.replace(partial, target)
+
+    def manifest(self, generation_id: str) -> Optional[Manifest]:
+        try:
+            document = json.loads(self.manifest_path(generation_id).read_text())
+        except FileNotFoundError:
+            return None
+        return {relative: (digest, size) for relative, (digest, size) in document["files"].items()}
+
+    def materialize(self, generation_id: str, target: Path) -> Optional[Path]:
+        """Recreate a generation's directory at ``target`` from its manifest.
+
+        The files are assembled next to ``target`` and renamed into place,
+        so a concurrent reader sees either no directory or a complete one.
+        """
+        manifest = self.manifest(generation_id)
+        if manifest is None:
+            return None
+        staging = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+        try:
+            for relative, (digest, _) in manifest.items():
+                self._materialize_file(self.blob_path(digest), staging / relative)
+            staging.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(staging, target)
+            except OSError as e:
+                # Materialised by someone else in the meantime
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return target
+
+    def remove(self, generation_id: str) -> bool:
+        """Release a generation's blobs for the next gc"""
+        try:
+            self.manifest_path(generation_id).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _referenced(self) -> Set[str]:
+        digests: Set[str] = set()
+        with os.scandir(self.manifest_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path) as f:
+                        files = json.load(f)["files"]
+                except FileNotFoundError:
+                    continue  # removed while scanning
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Skipping unreadable manifest {entry.name}: {e}")
+                    continue
+                digests.update(digest for digest, _ in files.values())
+        return digests
+
+    def gc(self, grace_seconds: Optional[float] = None) -> Dict[str, int]:
+        """Delete blobs that no manifest refers to.
+
+        A blob whose inode changed within ``grace_seconds`` is kept: linking
+        a file updates its ctime, so this spares blobs another process is
+        in the middle of ingesting.
+        """
+        grace = settings.ARTIFACT_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        removed = 0
+        reclaimed = 0
+        kept = 0
+        with self._lock:
+            referenced = self._referenced()
+            cutoff = time.time() - grace
+            with os.scandir(self.blob_dir) as shards:
+                for shard in shards:
+                    if not shard.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(shard.path) as blobs:
+                        for blob in blobs:
+                            if blob.name in referenced:
+                                kept += 1
+                                continue
+                            stat = blob.stat(follow_symlinks=False)
+                            if stat.st_ctime > cutoff:
+                                kept += 1
+                                continue
+                            os.unlink(blob.path)
+                            removed += 1
+                            # Space only comes back once no generation directory links the inode either
+                            if stat.st_nlink <= 1:
+                                reclaimed += stat.st_size
+        if removed:
+            logger.info(f"Artifact gc removed {removed} blobs, {reclaimed} bytes reclaimed")
+        return {"removed": removed, "reclaimed_bytes": reclaimed, "kept": kept}
+
+    def stats(self) -> Dict[str, Any]:
+        """Stored versus logical size, to see what deduplication saves"""
+        blobs = 0
+        stored_bytes = 0
+        with os.scandir(self.blob_dir) as shards:
+            for shard in shards:
+                if shard.is_dir(follow_symlinks=False):
+                    with os.scandir(shard.path) as it:
+                        for blob in it:
+                            if not blob.name.endswith(".part"):
+                                blobs += 1
+                                stored_bytes += blob.stat(follow_symlinks=False).st_size
+        manifests = 0
+        files = 0
+        logical_bytes = 0
+        with os.scandir(self.manifest_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                manifest = self.manifest(entry.name[:-len(".json")])
+                if manifest is None:
+                    continue
+                manifests += 1
+                files += len(manifest)
+                logical_bytes += sum(size for _, size in manifest.values())
+        return {
+            "mode": self.mode,
+            "manifests": manifests,
+            "files": files,
+            "blobs": blobs,
+            "logical_bytes": logical_bytes,
+            "stored_bytes": stored_bytes,
+            "dedup_ratio": round(logical_bytes / stored_bytes, 2) if stored_bytes else None,
+        }
+
+
+artifact_store = Lazy(ArtifactStore)
@@ -12,6 +12,7 @@ cicd_service = CICDService()
 
 from pathlib import Path
 from typing import Dict, Any
+from app.services.lazy import Lazy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -236,4 +237,4 @@ jobs:
         return pipeline
 
 
-cicd_service = CICDService()
\ No newline at end of file
+cicd_service = Lazy(CICDService)
\ No newline at end of file
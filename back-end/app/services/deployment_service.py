@@ -1,10 +1,18 @@
 from pathlib import Path
-from typing import Dict, Any, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator, List, NamedTuple, Sequence, Set
+import hashlib
+import json
+import os
 import uuid
 import shutil
+import threading
 import logging
 from datetime import datetime
 
+from app.services.artifact_store import artifact_store
 from app.services.llm_service import llm_service
 from app.services.template_service import template_service
 from app.services.docker_service import docker_service
@@ -12,147 +20,91 @@ from app.services.kubernetes_service import kubernetes_service
 from app.services.terraform_service import terraform_service
 from app.services.cicd_service import cicd_service
 from app.services.monitoring_service import monitoring_service
+from app.services.stage_graph import Stage, run_stage_graph
+from app.config import settings
+from app.services.lazy import Lazy
 from app.schemas import AgentType, CloudProvider, DeploymentStatus
 
 logger = logging.getLogger(__name__)
 
+# Part of every stage fingerprint; bump it when a stage writes different
+# files for the same inputs, so regenerations stop reusing older outputs
+STAGE_FINGERPRINT_VERSION = 1
+
+
+def stage_fingerprint(stage: str, context: Dict[str, Any]) -> str:
+    """Hash of the inputs a stage renders its files from"""
+    material = {"version": STAGE_FINGERPRINT_VERSION, "stage": stage, "context": context}
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PreviousGeneration(NamedTuple):
+    """A finished generation whose unchanged stage outputs a regeneration may reuse"""
+    generation_id: str
+    output_dir: Path
+    # stage name -> {"fingerprint": ..., "files": [...], "result": ...}, as returned in "stages"
+    stages: Dict[str, Dict[str, Any]]
+
 
 class DeploymentService:
     def __init__(self):
         self.output_base_dir = Path("/tmp/paragon_generations")
         self.output_base_dir.mkdir(exist_ok=True)
+        self._stage_executor = ThreadPoolExecutor(
+            max_workers=settings.GENERATION_STAGE_WORKERS,
+            thread_name_prefix="generation-stage"
+        )
+        # generation_id -> deploys of it in progress, which have no deployment record yet
+        self._deploying: Counter = Counter()
+        self._deploying_lock = threading.Lock()
     
     def generate_full_deployment(self, prompt: str, agent_type: Optional[AgentType], 
                                 cloud_provider: CloudProvider, enable_monitoring: bool,
-                                enable_cicd: bool, enable_security_scan: bool) -> Dict[str, Any]:
-        """Generate complete deployment package from prompt"""
-        generation_id = str(uuid.uuid4())
+                                enable_cicd: bool, enable_security_scan: bool,
+                                generation_id: Optional[str] = None,
+                                progress: Optional[Callable[[str, str], None]] = None,
+                                on_token: Optional[Callable[[str, str], None]] = None,
+                                previous: Optional[PreviousGeneration] = None) -> Dict[str, Any]:
+        """Generate complete deployment package from prompt.
+        
+        The artifacts are produced by a small stage graph: only the agent code,
+        Kubernetes manifests and README need the parsed prompt, everything else
+        runs alongside it (or alongside the agent code LLM call when the
+        agent type has to be inferred).
+        
+        ``progress`` is called as ``progress(stage, status)`` whenever a stage
+        starts ("running") or ends ("completed"/"failed"/"skipped") so callers
+        can track a generation while it runs on a worker thread. ``on_token`` is
+        called as ``on_token(stage, text)`` with LLM output as it is streamed.
+        
+        Each stage's inputs are fingerprinted and returned under "stages".
+        Given the ``previous`` generation, a stage whose fingerprint is
+        unchanged copies that generation's files (and result) instead of
+        running, and is reported as "reused".
+        """
+        generation_id = generation_id or str(uuid.uuid4())
         output_dir = self.output_base_dir / generation_id
         output_dir.mkdir(exist_ok=True)
+        records: Dict[str, Dict[str, Any]] = {}
+        reused: Set[str] = set()
+        
+        def report(stage: str, status: str):
+            if progress:
+                progress(stage, "reused" if status == "completed" and stage in reused else status)
         
         try:
-            # Parse prompt using LLM
-            logger.info(f"Parsing deployment prompt for generation {generation_id}")
-            parsed_requirements = llm_service.parse_deployment_prompt(prompt)
-            
-            # Override with explicit parameters if provided
-            if agent_type:
-                parsed_requirements["agent_type"] = agent_type.value
-            parsed_requirements["cloud_provider"] = cloud_provider.value
-            
-            app_name = f"{parsed_requirements['agent_type']}-agent"
-            
-            # Generate agent code
-            logger.info("Generating agent code")
-            agent_code = llm_service.generate_agent_code(
-                parsed_requirements["agent_type"],
-                parsed_requirements
-            )
-            
-            # Write agent code
-            (output_dir / "main.py").write_text(agent_code)
-            
-            # Generate requirements.txt
-            requirements = self._generate_requirements(parsed_requirements["agent_type"])
-            (output_dir / "requirements.txt").write_text(requirements)
-            
-            # Generate Dockerfile
-            logger.info("Generating Dockerfile")
-            dockerfile_context = {
-                "port": 8000,
-                "app_name": app_name
-            }
-            dockerfile = template_service.render_dockerfile(dockerfile_context)
-            (output_dir / "Dockerfile").write_text(dockerfile)
-            
-            # Generate Kubernetes manifests
-            logger.info("Generating Kubernetes manifests")
-            k8s_dir = output_dir / "kubernetes"
-            k8s_dir.mkdir(exist_ok=True)
-            
-            k8s_context = {
-                "app_name": app_name,
-                "namespace": "default",
-                "version": "v1",
-                "replicas": parsed_requirements.get("scale_requirements", {}).get("replicas", 1),
-                "image": f"<registry>/{app_name}:latest",
-                "port": 8000,
-                "env_vars": {},
-                "memory_request": "256Mi",
-                "cpu_request": "100m",
-                "memory_limit": "512Mi",
-                "cpu_limit": "500m",
-                "service_type": "LoadBalancer"
-            }
-            
-            deployment_yaml = template_service.render_kubernetes_deployment(k8s_context)
-            (k8s_dir / "deployment.yaml").write_text(deployment_yaml)
-            
-            service_yaml = template_service.render_kubernetes_service(k8s_context)
-            (k8s_dir / "service.yaml").write_text(service_yaml)
-            
-            # Generate Terraform if AWS
-            if cloud_provider == CloudProvider.AWS:
-                logger.info("Generating Terraform configuration")
-                terraform_dir = output_dir / "terraform"
-                terraform_dir.mkdir(exist_ok=True)
-                
-                terraform_context = {
-                    "cluster_name": f"{app_name}-cluster",
-                    "aws_region": "us-east-1",
-                    "min_nodes": 1,
-                    "max_nodes": 5,
-                    "desired_nodes": 2,
-                    "instance_type": "t3.medium"
-                }
-                
-                terraform_config = template_service.render_terraform_eks(terraform_context)
-                (terraform_dir / "main.tf").write_text(terraform_config)
-            
-            # Generate CI/CD pipeline
-            if enable_cicd:
-                logger.info("Generating CI/CD pipeline")
-                cicd_dir = output_dir / ".github" / "workflows"
-                cicd_dir.mkdir(parents=True, exist_ok=True)
-                
-                cicd_context = {
-                    "app_name": app_name,
-                    "aws_region": "us-east-1",
-                    "ecr_repository": app_name,
-                    "cluster_name": f"{app_name}-cluster",
-                    "namespace": "default"
-                }
-                
-                github_workflow = cicd_service.generate_github_actions(cicd_context)
-                (cicd_dir / "deploy.yml").write_text(github_workflow)
-            
-            # Generate monitoring configs
-            if enable_monitoring:
-                logger.info("Generating monitoring configuration")
-                monitoring_dir = output_dir / "monitoring"
-                monitoring_dir.mkdir(exist_ok=True)
-                
-                monitoring_context = {
-                    "app_name": app_name,
-                    "namespace": "default"
-                }
-                
-                prometheus_config = monitoring_service.generate_prometheus_config(monitoring_context)
-                (monitoring_dir / "prometheus.yaml").write_text(prometheus_config)
-                
-                grafana_config = monitoring_service.generate_grafana_config(monitoring_context)
-                (monitoring_dir / "grafana.yaml").write_text(grafana_config)
-                
-                dashboard = monitoring_service.generate_grafana_dashboard(monitoring_context)
-                (monitoring_dir / "dashboard.json").write_text(dashboard)
-            
-            # Generate README
-            readme = self._generate_readme(app_name, parsed_requirements, cloud_provider)
-            (output_dir / "README.md").write_text(readme)
+            stages = self._build_stages(prompt, agent_type, cloud_provider, output_dir,
+                                        enable_monitoring, enable_cicd, on_token, previous, records, reused)
+            results = run_stage_graph(stages, self._stage_executor, report)
+            parsed_requirements = results["parse_prompt"]
             
             # List all generated files
             files_generated = [str(f.relative_to(output_dir)) for f in output_dir.rglob("*") if f.is_file()]
             
+            if settings.ARTIFACT_STORE_ENABLED:
+                self._store_artifacts(generation_id, output_dir)
+            
             logger.info(f"Generation complete: {len(files_generated)} files created")
             
             return {
@@ -160,7 +112,9 @@ class DeploymentService:
                 "status": "success",
                 "output_path": str(output_dir),
                 "files_generated": files_generated,
-                "parsed_requirements": parsed_requirements
+                "parsed_requirements": parsed_requirements,
+                "stages": records,
+                "reused_stages": sorted(reused)
             }
         
         except Exception as e:
@@ -172,24 +126,297 @@ class DeploymentService:
                 "files_generated": []
             }
     
+    def _store_artifacts(self, generation_id: str, output_dir: Path):
+        """Deduplicate the generated files against the artifact store; the files stay usable if it fails"""
+        try:
+            artifact_store.ingest(generation_id, output_dir)
+        except OSError as e:
+            logger.warning(f"Could not store artifacts of {generation_id}: {e}")
+            return
+        if settings.ARTIFACT_PRUNE_GENERATION_DIRS:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    
+    def has_output(self, generation_id: str) -> bool:
+        """Whether a generation's files still exist, as a directory or in the artifact store"""
+        if (self.output_base_dir / generation_id).is_dir():
+            return True
+        return settings.ARTIFACT_STORE_ENABLED and artifact_store.manifest_path(generation_id).is_file()
+    
+    def generation_dir(self, generation_id: str) -> Optional[Path]:
+        """The output directory of a generation, rebuilt from the artifact store if it was pruned"""
+        output_dir = self.output_base_dir / generation_id
+        if output_dir.is_dir():
+            return output_dir
+        if settings.ARTIFACT_STORE_ENABLED:
+            return artifact_store.materialize(generation_id, output_dir)
+        return None
+    
+    def _build_stages(self, prompt: str, agent_type: Optional[AgentType], cloud_provider: CloudProvider,
+                      output_dir: Path, enable_monitoring: bool, enable_cicd: bool,
+                      on_token: Optional[Callable[[str, str], None]] = None,
+                      previous: Optional[PreviousGeneration] = None,
+                      records: Optional[Dict[str, Dict[str, Any]]] = None,
+                      reused: Optional[Set[str]] = None) -> List[Stage]:
+        """Describe the generation pipeline as stages and their dependencies.
+        
+        Stages that write files return the paths they wrote. Each stage's
+        fingerprint, files and (for parse_prompt) result go to ``records``,
+        and the names of stages copied from ``previous`` to ``reused``.
+        """
+        records = {} if records is None else records
+        reused = set() if reused is None else reused
+        # With an explicit agent type the app name is known up front, so stages
+        # that only need the name don't have to wait for the prompt to be parsed.
+        name_deps = () if agent_type else ("parse_prompt",)
+        
+        def agent_type_of(deps: Dict[str, Any]) -> str:
+            return agent_type.value if agent_type else deps["parse_prompt"]["agent_type"]
+        
+        def app_name_of(deps: Dict[str, Any]) -> str:
+            return f"{agent_type_of(deps)}-agent"
+        
+        def tracked(name: str, context: Callable[[Dict[str, Any]], Dict[str, Any]],
+                    produce: Callable[[Dict[str, Any]], Any], depends_on: Sequence[str] = (),
+                    writes_files: bool = True, adapt: Callable[[Any], Any] = lambda result: result) -> Stage:
+            """A stage that is skipped, its outputs copied, when ``context`` matches the previous run's"""
+            def run(deps: Dict[str, Any]) -> Any:
+                fingerprint = stage_fingerprint(name, context(deps))
+                prior = previous.stages.get(name) if previous else None
+                if (prior is not None and prior.get("fingerprint") == fingerprint
+                        and self._reuse_outputs(previous.output_dir, output_dir, prior.get("files", []))):
+                    records[name] = {"fingerprint": fingerprint, "files": prior.get("files", []),
+                                     "result": prior.get("result")}
+                    reused.add(name)
+                    return adapt(prior.get("result")) if not writes_files else prior.get("files", [])
+                result = produce(deps)
+                records[name] = {"fingerprint": fingerprint, "files": result if writes_files else [],
+                                 "result": None if writes_files else result}
+                return result
+            return Stage(name, run, depends_on=depends_on)
+        
+        def parsed_with_provider(parsed: Dict[str, Any]) -> Dict[str, Any]:
+            # The cloud provider is not sent to the LLM, so changing it does not re-parse the prompt
+            return {**parsed, "cloud_provider": cloud_provider.value}
+        
+        stages = [
+            tracked("parse_prompt",
+                    lambda deps: {"prompt": prompt, "agent_type": agent_type.value if agent_type else None},
+                    lambda deps: self._parse_prompt(prompt, agent_type, cloud_provider),
+                    writes_files=False, adapt=parsed_with_provider),
+            tracked("agent_code", lambda deps: {"requirements": deps["parse_prompt"]},
+                    lambda deps: self._write_agent_code(output_dir, deps["parse_prompt"], on_token),
+                    depends_on=("parse_prompt",)),
+            tracked("requirements", lambda deps: {"agent_type": agent_type_of(deps)},
+                    lambda deps: self._write_requirements(output_dir, agent_type_of(deps)),
+                    depends_on=name_deps),
+            tracked("dockerfile", lambda deps: {"app_name": app_name_of(deps)},
+                    lambda deps: self._write_dockerfile(output_dir, app_name_of(deps)),
+                    depends_on=name_deps),
+            tracked("kubernetes",
+                    lambda deps: {"app_name": app_name_of(deps),
+                                  "replicas": deps["parse_prompt"].get("scale_requirements", {}).get("replicas", 1)},
+                    lambda deps: self._write_kubernetes_manifests(output_dir, app_name_of(deps), deps["parse_prompt"]),
+                    depends_on=("parse_prompt",)),
+            tracked("readme",
+                    lambda deps: {"app_name": app_name_of(deps), "requirements": deps["parse_prompt"],
+                                  "cloud_provider": cloud_provider.value},
+                    lambda deps: self._write_readme(output_dir, app_name_of(deps), deps["parse_prompt"], cloud_provider),
+                    depends_on=("parse_prompt",)),
+        ]
+        
+        if cloud_provider == CloudProvider.AWS:
+            stages.append(tracked("terraform", lambda deps: {"app_name": app_name_of(deps)},
+                                  lambda deps: self._write_terraform(output_dir, app_name_of(deps)),
+                                  depends_on=name_deps))
+        if enable_cicd:
+            stages.append(tracked("cicd", lambda deps: {"app_name": app_name_of(deps)},
+                                  lambda deps: self._write_cicd(output_dir, app_name_of(deps)),
+                                  depends_on=name_deps))
+        if enable_monitoring:
+            stages.append(tracked("monitoring", lambda deps: {"app_name": app_name_of(deps)},
+                                  lambda deps: self._write_monitoring(output_dir, app_name_of(deps)),
+                                  depends_on=name_deps))
+        
+        return stages
+    
+    @staticmethod
+    def _reuse_outputs(source_dir: Path, output_dir: Path, files: List[str]) -> bool:
+        """Copy a previous stage's files; False, with nothing copied, if any of them is missing"""
+        if not all((source_dir / relative).is_file() for relative in files):
+            return False
+        for relative in files:
+            target = output_dir / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if settings.ARTIFACT_STORE_ENABLED:
+                # Store-managed files are read-only and never rewritten in place, so they can be shared
+                try:
+                    os.link(source_dir / relative, target)
+                    continue
+                except OSError:
+                    pass
+            shutil.copy2(source_dir / relative, target)
+        return True
+    
+    def _parse_prompt(self, prompt: str, agent_type: Optional[AgentType],
+                      cloud_provider: CloudProvider) -> Dict[str, Any]:
+        # Parse prompt using LLM
+        logger.info("Parsing deployment prompt")
+        parsed_requirements = llm_service.parse_deployment_prompt(prompt)
+        
+        # Override with explicit parameters if provided
+        if agent_type:
+            parsed_requirements["agent_type"] = agent_type.value
+        parsed_requirements["cloud_provider"] = cloud_provider.value
+        return parsed_requirements
+    
+    def _write_agent_code(self, output_dir: Path, parsed_requirements: Dict[str, Any],
+                          on_token: Optional[Callable[[str, str], None]] = None) -> List[str]:
+        logger.info("Generating agent code")
+        agent_code = llm_service.generate_agent_code(
+            parsed_requirements["agent_type"],
+            parsed_requirements,
+            on_token=(lambda text: on_token("agent_code", text)) if on_token else None
+        )
+        (output_dir / "main.py").write_text(agent_code)
+        return ["main.py"]
+    
+    def _write_requirements(self, output_dir: Path, agent_type: str) -> List[str]:
+        requirements = self._generate_requirements(agent_type)
+        (output_dir / "requirements.txt").write_text(requirements)
+        return ["requirements.txt"]
+    
+    def _write_dockerfile(self, output_dir: Path, app_name: str) -> List[str]:
+        logger.info("Generating Dockerfile")
+        dockerfile_context = {
+            "port": 8000,
+            "app_name": app_name
+        }
+        dockerfile = template_service.render_dockerfile(dockerfile_context)
+        (output_dir / "Dockerfile").write_text(dockerfile)
+        return ["Dockerfile"]
+    
+    def _write_kubernetes_manifests(self, output_dir: Path, app_name: str,
+                                    parsed_requirements: Dict[str, Any]) -> List[str]:
+        logger.info("Generating Kubernetes manifests")
+        k8s_dir = output_dir / "kubernetes"
+        k8s_dir.mkdir(exist_ok=True)
+        
+        k8s_context = {
+            "app_name": app_name,
+            "namespace": "default",
+            "version": "v1",
+            "replicas": parsed_requirements.get("scale_requirements", {}).get("replicas", 1),
+            "image": f"<registry>/{app_name}:latest",
+            "port": 8000,
+            "env_vars": {},
+            "memory_request": "256Mi",
+            "cpu_request": "100m",
+            "memory_limit": "512Mi",
+            "cpu_limit": "500m",
+            "service_type": "LoadBalancer"
+        }
+        
+        deployment_yaml = template_service.render_kubernetes_deployment(k8s_context)
+        (k8s_dir / "deployment.yaml").write_text(deployment_yaml)
+        
+        service_yaml = template_service.render_kubernetes_service(k8s_context)
+        (k8s_dir / "service.yaml").write_text(service_yaml)
+        return ["kubernetes/deployment.yaml", "kubernetes/service.yaml"]
+    
+    def _write_terraform(self, output_dir: Path, app_name: str) -> List[str]:
+        logger.info("Generating Terraform configuration")
+        terraform_dir = output_dir / "terraform"
+        terraform_dir.mkdir(exist_ok=True)
+        
+        terraform_context = {
+            "cluster_name": f"{app_name}-cluster",
+            "aws_region": "us-east-1",
+            "min_nodes": 1,
+            "max_nodes": 5,
+            "desired_nodes": 2,
+            "instance_type": "t3.medium"
+        }
+        
+        terraform_config = template_service.render_terraform_eks(terraform_context)
+        (terraform_dir / "main.tf").write_text(terraform_config)
+        return ["terraform/main.tf"]
+    
+    def _write_cicd(self, output_dir: Path, app_name: str) -> List[str]:
+        logger.info("Generating CI/CD pipeline")
+        cicd_dir = output_dir / ".github" / "workflows"
+        cicd_dir.mkdir(parents=True, exist_ok=True)
+        
+        cicd_context = {
+            "app_name": app_name,
+            "aws_region": "us-east-1",
+            "ecr_repository": app_name,
+            "cluster_name": f"{app_name}-cluster",
+            "namespace": "default"
+        }
+        
+        github_workflow = cicd_service.generate_github_actions(cicd_context)
+        (cicd_dir / "deploy.yml").write_text(github_workflow)
+        return [".github/workflows/deploy.yml"]
+    
+    def _write_monitoring(self, output_dir: Path, app_name: str) -> List[str]:
+        logger.info("Generating monitoring configuration")
+        monitoring_dir = output_dir / "monitoring"
+        monitoring_dir.mkdir(exist_ok=True)
+        
+        monitoring_context = {
+            "app_name": app_name,
+            "namespace": "default"
+        }
+        
+        prometheus_config = monitoring_service.generate_prometheus_config(monitoring_context)
+        (monitoring_dir / "prometheus.yaml").write_text(prometheus_config)
+        
+        grafana_config = monitoring_service.generate_grafana_config(monitoring_context)
+        (monitoring_dir / "grafana.yaml").write_text(grafana_config)
+        
+        dashboard = monitoring_service.generate_grafana_dashboard(monitoring_context)
+        (monitoring_dir / "dashboard.json").write_text(dashboard)
+        return ["monitoring/prometheus.yaml", "monitoring/grafana.yaml", "monitoring/dashboard.json"]
+    
+    def _write_readme(self, output_dir: Path, app_name: str, parsed_requirements: Dict[str, Any],
+                      cloud_provider: CloudProvider) -> List[str]:
+        readme = self._generate_readme(app_name, parsed_requirements, cloud_provider)
+        (output_dir / "README.md").write_text(readme)
+        return ["README.md"]
+    
+    @contextmanager
+    def deploying(self, generation_id: str) -> Iterator[None]:
+        """Mark a generation as being deployed until its deployment is recorded, so retention keeps it"""
+        with self._deploying_lock:
+            self._deploying[generation_id] += 1
+        try:
+            yield
+        finally:
+            with self._deploying_lock:
+                self._deploying[generation_id] -= 1
+                if not self._deploying[generation_id]:
+                    del self._deploying[generation_id]
+    
+    def deploying_generation_ids(self) -> Set[str]:
+        with self._deploying_lock:
+            return set(self._deploying)
+    
     def deploy_to_kubernetes(self, generation_id: str, namespace: str, 
                             replicas: int) -> Dict[str, Any]:
         """Deploy generated application to Kubernetes"""
-        output_dir = self.output_base_dir / generation_id
+        output_dir = self.generation_dir(generation_id)
         
-        if not output_dir.exists():
+        if output_dir is None:
             return {"status": "failed", "error": "Generation not found"}
         
         try:
-            # Create namespace
-            kubernetes_service.create_namespace(namespace)
-            
-            # Apply Kubernetes manifests
+            # Apply the namespace and every manifest as one ordered batch
             k8s_dir = output_dir / "kubernetes"
-            for manifest in k8s_dir.glob("*.yaml"):
-                success = kubernetes_service.apply_manifest(str(manifest))
-                if not success:
-                    return {"status": "failed", "error": f"Failed to apply {manifest.name}"}
+            applied = kubernetes_service.apply_manifests(sorted(str(p) for p in k8s_dir.glob("*.yaml")),
+                                                         namespace=namespace)
+            if applied["error"]:
+                failed = ", ".join(applied["failed"]) or "manifests"
+                return {"status": "failed", "error": f"Failed to apply {failed}: {applied['error']}"}
             
             # Get deployment status
             app_name = self._extract_app_name(output_dir)
@@ -198,8 +425,11 @@ class DeploymentService:
             
             return {
                 "status": "deployed" if status.get("ready") else "deploying",
+                "app_name": app_name,
                 "deployment_status": status,
-                "endpoint": endpoint
+                "endpoint": endpoint,
+                "applied": applied["applied"],
+                "unchanged": applied["unchanged"]
             }
         
         except Exception as e:
@@ -308,4 +538,4 @@ Generated by ParagonAI Platform
         return "agent-app"
 
 
-deployment_service = DeploymentService()
\ No newline at end of file
+deployment_service = Lazy(DeploymentService)
\ No newline at end of file
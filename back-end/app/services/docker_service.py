@@ -1,8 +1,8 @@
-import docker
 import subprocess
 from pathlib import Path
 from typing import Optional
 from app.config import settings
+from app.services.lazy import Lazy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +11,8 @@ logger = logging.getLogger(__name__)
 class DockerService:
     def __init__(self):
         try:
+            # Deferred: the SDK is slow to import and the CLI fallback works without it
+            import docker
             self.client = docker.from_env()
         except Exception as e:
             logger.warning(f"Docker client initialization failed: {e}")
@@ -132,4 +134,4 @@ class DockerService:
             return {"vulnerabilities": [], "error": str(e)}
 
 
-docker_service = DockerService()
\ No newline at end of file
+docker_service = Lazy(DockerService)
\ No newline at end of file
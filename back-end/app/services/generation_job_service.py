@@ -0,0 +1,440 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import threading
+import uuid
+import logging
+
+from app.config import settings
+from app.models import Generation
+from app.schemas import GenerateRequest, GenerationStatus
+from app.services.deployment_service import PreviousGeneration, deployment_service
+from app.services.lazy import Lazy
+from app.services.repositories import RepositoryUnavailableError, generation_repository
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """Raised when the generation worker pool has no room for another job"""
+
+
+class IdempotencyKeyConflictError(Exception):
+    """Raised when an Idempotency-Key is reused with a different request"""
+
+
+class RegenerationError(Exception):
+    """Raised when a generation cannot serve as the base of a regeneration"""
+
+
+class GenerationNotFoundError(Exception):
+    """Raised when a generation is neither in memory nor stored"""
+
+
+def request_fingerprint(request: GenerateRequest) -> str:
+    """Hash of everything in a request that shapes its output, with the prompt's whitespace normalised"""
+    material = {
+        "prompt": " ".join(request.prompt.split()),
+        "agent_type": request.agent_type.value if request.agent_type else None,
+        "cloud_provider": request.cloud_provider.value,
+        "enable_monitoring": request.enable_monitoring,
+        "enable_cicd": request.enable_cicd,
+        "enable_security_scan": request.enable_security_scan,
+    }
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def request_key(request: GenerateRequest, header: Optional[str] = None) -> str:
+    """The client's Idempotency-Key if it sent one, otherwise the request fingerprint"""
+    if header:
+        return hashlib.sha256(f"header\0{header}".encode("utf-8")).hexdigest()
+    return request_fingerprint(request)
+
+
+class GenerationJob:
+    def __init__(self, generation_id: str, request: GenerateRequest, idempotency_key: Optional[str] = None,
+                 previous: Optional[PreviousGeneration] = None):
+        self.generation_id = generation_id
+        self.request = request
+        self.fingerprint = request_fingerprint(request)
+        self.idempotency_key = idempotency_key
+        self.previous = previous
+        # stage name -> fingerprint, files and result, what a later regeneration reuses
+        self.stage_outputs: Dict[str, Dict[str, Any]] = {}
+        self.status = GenerationStatus.PENDING
+        self.stages: List[Dict[str, Any]] = []
+        self.files_generated: List[str] = []
+        self.output_path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (GenerationStatus.SUCCESS, GenerationStatus.FAILED)
+
+    def record_stage(self, stage: str, status: str):
+        """Record a stage transition reported by the deployment pipeline"""
+        now = datetime.utcnow()
+        entry = next((s for s in self.stages if s["name"] == stage), None)
+        if entry is None:
+            entry = {"name": stage, "status": status, "started_at": now, "finished_at": None}
+            self.stages.append(entry)
+        entry["status"] = status
+        if status in ("completed", "reused", "failed", "skipped"):
+            entry["finished_at"] = now
+        self.updated_at = now
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        """Append an event to the job's log and hand it to every live subscriber"""
+        item = {"event": event, "data": data}
+        self.events.append(item)
+        for loop, queue in self.subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    @classmethod
+    def from_record(cls, record: Generation, request: GenerateRequest, idempotency_key: str) -> "GenerationJob":
+        """A finished job standing in for a stored generation, so a replayed request can be served from memory"""
+        job = cls(record.id, request, idempotency_key)
+        job.status = GenerationStatus(record.status)
+        job.files_generated = list(record.files_generated)
+        job.output_path = record.output_path
+        job.error = record.error_message
+        job.stage_outputs = dict(record.stage_outputs)
+        job.created_at = record.created_at
+        job.updated_at = record.updated_at
+        job.events.append({"event": "done", "data": {
+            "status": job.status.value, "files_generated": job.files_generated, "error": job.error,
+        }})
+        return job
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "generation_id": self.generation_id,
+            "status": self.status,
+            "stages": [dict(s) for s in self.stages],
+            "files_generated": list(self.files_generated),
+            "output_path": self.output_path,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class GenerationJobService:
+    """Runs generate_full_deployment on a bounded worker pool off the event loop"""
+
+    def __init__(self, max_workers: int, max_pending: int, history_size: int):
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="generation")
+        self._jobs: "OrderedDict[str, GenerationJob]" = OrderedDict()
+        # idempotency key -> generation_id of the latest job submitted with it
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request: GenerateRequest, key: Optional[str] = None,
+               previous: Optional[PreviousGeneration] = None) -> Tuple[GenerationJob, bool]:
+        """Queue a generation and return its job immediately, with whether it is a replay.
+        
+        With ``key`` (see request_key()), a request matching a job that
+        is still running gets that job back, and one matching a successful
+        generation younger than GENERATION_IDEMPOTENCY_TTL_SECONDS whose
+        output still exists gets the finished job, without running the
+        pipeline again. Failed generations are never replayed. Blocking: a
+        key not known in memory is looked up in MongoDB. ``previous`` is
+        handed to generate_full_deployment for stages to reuse.
+        """
+        fingerprint = request_fingerprint(request)
+        if key is not None:
+            with self._lock:
+                job = self._replayable(self._jobs.get(self._by_key.get(key, "")), fingerprint)
+            # The output check stats the filesystem, so it is made outside the lock
+            if job is None or not self._output_exists(job):
+                job = self._replayable(self._load_replay(key, request), fingerprint)
+                if job is not None and not self._output_exists(job):
+                    job = None
+            if job is not None:
+                logger.info(f"Replaying generation {job.generation_id} for a duplicate request")
+                return job, True
+
+        with self._lock:
+            # A duplicate may have been queued while MongoDB was being asked
+            if key is not None:
+                job = self._replayable(self._jobs.get(self._by_key.get(key, "")), fingerprint)
+                if job is not None and not job.finished:
+                    return job, True
+
+            active = sum(1 for job in self._jobs.values() if not job.finished)
+            if active >= self.max_pending:
+                raise JobQueueFullError(f"{active} generations already queued or running")
+
+            job = GenerationJob(str(uuid.uuid4()), request, key, previous)
+            self._jobs[job.generation_id] = job
+            if key is not None:
+                self._by_key[key] = job.generation_id
+            self._evict_finished()
+
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued generation {job.generation_id}")
+        return job, False
+
+    def regenerate(self, generation_id: str, changes: Dict[str, Any],
+                   key_header: Optional[str] = None) -> Tuple[GenerationJob, bool]:
+        """Queue a new generation from an earlier one's request with ``changes`` applied.
+        
+        Only stages whose inputs changed run again; the others copy their
+        files from the earlier generation. The earlier generation is left
+        as it was. Returns like submit(), and a request that matches an
+        existing generation is replayed as there. Blocking: reads the
+        earlier generation from MongoDB when it is no longer in memory.
+        Raises GenerationNotFoundError for an unknown generation and
+        RegenerationError when it did not succeed, predates stage
+        fingerprints or lost its files.
+        """
+        with self._lock:
+            job = self._jobs.get(generation_id)
+            if job is not None:
+                request, status, stage_outputs = job.request, job.status, dict(job.stage_outputs)
+        if job is None:
+            record = generation_repository.get(generation_id)
+            if record is None:
+                raise GenerationNotFoundError(generation_id)
+            request = GenerateRequest(**record.request) if record.request else None
+            status, stage_outputs = GenerationStatus(record.status), record.stage_outputs
+        if status != GenerationStatus.SUCCESS:
+            raise RegenerationError(f"Generation {generation_id} is {status.value}; "
+                                    f"only successful generations can be regenerated")
+        if request is None or not stage_outputs:
+            raise RegenerationError(f"Generation {generation_id} has no recorded stage inputs")
+        output_dir = deployment_service.generation_dir(generation_id)
+        if output_dir is None:
+            raise RegenerationError(f"The files of generation {generation_id} no longer exist")
+
+        updated = GenerateRequest(**{**request.model_dump(), **changes})
+        key = None
+        if key_header or settings.GENERATION_IDEMPOTENCY_ENABLED:
+            key = request_key(updated, key_header)
+        return self.submit(updated, key, PreviousGeneration(generation_id, output_dir, stage_outputs))
+
+    def _replayable(self, job: Optional[GenerationJob], fingerprint: str) -> Optional[GenerationJob]:
+        """``job`` if a request with this fingerprint may be answered with it, output aside (see _output_exists)"""
+        if job is None or job.status == GenerationStatus.FAILED:
+            return None
+        if job.finished:
+            # An expired key is free again, as it is once MongoDB no longer returns the job
+            age = (datetime.utcnow() - job.updated_at).total_seconds()
+            if age > settings.GENERATION_IDEMPOTENCY_TTL_SECONDS:
+                return None
+        if job.fingerprint != fingerprint:
+            # Only possible for an Idempotency-Key sent with another request
+            raise IdempotencyKeyConflictError(f"Idempotency-Key already used for generation {job.generation_id}")
+        return job
+
+    @staticmethod
+    def _output_exists(job: GenerationJob) -> bool:
+        """Whether a replayable job still has its files; a job in flight is writing them"""
+        return not job.finished or deployment_service.has_output(job.generation_id)
+
+    def _load_replay(self, key: str, request: GenerateRequest) -> Optional[GenerationJob]:
+        """The latest successful stored generation for ``key``, loaded as a finished job"""
+        from pymongo.errors import PyMongoError
+        since = datetime.utcnow() - timedelta(seconds=settings.GENERATION_IDEMPOTENCY_TTL_SECONDS)
+        try:
+            record = generation_repository.latest_success(key, since)
+        except (RepositoryUnavailableError, PyMongoError) as e:
+            logger.warning(f"Could not look up earlier generations, running the request again: {e}")
+            return None
+        if record is None:
+            return None
+        job = GenerationJob.from_record(record, request, key)
+        # Compared by _replayable, to catch an Idempotency-Key reused for another request
+        job.fingerprint = record.request_fingerprint or job.fingerprint
+        with self._lock:
+            existing = self._jobs.get(record.id)
+            if existing is not None:
+                return existing
+            self._jobs[job.generation_id] = job
+            self._by_key[key] = job.generation_id
+            self._evict_finished()
+        return job
+
+    def get(self, generation_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(generation_id)
+
+    def active_generation_ids(self) -> Set[str]:
+        """Generations being written, and those that running regenerations copy from"""
+        with self._lock:
+            active = set()
+            for job in self._jobs.values():
+                if not job.finished:
+                    active.add(job.generation_id)
+                    if job.previous is not None:
+                        active.add(job.previous.generation_id)
+            return active
+
+    def snapshot(self, generation_id: str) -> Optional[Dict[str, Any]]:
+        """Return a consistent copy of a job's state for serialisation"""
+        with self._lock:
+            job = self._jobs.get(generation_id)
+            return job.to_dict() if job else None
+
+    def subscribe(self, generation_id: str) -> Optional[Tuple[asyncio.Queue, List[Dict[str, Any]]]]:
+        """Register the running event loop for a job's events.
+        
+        Returns a queue that receives future events and the events published
+        so far, or None for an unknown job. Must be called from the loop that
+        will read the queue.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            job = self._jobs.get(generation_id)
+            if job is None:
+                return None
+            job.subscribers.append((loop, queue))
+            return queue, list(job.events)
+
+    def unsubscribe(self, generation_id: str, queue: asyncio.Queue):
+        with self._lock:
+            job = self._jobs.get(generation_id)
+            if job is not None:
+                job.subscribers = [(l, q) for l, q in job.subscribers if q is not queue]
+
+    def load(self, generation_id: str) -> Optional[Dict[str, Any]]:
+        """Like snapshot(), falling back to the stored record for jobs no longer in memory.
+        
+        Blocking: queries MongoDB when the job is not held in memory.
+        """
+        snapshot = self.snapshot(generation_id)
+        if snapshot is not None:
+            return snapshot
+        record = generation_repository.get(generation_id)
+        if record is None:
+            return None
+        return {
+            "generation_id": record.id,
+            "status": record.status,
+            "stages": [],
+            "files_generated": record.files_generated,
+            "output_path": record.output_path,
+            "error": record.error_message,
+            "created_at": record.created_at,
+            "updated_at": record.updated_at,
+        }
+
+    def _persist(self, job: GenerationJob, result: Optional[Dict[str, Any]] = None):
+        """Record the job in the generations collection; a database outage never fails the job"""
+        from pymongo.errors import PyMongoError
+        request = job.request
+        try:
+            if result is None:
+                generation_repository.insert(Generation(
+                    _id=job.generation_id,
+                    prompt=request.prompt,
+                    agent_type=request.agent_type.value if request.agent_type else None,
+                    cloud_provider=request.cloud_provider.value,
+                    status=job.status.value,
+                    idempotency_key=job.idempotency_key,
+                    request_fingerprint=job.fingerprint,
+                    request=request.model_dump(mode="json"),
+                    base_generation_id=job.previous.generation_id if job.previous else None,
+                    created_at=job.created_at,
+                    updated_at=job.updated_at,
+                ))
+                return
+            fields = {
+                "status": job.status.value,
+                "files_generated": job.files_generated,
+                "output_path": job.output_path,
+                "error_message": job.error,
+                "stage_outputs": job.stage_outputs,
+            }
+            parsed = result.get("parsed_requirements") or {}
+            if parsed.get("agent_type"):
+                fields["agent_type"] = parsed["agent_type"]
+            generation_repository.update(job.generation_id, fields)
+        except (RepositoryUnavailableError, PyMongoError) as e:
+            logger.warning(f"Could not persist generation {job.generation_id}: {e}")
+
+    def _run(self, job: GenerationJob):
+        with self._lock:
+            job.status = GenerationStatus.RUNNING
+            job.updated_at = datetime.utcnow()
+            job.publish("status", {"status": job.status.value})
+        self._persist(job)
+
+        def report(stage: str, status: str):
+            with self._lock:
+                job.record_stage(stage, status)
+                job.publish("stage", {"stage": stage, "status": status})
+
+        def relay(stage: str, text: str):
+            with self._lock:
+                job.publish("token", {"stage": stage, "text": text})
+
+        request = job.request
+        try:
+            result = deployment_service.generate_full_deployment(
+                prompt=request.prompt,
+                agent_type=request.agent_type,
+                cloud_provider=request.cloud_provider,
+                enable_monitoring=request.enable_monitoring,
+                enable_cicd=request.enable_cicd,
+                enable_security_scan=request.enable_security_scan,
+                generation_id=job.generation_id,
+                progress=report,
+                on_token=relay,
+                previous=job.previous,
+            )
+        except Exception as e:
+            logger.error(f"Generation {job.generation_id} crashed: {e}", exc_info=True)
+            result = {"status": "failed", "error": str(e), "files_generated": []}
+
+        with self._lock:
+            if result.get("status") == "success":
+                job.status = GenerationStatus.SUCCESS
+                job.files_generated = result.get("files_generated", [])
+                job.output_path = result.get("output_path")
+                job.stage_outputs = result.get("stages", {})
+            else:
+                job.status = GenerationStatus.FAILED
+                job.error = result.get("error", "Generation failed")
+            job.updated_at = datetime.utcnow()
+            # Token events are only worth replaying to a client that joins mid-run;
+            # the code they carry is in main.py now, so finished jobs keep the rest
+            job.events = [item for item in job.events if item["event"] != "token"]
+            job.publish("done", {
+                "status": job.status.value,
+                "files_generated": job.files_generated,
+                "error": job.error,
+            })
+            job.subscribers = []
+            # The earlier generation's files are only needed while this one runs
+            job.previous = None
+        self._persist(job, result)
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs once the history limit is exceeded"""
+        excess = len(self._jobs) - self.history_size
+        if excess <= 0:
+            return
+        for generation_id in [gid for gid, job in self._jobs.items() if job.finished][:excess]:
+            job = self._jobs.pop(generation_id)
+            if job.idempotency_key is not None and self._by_key.get(job.idempotency_key) == generation_id:
+                del self._by_key[job.idempotency_key]
+
+
+generation_job_service = Lazy(lambda: GenerationJobService(
+    max_workers=settings.GENERATION_MAX_WORKERS,
+    max_pending=settings.GENERATION_MAX_PENDING,
+    history_size=settings.GENERATION_JOB_HISTORY,
+))
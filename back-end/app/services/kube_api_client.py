@@ -0,0 +1,286 @@
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import base64
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import logging
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+IN_CLUSTER_DIR = Path("/var/run/secrets/kubernetes.io/serviceaccount")
+
+# kind -> (plural, namespaced)
+RESOURCES: Dict[str, Tuple[str, bool]] = {
+    "Namespace": ("namespaces", False),
+    "ConfigMap": ("configmaps", True),
+    "Secret": ("secrets", True),
+    "ServiceAccount": ("serviceaccounts", True),
+    "PersistentVolumeClaim": ("persistentvolumeclaims", True),
+    "Service": ("services", True),
+    "Pod": ("pods", True),
+    "Deployment": ("deployments", True),
+    "ReplicaSet": ("replicasets", True),
+    "StatefulSet": ("statefulsets", True),
+    "DaemonSet": ("daemonsets", True),
+    "Ingress": ("ingresses", True),
+    "HorizontalPodAutoscaler": ("horizontalpodautoscalers", True),
+    "ClusterRole": ("clusterroles", False),
+    "ClusterRoleBinding": ("clusterrolebindings", False),
+    "Role": ("roles", True),
+    "RoleBinding": ("rolebindings", True),
+}
+
+# kubectl resource names -> (apiVersion, kind)
+KUBECTL_ALIASES: Dict[str, Tuple[str, str]] = {
+    "namespace": ("v1", "Namespace"),
+    "configmap": ("v1", "ConfigMap"),
+    "secret": ("v1", "Secret"),
+    "service": ("v1", "Service"),
+    "svc": ("v1", "Service"),
+    "pod": ("v1", "Pod"),
+    "deployment": ("apps/v1", "Deployment"),
+    "deploy": ("apps/v1", "Deployment"),
+    "replicaset": ("apps/v1", "ReplicaSet"),
+    "statefulset": ("apps/v1", "StatefulSet"),
+    "daemonset": ("apps/v1", "DaemonSet"),
+    "ingress": ("networking.k8s.io/v1", "Ingress"),
+    "hpa": ("autoscaling/v2", "HorizontalPodAutoscaler"),
+    "horizontalpodautoscaler": ("autoscaling/v2", "HorizontalPodAutoscaler"),
+}
+
+
+class KubeAPIError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class KubeConfigError(Exception):
+    """Raised when no usable API server configuration can be found"""
+
+
+def resource_path(api_version: str, kind: str, namespace: Optional[str] = None,
+                  name: Optional[str] = None, subresource: Optional[str] = None) -> str:
+    """Build the REST path for a resource, e.g. /apis/apps/v1/namespaces/default/deployments/web"""
+    plural, namespaced = RESOURCES.get(kind, (kind.lower() + "s", True))
+    path = f"/api/{api_version}" if "/" not in api_version else f"/apis/{api_version}"
+    if namespaced and namespace:
+        path += f"/namespaces/{namespace}"
+    path += f"/{plural}"
+    if name:
+        path += f"/{name}"
+    if subresource:
+        path += f"/{subresource}"
+    return path
+
+
+class _ExecCredential:
+    """Token from a kubeconfig exec plugin (e.g. aws eks get-token), refreshed on expiry"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.command = [spec["command"], *spec.get("args", [])]
+        self.env = {**os.environ, **{e["name"]: e["value"] for e in spec.get("env") or []}}
+        self._token: Optional[str] = None
+        self._expires_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def token(self) -> str:
+        with self._lock:
+            # Refresh a little early so a token never expires mid-request
+            soon = datetime.now(timezone.utc) + timedelta(seconds=60)
+            if self._token is None or (self._expires_at and self._expires_at <= soon):
+                result = subprocess.run(self.command, capture_output=True, text=True, env=self.env, check=True)
+                status = json.loads(result.stdout).get("status", {})
+                self._token = status["token"]
+                expiry = status.get("expirationTimestamp")
+                self._expires_at = datetime.fromisoformat(expiry.replace("Z", "+00:00")) if expiry else None
+            return self._token
+
+
+class _BearerAuth(httpx.Auth):
+    def __init__(self, token: Optional[str] = None, exec_credential: Optional[_ExecCredential] = None):
+        self._token = token
+        self._exec = exec_credential
+
+    def auth_flow(self, request):
+        token = self._exec.token() if self._exec else self._token
+        if token:
+            request.headers["Authorization"] = f"Bearer {token}"
+        yield request
+
+
+def _load_cert_chain(context: ssl.SSLContext, cert: bytes, key: bytes):
+    """Load a client certificate held in memory; ssl only reads them from files"""
+    with tempfile.TemporaryDirectory(prefix="paragon-kube-") as tmp:
+        cert_file, key_file = Path(tmp) / "client.crt", Path(tmp) / "client.key"
+        cert_file.write_bytes(cert)
+        key_file.touch(mode=0o600)
+        key_file.write_bytes(key)
+        context.load_cert_chain(str(cert_file), str(key_file))
+
+
+class KubeAPIClient:
+    """Talks to the Kubernetes API server over one pooled, authenticated HTTP client"""
+
+    FIELD_MANAGER = "paragon"
+
+    def __init__(self, server: str, auth: Optional[httpx.Auth] = None, verify: Any = True,
+                 transport: Optional[httpx.BaseTransport] = None):
+        self.server = server.rstrip("/")
+        self._client = httpx.Client(
+            base_url=self.server,
+            auth=auth,
+            verify=verify,
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=settings.KUBERNETES_API_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.KUBERNETES_API_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(settings.KUBERNETES_API_TIMEOUT_SECONDS, connect=5.0),
+        )
+
+    @classmethod
+    def from_settings(cls) -> "KubeAPIClient":
+        """Resolve the API server from settings, the in-cluster service account or a kubeconfig"""
+        if settings.KUBERNETES_API_URL:
+            return cls(
+                settings.KUBERNETES_API_URL,
+                auth=_BearerAuth(settings.KUBERNETES_API_TOKEN),
+                verify=settings.KUBERNETES_API_VERIFY_SSL,
+            )
+
+        host, port = os.environ.get("KUBERNETES_SERVICE_HOST"), os.environ.get("KUBERNETES_SERVICE_PORT")
+        if host and port and (IN_CLUSTER_DIR / "token").exists():
+            return cls(
+                f"https://{host}:{port}",
+                auth=_BearerAuth((IN_CLUSTER_DIR / "token").read_text().strip()),
+                verify=ssl.create_default_context(cafile=str(IN_CLUSTER_DIR / "ca.crt")),
+            )
+
+        return cls._from_kubeconfig(cls._kubeconfig_path())
+
+    @staticmethod
+    def _kubeconfig_path() -> Path:
+        if settings.KUBECONFIG_PATH:
+            return Path(settings.KUBECONFIG_PATH)
+        if os.environ.get("KUBECONFIG"):
+            return Path(os.environ["KUBECONFIG"].split(os.pathsep)[0])
+        return Path.home() / ".kube" / "config"
+
+    @classmethod
+    def _from_kubeconfig(cls, path: Path) -> "KubeAPIClient":
+        if not path.exists():
+            raise KubeConfigError(f"No kubeconfig at {path}")
+        import yaml  # deferred: in-cluster and explicit-server setups never read a kubeconfig
+        config = yaml.safe_load(path.read_text()) or {}
+        base_dir = path.parent
+
+        def named(section: str, name: str) -> Dict[str, Any]:
+            entry = next((e for e in config.get(section) or [] if e.get("name") == name), None)
+            if entry is None:
+                raise KubeConfigError(f"{section[:-1]} {name!r} not found in {path}")
+            return entry
+
+        context = named("contexts", config.get("current-context", ""))["context"]
+        cluster = named("clusters", context["cluster"])["cluster"]
+        user = named("users", context["user"])["user"] if context.get("user") else {}
+
+        def data(source: Dict[str, Any], key: str) -> Optional[bytes]:
+            """Inline (base64 ``<key>-data``) or file-referenced credential contents"""
+            if source.get(f"{key}-data"):
+                return base64.b64decode(source[f"{key}-data"])
+            if source.get(key):
+                return (base_dir / source[key]).read_bytes()
+            return None
+
+        if cluster.get("insecure-skip-tls-verify"):
+            context_ssl = ssl.create_default_context()
+            context_ssl.check_hostname = False
+            context_ssl.verify_mode = ssl.CERT_NONE
+        else:
+            ca = data(cluster, "certificate-authority")
+            context_ssl = ssl.create_default_context(cadata=ca.decode() if ca else None)
+
+        cert, key = data(user, "client-certificate"), data(user, "client-key")
+        if cert and key:
+            _load_cert_chain(context_ssl, cert, key)
+
+        if user.get("exec"):
+            auth = _BearerAuth(exec_credential=_ExecCredential(user["exec"]))
+        elif user.get("token") or user.get("tokenFile"):
+            auth = _BearerAuth(user.get("token") or Path(user["tokenFile"]).read_text().strip())
+        elif user.get("auth-provider"):
+            raise KubeConfigError("auth-provider kubeconfig users are only supported through kubectl")
+        else:
+            auth = None
+
+        return cls(cluster["server"], auth=auth, verify=context_ssl)
+
+    def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = self._client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise KubeAPIError(response.status_code, message)
+        return response
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """GET a resource, returning None when it does not exist"""
+        try:
+            return self.request("GET", path, params=params).json()
+        except KubeAPIError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def create(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request("POST", path, json=body).json()
+
+    def patch(self, path: str, body: Any, content_type: str = "application/merge-patch+json") -> Dict[str, Any]:
+        return self.request("PATCH", path, content=json.dumps(body),
+                            headers={"Content-Type": content_type}).json()
+
+    def delete(self, path: str) -> Dict[str, Any]:
+        return self.request("DELETE", path).json()
+
+    def apply(self, obj: Dict[str, Any], force: bool = True) -> Dict[str, Any]:
+        """Server-side apply a single object"""
+        metadata = obj.get("metadata", {})
+        path = resource_path(obj["apiVersion"], obj["kind"], metadata.get("namespace") or "default",
+                             metadata["name"])
+        return self.request(
+            "PATCH", path,
+            params={"fieldManager": self.FIELD_MANAGER, "force": str(force).lower()},
+            content=json.dumps(obj),
+            headers={"Content-Type": "application/apply-patch+yaml"},
+        ).json()
+
+    def watch(self, path: str, resource_version: Optional[str] = None,
+              timeout_seconds: int = 300) -> Iterator[Dict[str, Any]]:
+        """Stream watch events ({"type": ..., "object": ...}) for a collection path"""
+        params = {"watch": "true", "allowWatchBookmarks": "true", "timeoutSeconds": timeout_seconds}
+        if resource_version:
+            params["resourceVersion"] = resource_version
+        timeout = httpx.Timeout(timeout_seconds + 30, connect=5.0)
+        with self._client.stream("GET", path, params=params, timeout=timeout) as response:
+            if response.status_code >= 400:
+                response.read()
+                raise KubeAPIError(response.status_code, response.text)
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def close(self):
+        self._client.close()
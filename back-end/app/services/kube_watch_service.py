@@ -0,0 +1,177 @@
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import asyncio
+import threading
+import logging
+
+import httpx
+
+from app.config import settings
+from app.services.lazy import Lazy
+from app.services.kube_api_client import KubeAPIClient, KubeAPIError, resource_path
+from app.services.kubernetes_service import kubernetes_service
+
+logger = logging.getLogger(__name__)
+
+# kind -> apiVersion of the resources mirrored into the cache
+WATCHED_KINDS = {
+    "Deployment": "apps/v1",
+    "Service": "v1",
+}
+
+Key = Tuple[str, str, str]  # (kind, namespace, name)
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def rollout_complete(deployment: Dict[str, Any]) -> bool:
+    """Same test as ``kubectl rollout status``: the latest spec is fully rolled out"""
+    spec, status = deployment.get("spec", {}), deployment.get("status", {})
+    replicas = spec.get("replicas", 1)
+    return (
+        status.get("observedGeneration", 0) >= deployment.get("metadata", {}).get("generation", 0)
+        and status.get("updatedReplicas", 0) == replicas
+        and status.get("replicas", 0) == replicas
+        and status.get("availableReplicas", 0) == replicas
+    )
+
+
+def endpoint_assigned(service: Dict[str, Any]) -> bool:
+    return kubernetes_service._service_endpoint(service) is not None
+
+
+class KubeWatchService:
+    """Mirrors Deployments and Services into an in-process cache via API watches.
+
+    One thread per kind lists the collection, then follows a watch from the
+    list's resourceVersion, relisting when the watch expires (410 Gone) or
+    the connection drops. Callers can read the cache or wait for a condition
+    on an object without polling the cluster.
+    """
+
+    def __init__(self):
+        self._objects: Dict[Key, Dict[str, Any]] = {}
+        self._waiters: Dict[Key, List[Tuple[Predicate, Future]]] = {}
+        self._synced: Dict[str, threading.Event] = {kind: threading.Event() for kind in WATCHED_KINDS}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> bool:
+        """Start watching; returns False when no Kubernetes API client is available"""
+        api = kubernetes_service.api
+        if api is None:
+            logger.info("Kubernetes watch disabled: no API client (kubectl backend)")
+            return False
+        if self.running:
+            return True
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._watch_loop, args=(api, kind, api_version),
+                             name=f"kube-watch-{kind.lower()}", daemon=True)
+            for kind, api_version in WATCHED_KINDS.items()
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, kind: str, namespace: str, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._objects.get((kind, namespace, name))
+
+    def is_synced(self, kind: str) -> bool:
+        return self._synced[kind].is_set()
+
+    def wait_for(self, kind: str, namespace: str, name: str, predicate: Predicate) -> Future:
+        """Return a future resolved with the object once ``predicate(object)`` holds"""
+        key = (kind, namespace, name)
+        future: Future = Future()
+        with self._lock:
+            current = self._objects.get(key)
+            if current is not None and predicate(current):
+                future.set_result(current)
+                return future
+            self._waiters.setdefault(key, []).append((predicate, future))
+        future.add_done_callback(lambda f: self._discard_waiter(key, f))
+        return future
+
+    async def wait_until(self, kind: str, namespace: str, name: str, predicate: Predicate,
+                         timeout: float) -> Optional[Dict[str, Any]]:
+        """Await a condition on an object; returns None on timeout"""
+        future = self.wait_for(kind, namespace, name, predicate)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            future.cancel()
+
+    def _discard_waiter(self, key: Key, future: Future):
+        with self._lock:
+            waiters = [w for w in self._waiters.get(key, []) if w[1] is not future]
+            if waiters:
+                self._waiters[key] = waiters
+            else:
+                self._waiters.pop(key, None)
+
+    def _store(self, kind: str, obj: Dict[str, Any]):
+        metadata = obj.get("metadata", {})
+        key = (kind, metadata.get("namespace", ""), metadata.get("name", ""))
+        with self._lock:
+            self._objects[key] = obj
+            ready = [(p, f) for p, f in self._waiters.get(key, []) if not f.done() and p(obj)]
+        for _, future in ready:
+            if not future.done():
+                future.set_result(obj)
+
+    def _delete(self, kind: str, obj: Dict[str, Any]):
+        metadata = obj.get("metadata", {})
+        with self._lock:
+            self._objects.pop((kind, metadata.get("namespace", ""), metadata.get("name", "")), None)
+
+    def _replace_all(self, kind: str, items: List[Dict[str, Any]]):
+        with self._lock:
+            for key in [k for k in self._objects if k[0] == kind]:
+                del self._objects[key]
+        for obj in items:
+            self._store(kind, obj)
+
+    def _watch_loop(self, api: KubeAPIClient, kind: str, api_version: str):
+        path = resource_path(api_version, kind)
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                listing = api.get(path) or {"items": [], "metadata": {}}
+                self._replace_all(kind, listing.get("items", []))
+                self._synced[kind].set()
+                resource_version = listing.get("metadata", {}).get("resourceVersion")
+                backoff = 1.0
+
+                while not self._stop.is_set():
+                    for event in api.watch(path, resource_version, settings.KUBERNETES_WATCH_TIMEOUT_SECONDS):
+                        event_type, obj = event.get("type"), event.get("object", {})
+                        if event_type == "ERROR":
+                            raise KubeAPIError(obj.get("code", 500), obj.get("message", "watch error"))
+                        resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+                        if event_type in ("ADDED", "MODIFIED"):
+                            self._store(kind, obj)
+                        elif event_type == "DELETED":
+                            self._delete(kind, obj)
+                        if self._stop.is_set():
+                            return
+            except (KubeAPIError, httpx.HTTPError, ValueError) as e:
+                # 410 Gone means our resourceVersion expired; anything else backs off first
+                if not (isinstance(e, KubeAPIError) and e.status_code == 410):
+                    self._synced[kind].clear()
+                    logger.warning(f"{kind} watch interrupted, relisting in {backoff:.0f}s: {e}")
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 30.0)
+
+
+kube_watch_service = Lazy(KubeWatchService)
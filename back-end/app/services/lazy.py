@@ -0,0 +1,70 @@
+"""Lazily built service singletons.
+
+Modules expose their service as ``xxx_service = Lazy(XxxService)``. Nothing
+is constructed at import time: the first attribute access builds the
+instance (once, even under concurrent first use) and every later access is
+forwarded to it. Importing the app therefore never opens a client, reads a
+kubeconfig or loads an SDK that a request has not asked for yet.
+"""
+
+from typing import Any, Callable, Generic, Optional, TypeVar
+import threading
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """Stands in for the object ``factory()`` returns, building it on first use"""
+
+    __slots__ = ("_lazy_factory", "_lazy_instance", "_lazy_lock")
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_instance", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _lazy_get(self) -> T:
+        instance = self._lazy_instance
+        if instance is None:
+            with self._lazy_lock:
+                instance = self._lazy_instance
+                if instance is None:
+                    instance = self._lazy_factory()
+                    object.__setattr__(self, "_lazy_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names that are not slots of the proxy itself
+        return getattr(self._lazy_get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._lazy_get(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._lazy_get(), name)
+
+    def __repr__(self) -> str:
+        if self._lazy_instance is None:
+            return f"<Lazy {getattr(self._lazy_factory, '__name__', self._lazy_factory)!s} (not built)>"
+        return repr(self._lazy_instance)
+
+
+def resolve(service: Any) -> Any:
+    """The real object behind ``service``, building it if needed (FastAPI dependencies, isinstance)"""
+    if isinstance(service, Lazy):
+        return service._lazy_get()
+    return service
+
+
+def built(service: Any) -> Optional[Any]:
+    """The object behind ``service`` if it has been built, without building it"""
+    if isinstance(service, Lazy):
+        return service._lazy_instance
+    return service
+
+
+def provider(service: Any) -> Callable[[], Any]:
+    """A FastAPI dependency that yields the service, e.g. ``Depends(provider(mongo_service))``"""
+    def dependency():
+        return resolve(service)
+    return dependency
@@ -0,0 +1,239 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional, falls back to zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "latency", "tokens")
+
+    def __init__(self, value: str, expires_at: float, latency: float, tokens: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = len(value.encode("utf-8"))
+        self.latency = latency
+        self.tokens = tokens
+
+
+class _DiskTier:
+    """SQLite-backed tier whose compressed entries survive restarts"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, codec TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, latency REAL NOT NULL, tokens INTEGER NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        if zstandard is not None:
+            self._codec = "zstd"
+            self._compressor = zstandard.ZstdCompressor(level=3)
+            self._decompressor = zstandard.ZstdDecompressor()
+        else:
+            self._codec = "zlib"
+
+    def _compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) if self._codec == "zstd" else zlib.compress(data)
+
+    def _decompress(self, data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise ValueError("zstandard is required to read this cache entry")
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, codec, expires_at, latency, tokens FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, codec, expires_at, latency, tokens = row
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return _Entry(self._decompress(value, codec).decode("utf-8"), expires_at, latency, tokens)
+
+    def put(self, key: str, entry: _Entry):
+        blob = self._compress(entry.value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, self._codec, entry.expires_at, entry.latency, entry.tokens),
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def prune(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class LLMResponseCache:
+    """Content-addressed cache for chat completions.
+
+    Keys are a SHA-256 of the model, messages (including the system prompt),
+    temperature and max_tokens. The in-memory tier is an LRU bounded by both
+    entry count and total bytes, with a TTL; an optional SQLite tier keeps
+    compressed responses across restarts.
+    """
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._puts = 0
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "saved_seconds": 0.0,
+            "saved_tokens": 0,
+        }
+
+    @property
+    def disk_enabled(self) -> bool:
+        return self._disk is not None
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Hash the parts of a completion request that determine its output"""
+        material = {
+            "model": request.get("model"),
+            "messages": request.get("messages"),
+            "temperature": request.get("temperature"),
+            "max_tokens": request.get("max_tokens"),
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached completion or None, checking memory then disk"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._record_hit("memory_hits", entry)
+                return entry.value
+
+        if self._disk is not None:
+            try:
+                entry = self._disk.get(key)
+            except Exception as e:
+                logger.warning(f"LLM disk cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self._insert(key, entry)
+                    self._record_hit("disk_hits", entry)
+                return entry.value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: str, latency: float = 0.0, tokens: int = 0):
+        """Store a completion along with what it cost to produce"""
+        if not value:
+            return
+        entry = _Entry(value, time.time() + self.ttl_seconds, latency, tokens)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._insert(key, entry)
+            self._puts += 1
+            prune = self._puts % self.PRUNE_EVERY == 0
+
+        if self._disk is not None:
+            try:
+                self._disk.put(key, entry)
+                if prune:
+                    self._disk.prune()
+            except Exception as e:
+                logger.warning(f"LLM disk cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "hits": stats["memory_hits"] + stats["disk_hits"],
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_enabled": self.disk_enabled,
+            })
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _record_hit(self, counter: str, entry: _Entry):
+        self._stats[counter] += 1
+        self._stats["saved_seconds"] += entry.latency
+        self._stats["saved_tokens"] += entry.tokens
+
+    def _insert(self, key: str, entry: _Entry):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+def _build_cache() -> Optional[LLMResponseCache]:
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMResponseCache(
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        disk_path=settings.LLM_CACHE_DISK_PATH,
+    )
+
+
+llm_response_cache = _build_cache()
@@ -21,46 +21,41 @@ class LLMService:
 
 llm_service = LLMService()
 
-from openai import OpenAI
 from app.config import settings
-from typing import Dict, Any
+from app.services.lazy import Lazy
+from app.services.llm_cache import llm_response_cache
+from typing import Dict, Any, Optional, Tuple, Callable
+import importlib.util
+import asyncio
+import httpx
 import json
+import time
+import logging
 
+logger = logging.getLogger(__name__)
 
-class LLMService:
-    def __init__(self):
-        if settings.DEFAULT_LLM_PROVIDER == "groq":
-            self.client = OpenAI(
-                api_key=settings.GROQ_API_KEY,
-                base_url="https://api.groq.com/openai/v1",
-            )
-        elif settings.DEFAULT_LLM_PROVIDER == "openai" and settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        else:
-            raise ValueError("No valid LLM provider configured")
-    
-    def generate_completion(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
-        """Generate a completion using the configured LLM with a custom system prompt"""
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=kwargs.get('model', 'mixtral-8x7b-32768'),
-                messages=messages,
-                temperature=kwargs.get('temperature', 0.7),
-                max_tokens=kwargs.get('max_tokens', 1024)
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            logger.error(f"Error generating completion: {str(e)}")
-            raise
 
-    def parse_deployment_prompt(self, prompt: str, system_prompt: str = None) -> Dict[str, Any]:
-        """Parse user prompt to extract deployment requirements"""
-        default_system_prompt = """You are an expert DevOps assistant. Parse the user's deployment request and extract:
+def _provider_config() -> Tuple[str, Dict[str, Any]]:
+    """Resolve the configured provider and the client arguments it needs"""
+    if settings.DEFAULT_LLM_PROVIDER == "groq":
+        return "groq", {
+            "api_key": settings.GROQ_API_KEY,
+            "base_url": "https://api.groq.com/openai/v1",
+        }
+    elif settings.DEFAULT_LLM_PROVIDER == "openai" and settings.OPENAI_API_KEY:
+        return "openai", {"api_key": settings.OPENAI_API_KEY}
+    raise ValueError("No valid LLM provider configured")
+
+
+def _total_tokens(response) -> int:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
+
+class _LLMRequests:
+    """Request builders shared by the blocking and async services"""
+    
+    PARSE_SYSTEM_PROMPT = """You are an expert DevOps assistant. Parse the user's deployment request and extract:
         - agent_type: customer_support, content_writer, or data_analyst
         - cloud_provider: aws, azure, gcp, or onprem
         - scale_requirements: number of replicas, auto-scaling needs
@@ -68,20 +63,46 @@ class LLMService:
         - security_requirements: any specific security needs
         
         Return ONLY valid JSON with these fields. Infer reasonable defaults if not specified."""
+    
+    AGENT_CODE_SYSTEM_PROMPT = """Generate production-ready Python code for a {agent_type} agent using FastAPI and LangChain.
+        Include:
+        - FastAPI app with /chat and /health endpoints
+        - LangChain agent setup
+        - Error handling and logging
+        - Environment variable configuration
         
-        response = self.client.chat.completions.create(
-            model=settings.DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
+        Return ONLY the Python code, no explanations."""
+    
+    DOCKERFILE_SYSTEM_PROMPT = """Generate an optimized Dockerfile for a Python FastAPI application.
+        Use multi-stage builds, minimal base image, and best practices.
+        Return ONLY the Dockerfile content, no explanations."""
+    
+    def _completion_request(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return {
+            "model": kwargs.get('model', 'mixtral-8x7b-32768'),
+            "messages": messages,
+            "temperature": kwargs.get('temperature', 0.7),
+            "max_tokens": kwargs.get('max_tokens', 1024),
+        }
+    
+    def _parse_prompt_request(self, prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "model": settings.DEFAULT_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt or self.PARSE_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.1,
-        )
-        
+            "temperature": 0.1,
+        }
+    
+    def _parse_prompt_result(self, content: str) -> Dict[str, Any]:
         try:
-            parsed = json.loads(response.choices[0].message.content)
-            return parsed
-        except json.JSONDecodeError:
+            return json.loads(content)
+        except (json.JSONDecodeError, TypeError):
             return {
                 "agent_type": "customer_support",
                 "cloud_provider": "aws",
@@ -90,44 +111,172 @@ class LLMService:
                 "security_requirements": {"enable_scan": True}
             }
     
-    def generate_agent_code(self, agent_type: str, requirements: Dict[str, Any]) -> str:
-        """Generate Python agent code based on type and requirements"""
-        system_prompt = f"""Generate production-ready Python code for a {agent_type} agent using FastAPI and LangChain.
-        Include:
-        - FastAPI app with /chat and /health endpoints
-        - LangChain agent setup
-        - Error handling and logging
-        - Environment variable configuration
-        
-        Return ONLY the Python code, no explanations."""
-        
-        response = self.client.chat.completions.create(
-            model=settings.DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
+    def _agent_code_request(self, agent_type: str, requirements: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "model": settings.DEFAULT_MODEL,
+            "messages": [
+                {"role": "system", "content": self.AGENT_CODE_SYSTEM_PROMPT.format(agent_type=agent_type)},
                 {"role": "user", "content": json.dumps(requirements)}
             ],
-            temperature=0.2,
+            "temperature": 0.2,
+        }
+    
+    def _dockerfile_request(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "model": settings.DEFAULT_MODEL,
+            "messages": [
+                {"role": "system", "content": self.DOCKERFILE_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Requirements: {json.dumps(requirements)}"}
+            ],
+            "temperature": 0.1,
+        }
+
+
+class LLMService(_LLMRequests):
+    def __init__(self):
+        from openai import OpenAI  # deferred: the SDK takes longer to import than the rest of the app
+        self.provider, client_kwargs = _provider_config()
+        self.client = OpenAI(**client_kwargs)
+        self.cache = llm_response_cache
+    
+    def _create(self, request: Dict[str, Any], on_token: Optional[Callable[[str], None]] = None) -> str:
+        key = self.cache.key(request) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if on_token:
+                    on_token(cached)
+                return cached
+        
+        started = time.perf_counter()
+        if on_token:
+            content, tokens = self._stream(request, on_token)
+        else:
+            response = self.client.chat.completions.create(**request)
+            content, tokens = response.choices[0].message.content, _total_tokens(response)
+        if key:
+            self.cache.put(key, content, time.perf_counter() - started, tokens)
+        return content
+    
+    def _stream(self, request: Dict[str, Any], on_token: Callable[[str], None]) -> Tuple[str, int]:
+        """Stream a completion, relaying each content delta as it arrives"""
+        parts = []
+        tokens = 0
+        stream = self.client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
         )
+        for chunk in stream:
+            if chunk.usage:
+                tokens = chunk.usage.total_tokens or 0
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        return "".join(parts), tokens
+    
+    def generate_completion(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
+        """Generate a completion using the configured LLM with a custom system prompt"""
+        try:
+            return self._create(self._completion_request(prompt, system_prompt, **kwargs))
+        except Exception as e:
+            logger.error(f"Error generating completion: {str(e)}")
+            raise
+
+    def parse_deployment_prompt(self, prompt: str, system_prompt: str = None) -> Dict[str, Any]:
+        """Parse user prompt to extract deployment requirements"""
+        content = self._create(self._parse_prompt_request(prompt, system_prompt))
+        return self._parse_prompt_result(content)
+    
+    def generate_agent_code(self, agent_type: str, requirements: Dict[str, Any],
+                            on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate Python agent code based on type and requirements.
         
-        return response.choices[0].message.content
+        When ``on_token`` is given the completion is streamed and each chunk of
+        code is passed to it as soon as it arrives.
+        """
+        return self._create(self._agent_code_request(agent_type, requirements), on_token)
     
     def generate_dockerfile(self, agent_code: str, requirements: Dict[str, Any]) -> str:
         """Generate optimized Dockerfile for the agent"""
-        system_prompt = """Generate an optimized Dockerfile for a Python FastAPI application.
-        Use multi-stage builds, minimal base image, and best practices.
-        Return ONLY the Dockerfile content, no explanations."""
-        
-        response = self.client.chat.completions.create(
-            model=settings.DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Requirements: {json.dumps(requirements)}"}
-            ],
-            temperature=0.1,
+        return self._create(self._dockerfile_request(requirements))
+
+
+class AsyncLLMService(_LLMRequests):
+    """Awaitable LLMService on one pooled AsyncOpenAI client.
+    
+    All calls share a single keep-alive httpx connection pool (HTTP/2 when
+    ``h2`` is installed), and a per-provider semaphore caps the number of
+    in-flight requests so bursts queue instead of opening more sockets.
+    """
+    
+    def __init__(self):
+        from openai import AsyncOpenAI
+        self.provider, client_kwargs = _provider_config()
+        self.http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=10.0),
         )
+        self.client = AsyncOpenAI(http_client=self.http_client, **client_kwargs)
+        limit = settings.LLM_PROVIDER_CONCURRENCY.get(self.provider, settings.LLM_MAX_CONCURRENCY)
+        # Per instance, not per class: a semaphore binds to the event loop that first waits on it
+        self.semaphore = asyncio.Semaphore(limit)
+        self.cache = llm_response_cache
+    
+    async def _create(self, request: Dict[str, Any]) -> str:
+        key = self.cache.key(request) if self.cache else None
+        if key:
+            # The disk tier does blocking SQLite I/O, keep it off the event loop
+            if self.cache.disk_enabled:
+                cached = await asyncio.to_thread(self.cache.get, key)
+            else:
+                cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         
-        return response.choices[0].message.content
+        async with self.semaphore:
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(**request)
+            latency = time.perf_counter() - started
+        content = response.choices[0].message.content
+        if key:
+            if self.cache.disk_enabled:
+                await asyncio.to_thread(self.cache.put, key, content, latency, _total_tokens(response))
+            else:
+                self.cache.put(key, content, latency, _total_tokens(response))
+        return content
+    
+    async def generate_completion(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
+        """Generate a completion using the configured LLM with a custom system prompt"""
+        try:
+            return await self._create(self._completion_request(prompt, system_prompt, **kwargs))
+        except Exception as e:
+            logger.error(f"Error generating completion: {str(e)}")
+            raise
+    
+    async def parse_deployment_prompt(self, prompt: str, system_prompt: str = None) -> Dict[str, Any]:
+        """Parse user prompt to extract deployment requirements"""
+        content = await self._create(self._parse_prompt_request(prompt, system_prompt))
+        return self._parse_prompt_result(content)
+    
+    async def generate_agent_code(self, agent_type: str, requirements: Dict[str, Any]) -> str:
+        """Generate Python agent code based on type and requirements"""
+        return await self._create(self._agent_code_request(agent_type, requirements))
+    
+    async def generate_dockerfile(self, agent_code: str, requirements: Dict[str, Any]) -> str:
+        """Generate optimized Dockerfile for the agent"""
+        return await self._create(self._dockerfile_request(requirements))
+    
+    async def aclose(self):
+        """Close the pooled connections"""
+        await self.client.close()
 
 
-llm_service = LLMService()
\ No newline at end of file
+llm_service = Lazy(LLMService)
+async_llm_service = Lazy(AsyncLLMService)
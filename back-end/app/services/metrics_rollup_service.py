@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import threading
+import logging
+
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.services.lazy import Lazy
+from app.services.mongo_service import mongo_service
+from app.services.request_metrics_service import (
+    RESOLUTIONS, ROLLUP_STATE_COLLECTION, Resolution, bin_start, request_metrics_service, series_key
+)
+
+logger = logging.getLogger(__name__)
+
+# Bins rolled up per aggregation, so catching up on a backlog runs in bounded steps
+BINS_PER_STEP = 1440
+
+# create_index error codes for an existing index with other options
+INDEX_OPTIONS_CONFLICT = (85, 86)
+
+
+class MetricsRollupService:
+    """Keeps the per-minute, per-hour and per-day request_metrics rollups current.
+
+    Each pass rolls complete bins up from the next finer level (raw
+    documents for 1m) with one $group + $merge, then advances that
+    resolution's watermark. Bins are replaced rather than incremented, so a
+    pass interrupted before its watermark moved is safe to repeat. Raw
+    documents and the finer rollups expire through TTL indexes.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._indexed = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="metrics-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.roll_up(mongo_service.db)
+            except PyMongoError as e:
+                logger.warning(f"Metrics rollup failed: {e}")
+            self._stop.wait(settings.METRICS_ROLLUP_INTERVAL_SECONDS)
+
+    def ensure_indexes(self, db: Database):
+        if self._indexed:
+            return
+        request_metrics_service.ensure_indexes(db)
+        raw_retention = timedelta(days=settings.METRICS_RAW_RETENTION_DAYS)
+        self._ensure_ttl(db[request_metrics_service.COLLECTION], "timestamp", raw_retention)
+        for resolution in RESOLUTIONS:
+            collection = db[resolution.collection]
+            # $merge matches on these fields and needs a unique index over them
+            collection.create_index([("bin", ASCENDING), ("endpoint", ASCENDING), ("status", ASCENDING)],
+                                    name="bin_endpoint_status", unique=True)
+            if resolution.retention is not None:
+                self._ensure_ttl(collection, "bin", resolution.retention)
+        self._indexed = True
+
+    @staticmethod
+    def _ensure_ttl(collection: Collection, field: str, retention: timedelta):
+        seconds = int(retention.total_seconds())
+        name = f"{field}_ttl"
+        try:
+            collection.create_index([(field, ASCENDING)], name=name, expireAfterSeconds=seconds)
+        except OperationFailure as e:
+            if e.code not in INDEX_OPTIONS_CONFLICT:
+                raise
+            # The retention setting changed since the index was built
+            collection.database.command("collMod", collection.name,
+                                        index={"name": name, "expireAfterSeconds": seconds})
+
+    def roll_up(self, db: Database, now: Optional[datetime] = None) -> Dict[str, Optional[datetime]]:
+        """Bring every resolution up to date and return the new watermarks"""
+        self.ensure_indexes(db)
+        now = now or datetime.utcnow()
+        state = db[ROLLUP_STATE_COLLECTION]
+        watermarks = {doc["_id"]: doc.get("watermark") for doc in state.find()}
+        by_name = {resolution.name: resolution for resolution in RESOLUTIONS}
+
+        for resolution in RESOLUTIONS:
+            if resolution.source is None:
+                # Leave room for request_metrics writes that arrive late
+                source_end = now - timedelta(seconds=settings.METRICS_ROLLUP_LAG_SECONDS)
+                source, time_field, count = request_metrics_service.COLLECTION, "timestamp", {"$sum": 1}
+            else:
+                source_end = watermarks.get(resolution.source)
+                source, time_field, count = by_name[resolution.source].collection, "bin", {"$sum": "$count"}
+            if source_end is None:
+                continue
+            # Only whole bins: a partial one would be replaced by a smaller count later
+            upper = bin_start(source_end, resolution.width)
+
+            watermark = watermarks.get(resolution.name)
+            if watermark is None:
+                first = db[source].find_one({time_field: {"$type": "date"}}, {time_field: 1},
+                                            sort=[(time_field, ASCENDING)])
+                if first is None:
+                    continue
+                watermark = bin_start(first[time_field], resolution.width)
+
+            while watermark < upper:
+                step_end = min(upper, watermark + resolution.width * BINS_PER_STEP)
+                self._roll_up_range(db, resolution, source, time_field, count, watermark, step_end)
+                # $max keeps a slower concurrent instance from moving the watermark back
+                state.update_one({"_id": resolution.name}, {"$max": {"watermark": step_end}}, upsert=True)
+                watermark = step_end
+            watermarks[resolution.name] = watermark
+
+        return watermarks
+
+    @staticmethod
+    def _roll_up_range(db: Database, resolution: Resolution, source: str, time_field: str,
+                       count: Dict[str, str], start: datetime, end: datetime):
+        db[source].aggregate([
+            {"$match": {time_field: {"$gte": start, "$lt": end}}},
+            {"$group": {"_id": series_key(time_field, resolution.unit, 1), "count": count}},
+            {"$project": {"_id": 0, "bin": "$_id.bin", "endpoint": "$_id.endpoint",
+                          "status": "$_id.status", "count": 1}},
+            {"$merge": {"into": resolution.collection, "on": ["bin", "endpoint", "status"],
+                        "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ])
+        logger.debug(f"Rolled up {source} into {resolution.collection} for [{start}, {end})")
+
+
+metrics_rollup_service = Lazy(MetricsRollupService)
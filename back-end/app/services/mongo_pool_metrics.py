@@ -0,0 +1,105 @@
+"""Prometheus instrumentation of the MongoDB connection pool.
+
+Kept apart from mongo_service so pymongo is only imported once a client is built.
+"""
+
+from typing import Dict, Tuple
+import threading
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo.monitoring import (
+    ConnectionPoolListener, ConnectionCheckedInEvent, ConnectionCheckedOutEvent,
+    ConnectionCheckOutFailedEvent, ConnectionClosedEvent, ConnectionCreatedEvent,
+)
+
+Address = Tuple[str, int]
+
+POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Open connections in the MongoDB connection pool",
+    ["address"],
+)
+POOL_IN_USE = Gauge(
+    "mongodb_pool_connections_in_use",
+    "MongoDB connections currently checked out of the pool",
+    ["address"],
+)
+POOL_MAX_SIZE = Gauge(
+    "mongodb_pool_max_size",
+    "Configured maximum size of each MongoDB connection pool",
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting for a MongoDB connection, including opening one",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "MongoDB connection checkouts that failed",
+    ["reason"],
+)
+
+
+class PoolMetricsListener(ConnectionPoolListener):
+    """Tracks pool occupancy per server so the pool size can be tuned from real load"""
+
+    def __init__(self):
+        self._open: Dict[Address, int] = {}
+        self._in_use: Dict[Address, int] = {}
+        self._peak_in_use: Dict[Address, int] = {}
+        self._lock = threading.Lock()
+
+    def _adjust(self, counts: Dict[Address, int], gauge: Gauge, address: Address, delta: int):
+        with self._lock:
+            counts[address] = max(counts.get(address, 0) + delta, 0)
+            value = counts[address]
+            if counts is self._in_use:
+                self._peak_in_use[address] = max(self._peak_in_use.get(address, 0), value)
+        gauge.labels(address=f"{address[0]}:{address[1]}").set(value)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                f"{host}:{port}": {
+                    "open": self._open.get((host, port), 0),
+                    "in_use": self._in_use.get((host, port), 0),
+                    "peak_in_use": self._peak_in_use.get((host, port), 0),
+                }
+                for host, port in set(self._open) | set(self._in_use)
+            }
+
+    def connection_created(self, event: ConnectionCreatedEvent):
+        self._adjust(self._open, POOL_CONNECTIONS, event.address, 1)
+
+    def connection_closed(self, event: ConnectionClosedEvent):
+        self._adjust(self._open, POOL_CONNECTIONS, event.address, -1)
+
+    def connection_checked_out(self, event: ConnectionCheckedOutEvent):
+        self._adjust(self._in_use, POOL_IN_USE, event.address, 1)
+        if event.duration is not None:
+            POOL_CHECKOUT_WAIT.observe(event.duration)
+
+    def connection_checked_in(self, event: ConnectionCheckedInEvent):
+        self._adjust(self._in_use, POOL_IN_USE, event.address, -1)
+
+    def connection_check_out_failed(self, event: ConnectionCheckOutFailedEvent):
+        POOL_CHECKOUT_FAILURES.labels(reason=event.reason).inc()
+
+    # Remaining pool events carry nothing we report
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
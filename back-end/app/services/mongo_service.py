@@ -0,0 +1,86 @@
+from typing import TYPE_CHECKING, Dict, Any, Optional
+import threading
+import logging
+
+from app.config import settings
+from app.services.lazy import Lazy
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+    from pymongo.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class MongoService:
+    """Owns the single MongoClient whose connection pool every caller shares.
+
+    The client is created on first use (or by connect() at startup) and
+    closed at shutdown. pymongo clients are thread-safe, so routers running
+    in the threadpool and the metrics exporter thread use it concurrently.
+    """
+
+    def __init__(self):
+        from app.services.mongo_pool_metrics import PoolMetricsListener
+        self._client: Optional["MongoClient"] = None
+        self._listener = PoolMetricsListener()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> "MongoClient":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from pymongo import MongoClient
+                    from app.services.mongo_pool_metrics import POOL_MAX_SIZE
+                    self._client = MongoClient(
+                        settings.MONGODB_URL,
+                        appname="paragonai",
+                        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                        maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+                        waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                        connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+                        socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+                        event_listeners=[self._listener],
+                    )
+                    POOL_MAX_SIZE.set(settings.MONGODB_MAX_POOL_SIZE)
+                    logger.info(f"MongoDB client created (max pool size {settings.MONGODB_MAX_POOL_SIZE})")
+        return self._client
+
+    @property
+    def db(self) -> "Database":
+        """The application database"""
+        return self.client[settings.MONGODB_DB]
+
+    @property
+    def metrics_db(self) -> "Database":
+        """The database request metrics are recorded in"""
+        return self.client[f"{settings.MONGODB_DB}_metrics"]
+
+    def connect(self):
+        """Create the client; pymongo connects in the background, so this does not block"""
+        return self.client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+                logger.info("MongoDB client closed")
+
+    def pool_stats(self) -> Dict[str, Any]:
+        servers = self._listener.stats()
+        max_size = settings.MONGODB_MAX_POOL_SIZE
+        for server in servers.values():
+            server["utilisation"] = server["in_use"] / max_size if max_size else 0.0
+        return {"connected": self._client is not None, "max_pool_size": max_size, "servers": servers}
+
+
+mongo_service = Lazy(MongoService)
+
+
+def get_db() -> "Database":
+    """FastAPI dependency for the application database"""
+    return mongo_service.db
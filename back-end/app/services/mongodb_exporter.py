@@ -1,7 +1,6 @@
 class MongoDBExporter:
-    def __init__(self, mongo_uri: str, db_name: str, port: int = 8001):
-        self.mongo_uri = mongo_uri
-        self.db_name = db_name
+    def __init__(self, db, port: int = 8001):
+        self.db = db
         self.port = port
 
     def run(self):
@@ -9,96 +8,195 @@ class MongoDBExporter:
         return
 
 # app/services/mongodb_exporter.py
-from prometheus_client import start_http_server, Gauge, Counter
-import pymongo
+from prometheus_client import start_http_server, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Optional, Tuple
+from app.config import settings
+import threading
 import time
 import logging
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Server error codes meaning change streams are unavailable (standalone server)
+CHANGE_STREAMS_UNSUPPORTED = (40573, 40324)
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Pause before reopening a change stream that failed
+STREAM_RETRY_SECONDS = 5.0
+
 class MongoDBExporter:
-    def __init__(self, mongo_uri, db_name='metrics', port=8001):
-        self.mongo_uri = mongo_uri
-        self.db_name = db_name
+    """Prometheus collector for request_metrics that queries MongoDB on scrape.
+    
+    Nothing runs between scrapes. A scrape that finds the cached values
+    older than METRICS_EXPORTER_CACHE_TTL_SECONDS refreshes them, and
+    scrapes arriving meanwhile wait for that refresh instead of issuing
+    their own queries. A refresh aggregates only the documents whose
+    ``_id`` lies past a high-water mark and adds the per-label deltas to
+    the totals, so it costs the same however large the history grows.
+    ObjectIds embed their creation second; the mark trails the clock by
+    METRICS_EXPORTER_LAG_SECONDS so inserts still in flight are not skipped.
+    
+    In change-stream mode inserts are counted as they happen instead, after
+    one catch-up pass over the existing documents.
+    
+    ``db`` holds request_metrics; deployments are counted in ``app_db``, the
+    application database the deployment records are written to (``db`` when
+    not given).
+    """
+    
+    def __init__(self, db: Database, port=8001, mode: Optional[str] = None, register: bool = True,
+                 app_db: Optional[Database] = None):
+        # Shares the application's pooled client instead of opening its own
+        self.db = db
+        self.app_db = app_db if app_db is not None else db
         self.port = port
+        self.mode = mode or settings.METRICS_EXPORTER_MODE
+        self.cache_ttl = settings.METRICS_EXPORTER_CACHE_TTL_SECONDS
+        # request_metrics _ids below this have been counted
+        self.high_water_mark: Optional[ObjectId] = None
+        self.streaming = False
         
-        # Define Prometheus metrics
-        self.request_count = Counter(
-            'http_requests_total',
-            'Total HTTP requests',
-            ['method', 'endpoint', 'status']
-        )
+        self._requests: Dict[Tuple[str, str, str], float] = {}
+        self._errors: Dict[Tuple[str, str], float] = {}
+        self._active_deployments: Optional[float] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()          # guards the totals
+        self._refresh_lock = threading.Lock()  # one refresh at a time; other scrapes wait on it
         
-        self.response_time = Gauge(
-            'http_response_time_seconds',
-            'HTTP response time in seconds',
-            ['endpoint']
-        )
-        
-        self.error_count = Counter(
-            'http_errors_total',
-            'Total HTTP errors',
-            ['endpoint', 'status_code']
-        )
-        
-        self.active_deployments = Gauge(
-            'active_deployments',
-            'Number of active deployments'
-        )
-        
-        self.client = None
-        self.db = None
+        if register:
+            REGISTRY.register(self)
+    
+    def describe(self):
+        # Lets REGISTRY.register() check names without running a query
+        return [
+            CounterMetricFamily('http_requests', 'Total HTTP requests', labels=['method', 'endpoint', 'status']),
+            CounterMetricFamily('http_errors', 'Total HTTP errors', labels=['endpoint', 'status_code']),
+            GaugeMetricFamily('active_deployments', 'Number of active deployments'),
+        ]
+    
+    def collect(self) -> Iterator:
+        """Called by prometheus_client on every scrape"""
+        self.refresh()
         
-    def connect(self):
-        """Connect to MongoDB"""
+        requests = CounterMetricFamily('http_requests', 'Total HTTP requests',
+                                       labels=['method', 'endpoint', 'status'])
+        errors = CounterMetricFamily('http_errors', 'Total HTTP errors', labels=['endpoint', 'status_code'])
+        with self._lock:
+            for labels, value in self._requests.items():
+                requests.add_metric(labels, value)
+            for labels, value in self._errors.items():
+                errors.add_metric(labels, value)
+            active = self._active_deployments
+        yield requests
+        yield errors
+        if active is not None:
+            yield GaugeMetricFamily('active_deployments', 'Number of active deployments', value=active)
+    
+    def _fresh(self) -> bool:
+        return self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.cache_ttl
+    
+    def refresh(self):
+        """Bring the cached values up to date unless they are within the TTL"""
+        if self._fresh():
+            return
+        with self._refresh_lock:
+            if self._fresh():
+                return  # refreshed by the scrape we waited for
+            if not self.streaming:
+                self.collect_metrics()
+            self._refresh_deployments()
+            self._refreshed_at = time.monotonic()
+    
+    def _count(self, method: Any, endpoint: Any, status: Any, amount: int):
+        method = str(method) if method is not None else 'unknown'
+        endpoint = str(endpoint) if endpoint is not None else 'unknown'
         try:
-            self.client = pymongo.MongoClient(self.mongo_uri)
-            self.db = self.client[self.db_name]
-            logger.info("Connected to MongoDB")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
-            return False
+            is_error = int(status) >= 400
+        except (TypeError, ValueError):
+            is_error = False
+        status = str(status)
+        with self._lock:
+            key = (method, endpoint, status)
+            self._requests[key] = self._requests.get(key, 0) + amount
+            if is_error:
+                self._errors[(endpoint, status)] = self._errors.get((endpoint, status), 0) + amount
     
-    def collect_metrics(self):
-        """Collect metrics from MongoDB and update Prometheus metrics"""
-        if self.db is None:
-            self.connect()
-            if self.db is None:
-                return
-                
+    def collect_metrics(self, upper: Optional[ObjectId] = None):
+        """Count request_metrics documents added since the last pass"""
+        if upper is None:
+            upper = ObjectId.from_datetime(
+                datetime.utcnow() - timedelta(seconds=settings.METRICS_EXPORTER_LAG_SECONDS))
+        id_range = {"$lt": upper}
+        if self.high_water_mark is not None:
+            id_range["$gte"] = self.high_water_mark
+        
         try:
-            # Get request counts by endpoint
+            # Served from the _id index; only the new documents are read
             pipeline = [
+                {"$match": {"_id": id_range}},
                 {"$group": {
-                    "_id": {"endpoint": "$endpoint", "status": "$status"},
+                    "_id": {"method": "$method", "endpoint": "$endpoint", "status": "$status"},
                     "count": {"$sum": 1}
                 }}
             ]
-            
-            results = list(self.db.request_metrics.aggregate(pipeline))
-            for result in results:
-                self.request_count.labels(
-                    method=result['_id'].get('method', 'unknown'),
-                    endpoint=result['_id']['endpoint'],
-                    status=result['_id']['status']
-                ).set(result['count'])
-            
-            # Get active deployments count
-            active_count = self.db.deployments.count_documents({
-                "status": "running"
-            })
-            self.active_deployments.set(active_count)
-            
+            for result in self.db.request_metrics.aggregate(pipeline):
+                key = result['_id']
+                self._count(key.get('method'), key.get('endpoint'), key.get('status'), result['count'])
+            self.high_water_mark = upper
         except Exception as e:
             logger.error(f"Error collecting metrics: {e}")
     
+    def _refresh_deployments(self):
+        try:
+            active = self.app_db.deployments.count_documents({"status": "running"})
+        except PyMongoError as e:
+            logger.error(f"Error counting active deployments: {e}")
+            return
+        with self._lock:
+            self._active_deployments = active
+    
+    def follow_changes(self):
+        """Count inserts from a change stream; returns False if the server has none"""
+        # Everything before the stream opens is counted by the catch-up pass,
+        # everything from then on by the stream, split on the same _id
+        boundary = ObjectId.from_datetime(datetime.utcnow())
+        pipeline = [{"$match": {"operationType": "insert", "fullDocument._id": {"$gte": boundary}}}]
+        resume_token = None
+        
+        while True:
+            try:
+                with self.db.request_metrics.watch(pipeline, resume_after=resume_token) as stream:
+                    if not self.streaming:
+                        with self._refresh_lock:
+                            self.collect_metrics(upper=boundary)
+                            self.streaming = True
+                    logger.info("Following request_metrics through a change stream")
+                    for change in stream:
+                        doc = change["fullDocument"]
+                        self._count(doc.get('method'), doc.get('endpoint'), doc.get('status'), 1)
+                        resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED and not self.streaming:
+                    logger.info(f"Change streams unavailable, counting on scrape instead: {e}")
+                    return False
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    # The oplog no longer reaches back to our token; inserts in the gap go uncounted
+                    resume_token = None
+                logger.error(f"Change stream failed, resuming: {e}")
+                time.sleep(STREAM_RETRY_SECONDS)
+            except PyMongoError as e:
+                logger.error(f"Change stream interrupted, resuming: {e}")
+                time.sleep(STREAM_RETRY_SECONDS)
+    
     def run(self):
-        """Start the metrics server and collection loop"""
+        """Start the metrics server; in change-stream mode, keep following inserts"""
         start_http_server(self.port)
         logger.info(f"Prometheus metrics server started on port {self.port}")
         
-        while True:
-            self.collect_metrics()
-            time.sleep(15)  # Collect metrics every 15 seconds
\ No newline at end of file
+        if self.mode == "change_stream":
+            self.follow_changes()
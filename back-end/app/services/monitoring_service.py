@@ -12,6 +12,7 @@ class MonitoringService:
 monitoring_service = MonitoringService()
 
 from typing import Dict, Any
+from app.services.lazy import Lazy
 import logging
 import json
 
@@ -228,4 +229,4 @@ spec:
         return fluentd_config
 
 
-monitoring_service = MonitoringService()
\ No newline at end of file
+monitoring_service = Lazy(MonitoringService)
\ No newline at end of file
@@ -0,0 +1,245 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Generic, Iterator, List, Optional, Sequence, Set, Tuple, Type, TypeVar
+import threading
+import time
+import logging
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.models import Deployment, Generation, Metrics
+from app.services.lazy import Lazy
+from app.services.mongo_service import mongo_service
+
+if TYPE_CHECKING:
+    from pymongo.collection import Collection
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+# (index name, [(field, 1 ascending | -1 descending), ...])
+IndexSpec = Tuple[str, List[Tuple[str, int]]]
+
+# Listing order; _id breaks ties between records updated in the same millisecond
+KEYSET_SORT = [("updated_at", -1), ("_id", -1)]
+
+
+class RepositoryUnavailableError(Exception):
+    """Raised when MongoDB cannot be reached to serve a repository call"""
+
+
+@contextmanager
+def _unavailable_on_connection_failure() -> Iterator[None]:
+    from pymongo.errors import ConnectionFailure
+    try:
+        yield
+    except ConnectionFailure as e:
+        raise RepositoryUnavailableError(str(e)) from e
+
+
+class _RecordCache:
+    """LRU of recently read documents by _id, each trusted for ``ttl_seconds``.
+
+    Writes made through a repository refresh their entry; writes made by
+    another replica are picked up once the entry expires.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, doc = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return doc
+
+    def put(self, key: str, doc: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, doc)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class MongoRepository(Generic[M]):
+    """Stores one model per document in ``COLLECTION``, keyed by its ``_id``.
+
+    Indexes in ``INDEXES`` are created on first use. ``get`` reads through
+    a small in-process cache; every other query goes to MongoDB and is
+    expected to be served by one of the indexes. Calls block, so async
+    routes run them in the threadpool; RepositoryUnavailableError means
+    MongoDB could not be reached.
+    """
+
+    COLLECTION: str
+    MODEL: Type[M]
+    INDEXES: Sequence[IndexSpec] = ()
+
+    def __init__(self):
+        self._cache = _RecordCache(settings.REPOSITORY_CACHE_MAX_ENTRIES,
+                                   settings.REPOSITORY_CACHE_TTL_SECONDS)
+        self._indexed = False
+        self._index_lock = threading.Lock()
+
+    @property
+    def collection(self) -> "Collection":
+        collection = mongo_service.db[self.COLLECTION]
+        if not self._indexed:
+            self.ensure_indexes(collection)
+        return collection
+
+    def ensure_indexes(self, collection: "Collection"):
+        with self._index_lock:
+            if self._indexed:
+                return
+            for name, keys in self.INDEXES:
+                collection.create_index(keys, name=name)
+            self._indexed = True
+
+    def _to_model(self, doc: Dict[str, Any]) -> M:
+        return self.MODEL.model_validate(doc)
+
+    def get(self, record_id: str) -> Optional[M]:
+        doc = self._cache.get(record_id)
+        if doc is None:
+            with _unavailable_on_connection_failure():
+                doc = self.collection.find_one({"_id": record_id})
+            if doc is None:
+                return None
+            self._cache.put(record_id, doc)
+        return self._to_model(doc)
+
+    def insert(self, record: M) -> M:
+        doc = record.model_dump(by_alias=True)
+        with _unavailable_on_connection_failure():
+            self.collection.insert_one(doc)
+        self._cache.put(doc["_id"], doc)
+        return record
+
+    def update(self, record_id: str, fields: Dict[str, Any], push: Optional[Dict[str, Any]] = None) -> Optional[M]:
+        """Set ``fields`` (and bump updated_at) and return the updated record, or None if it does not exist"""
+        from pymongo import ReturnDocument
+        change: Dict[str, Any] = {"$set": dict(fields)}
+        if "updated_at" in self.MODEL.model_fields:
+            change["$set"].setdefault("updated_at", datetime.utcnow())
+        if push:
+            change["$push"] = push
+        with _unavailable_on_connection_failure():
+            doc = self.collection.find_one_and_update({"_id": record_id}, change,
+                                                      return_document=ReturnDocument.AFTER)
+        if doc is None:
+            self._cache.invalidate(record_id)
+            return None
+        self._cache.put(record_id, doc)
+        return self._to_model(doc)
+
+    def find(self, query: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None,
+             limit: int = 0) -> List[M]:
+        with _unavailable_on_connection_failure():
+            docs = list(self.collection.find(query, sort=sort, limit=limit))
+        return [self._to_model(doc) for doc in docs]
+
+    def page(self, query: Dict[str, Any], after: Optional[Tuple[datetime, str]], limit: int,
+             fields: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Raw documents matching ``query``, newest ``updated_at`` first, read lazily.
+        
+        Pages by keyset rather than offset: ``after`` is the (updated_at, _id)
+        of the last document of the previous page, so every page is one
+        index range scan however deep it is. Only ``fields`` are returned,
+        plus ``_id`` and ``updated_at`` for the next cursor.
+        """
+        if after is not None:
+            updated_at, record_id = after
+            query = {"$and": [query, {"$or": [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$lt": record_id}},
+            ]}]}
+        projection = dict.fromkeys(fields, 1)
+        projection["updated_at"] = 1
+        with _unavailable_on_connection_failure():
+            yield from self.collection.find(query, projection, sort=KEYSET_SORT, limit=limit,
+                                            batch_size=min(limit, 500) if limit else 0)
+
+
+class GenerationRepository(MongoRepository[Generation]):
+    COLLECTION = "generations"
+    MODEL = Generation
+    INDEXES = [
+        ("status_updated_at", [("status", 1), ("updated_at", 1)]),
+        ("cloud_provider_agent_type", [("cloud_provider", 1), ("agent_type", 1)]),
+        ("idempotency_key_status_updated_at", [("idempotency_key", 1), ("status", 1), ("updated_at", -1)]),
+    ]
+
+    def latest_success(self, idempotency_key: str, since: datetime) -> Optional[Generation]:
+        """The newest successful generation submitted with ``idempotency_key`` since ``since``"""
+        records = self.find({"idempotency_key": idempotency_key, "status": "success", "updated_at": {"$gte": since}},
+                            sort=[("updated_at", -1)], limit=1)
+        return records[0] if records else None
+
+    def agent_types(self, generation_ids: Sequence[str]) -> Dict[str, Optional[str]]:
+        """agent_type of each stored generation among ``generation_ids``"""
+        with _unavailable_on_connection_failure():
+            docs = self.collection.find({"_id": {"$in": list(generation_ids)}}, {"agent_type": 1})
+            return {doc["_id"]: doc.get("agent_type") for doc in docs}
+
+
+class DeploymentRepository(MongoRepository[Deployment]):
+    COLLECTION = "deployments"
+    MODEL = Deployment
+    # Filters lead and (updated_at, _id) follows, so filtered listings
+    # are served in KEYSET_SORT order straight from the index
+    INDEXES = [
+        ("updated_at_id", [("updated_at", 1), ("_id", 1)]),
+        ("status_updated_at_id", [("status", 1), ("updated_at", 1), ("_id", 1)]),
+        ("generation_id", [("generation_id", 1)]),
+        ("cloud_provider_agent_type_updated_at_id",
+         [("cloud_provider", 1), ("agent_type", 1), ("updated_at", 1), ("_id", 1)]),
+        ("agent_type_updated_at_id", [("agent_type", 1), ("updated_at", 1), ("_id", 1)]),
+    ]
+
+    def for_generation(self, generation_id: str) -> List[Deployment]:
+        return self.find({"generation_id": generation_id}, sort=[("updated_at", -1)])
+
+    def with_status(self, status: str, limit: int = 100) -> List[Deployment]:
+        return self.find({"status": status}, sort=[("updated_at", -1)], limit=limit)
+
+    def live_generation_ids(self) -> Set[str]:
+        """Generations that a deployment which is neither stopped nor failed was made from"""
+        with _unavailable_on_connection_failure():
+            return set(self.collection.distinct("generation_id", {"status": {"$nin": ["stopped", "failed"]}}))
+
+
+class MetricsRepository(MongoRepository[Metrics]):
+    COLLECTION = "deployment_metrics"
+    MODEL = Metrics
+    INDEXES = [
+        ("deployment_id_timestamp", [("deployment_id", 1), ("timestamp", -1)]),
+    ]
+
+    def latest(self, deployment_id: str) -> Optional[Metrics]:
+        """The most recent metrics snapshot of a deployment"""
+        records = self.find({"deployment_id": deployment_id}, sort=[("timestamp", -1)], limit=1)
+        return records[0] if records else None
+
+
+generation_repository = Lazy(GenerationRepository)
+deployment_repository = Lazy(DeploymentRepository)
+metrics_repository = Lazy(MetricsRepository)
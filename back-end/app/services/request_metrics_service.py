@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+import logging
+
+from app.config import settings
+from app.services.lazy import Lazy
+
+if TYPE_CHECKING:
+    from pymongo.database import Database
+
+logger = logging.getLogger(__name__)
+
+# $dateTrunc aligns bins of binSize > 1 to this instant; labels must use the same origin
+BIN_ORIGIN = datetime(2000, 1, 1)
+
+# Interval suffix -> $dateTrunc unit
+INTERVAL_UNITS = {"m": "minute", "h": "hour", "d": "day"}
+
+# Refuse charts that would need more points than a dashboard can show
+MAX_BUCKETS = 2000
+
+SERIES_COLORS = [
+    "rgb(75, 192, 192)",
+    "rgb(255, 99, 132)",
+    "rgb(54, 162, 235)",
+    "rgb(255, 159, 64)",
+    "rgb(153, 102, 255)",
+    "rgb(255, 205, 86)",
+]
+
+
+class Resolution:
+    """A pre-aggregated copy of request_metrics at one bin width.
+
+    Rollup documents hold ``bin``, ``endpoint``, ``status`` and ``count``
+    and are derived from ``source`` (another resolution, or the raw
+    collection when None).
+    """
+
+    def __init__(self, name: str, unit: str, width: timedelta, source: Optional[str],
+                 retention: Optional[timedelta]):
+        self.name = name
+        self.collection = f"request_metrics_{name}"
+        self.unit = unit
+        self.width = width
+        self.source = source
+        self.retention = retention
+
+    def __repr__(self) -> str:
+        return f"Resolution({self.name!r})"
+
+
+# Finest first; each resolution is rolled up from the one before it
+RESOLUTIONS = [
+    Resolution("1m", "minute", timedelta(minutes=1), None,
+               timedelta(days=settings.METRICS_ROLLUP_1M_RETENTION_DAYS)),
+    Resolution("1h", "hour", timedelta(hours=1), "1m",
+               timedelta(days=settings.METRICS_ROLLUP_1H_RETENTION_DAYS)),
+    Resolution("1d", "day", timedelta(days=1), "1h", None),
+]
+
+# One document per resolution: {_id: name, watermark: end of the rolled-up range}
+ROLLUP_STATE_COLLECTION = "request_metrics_rollup_state"
+
+
+def parse_bin(interval: str) -> Tuple[str, int, timedelta]:
+    """Split an interval such as "15m" into ($dateTrunc unit, binSize, bin width)"""
+    unit = INTERVAL_UNITS.get(interval[-1:])
+    try:
+        size = int(interval[:-1])
+    except ValueError:
+        size = 0
+    if unit is None or size <= 0:
+        raise ValueError(f"Invalid interval {interval!r}")
+    return unit, size, timedelta(**{f"{unit}s": size})
+
+
+def series_key(time_field: str, unit: str, size: int) -> Dict[str, Any]:
+    """$group key for counts per bin, endpoint and status"""
+    return {
+        "bin": {"$dateTrunc": {"date": f"${time_field}", "unit": unit, "binSize": size}},
+        # Rollups are $merged on these fields, which may not be null
+        "endpoint": {"$ifNull": ["$endpoint", "unknown"]},
+        "status": {"$ifNull": ["$status", "unknown"]},
+    }
+
+
+def bin_start(moment: datetime, width: timedelta) -> datetime:
+    """The start of the bin containing ``moment``, exactly as $dateTrunc computes it"""
+    return moment - (moment - BIN_ORIGIN) % width
+
+
+class RequestMetricsService:
+    """Charts of the request_metrics collection, aggregated entirely inside MongoDB.
+
+    Documents are expected to carry ``timestamp``, ``endpoint``, ``method``
+    and ``status``. Counts come back one row per (bin, endpoint, status), so
+    only the chart itself ever reaches Python. Ranges that have been rolled
+    up (see metrics_rollup_service) are read from the rollup collections.
+    """
+
+    COLLECTION = "request_metrics"
+
+    def __init__(self):
+        self._indexed = False
+
+    def ensure_indexes(self, db: "Database"):
+        """Create the index that range queries and bucketing are served from"""
+        from pymongo import ASCENDING
+        if self._indexed:
+            return
+        # Holds every field the count pipeline reads, so the query is covered
+        db[self.COLLECTION].create_index(
+            [("timestamp", ASCENDING), ("endpoint", ASCENDING), ("status", ASCENDING)],
+            name="timestamp_endpoint_status",
+        )
+        self._indexed = True
+
+    def request_counts(self, db: "Database", start: datetime, end: datetime, interval: str) -> Dict[str, Any]:
+        """Requests per bin up to ``end``, as chart labels and one dataset per endpoint and status.
+
+        Raises ValueError for an unusable interval.
+        """
+        unit, size, width = parse_bin(interval)
+        bins = []
+        current = bin_start(start, width)
+        while current < end:
+            bins.append(current)
+            current += width
+            if len(bins) > MAX_BUCKETS:
+                raise ValueError(f"Interval {interval!r} gives more than {MAX_BUCKETS} points")
+
+        self.ensure_indexes(db)
+        series: Dict[Tuple[Any, Any], Dict[datetime, int]] = {}
+        for collection, time_field, count, seg_start, seg_end in self._plan(db, width, bins[0], end):
+            pipeline = [
+                {"$match": {time_field: {"$gte": seg_start, "$lt": seg_end}}},
+                {"$group": {"_id": series_key(time_field, unit, size), "count": count}},
+            ]
+            for row in db[collection].aggregate(pipeline):
+                key = row["_id"]
+                counts = series.setdefault((key.get("endpoint"), key.get("status")), {})
+                # A bin can straddle two segments; its parts add up
+                counts[key["bin"]] = counts.get(key["bin"], 0) + row["count"]
+        
+        return self._chart(bins, series)
+
+    def _plan(self, db: "Database", width: timedelta, start: datetime,
+              end: datetime) -> List[Tuple[str, str, Dict[str, Any], datetime, datetime]]:
+        """Split [start, end) into (collection, time field, count expression, from, to) segments.
+
+        The coarsest rollup whose bins divide ``width`` serves everything up
+        to its watermark, finer rollups the stretch after that, and the raw
+        collection whatever has not been rolled up yet.
+        """
+        watermarks = {doc["_id"]: doc.get("watermark") for doc in db[ROLLUP_STATE_COLLECTION].find()}
+        segments = []
+        cursor = start
+        for resolution in reversed(RESOLUTIONS):
+            if width % resolution.width:
+                continue
+            watermark = watermarks.get(resolution.name)
+            if watermark is not None and watermark > cursor:
+                segment_end = min(watermark, end)
+                segments.append((resolution.collection, "bin", {"$sum": "$count"}, cursor, segment_end))
+                cursor = segment_end
+            if cursor >= end:
+                return segments
+        segments.append((self.COLLECTION, "timestamp", {"$sum": 1}, cursor, end))
+        return segments
+
+    @staticmethod
+    def _chart(bins: List[datetime], series: Dict[Tuple[Any, Any], Dict[datetime, int]]) -> Dict[str, Any]:
+        totals = [sum(counts.get(b, 0) for counts in series.values()) for b in bins]
+        datasets = [{"label": "Total", "data": totals, "borderColor": "rgb(200, 200, 200)", "tension": 0.1}]
+        ordered = sorted(series.items(), key=lambda item: (str(item[0][0]), str(item[0][1])))
+        for i, ((endpoint, status), counts) in enumerate(ordered):
+            datasets.append({
+                "label": f"{endpoint} {status}",
+                # Bins without a row had no requests
+                "data": [counts.get(b, 0) for b in bins],
+                "borderColor": SERIES_COLORS[i % len(SERIES_COLORS)],
+                "tension": 0.1,
+            })
+        return {
+            "labels": [b.strftime("%Y-%m-%dT%H:%M:%SZ") for b in bins],
+            "datasets": datasets,
+        }
+
+
+request_metrics_service = Lazy(RequestMetricsService)
@@ -0,0 +1,188 @@
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+import os
+import shutil
+import threading
+import time
+import logging
+
+from app.config import settings
+from app.services.archive_service import archive_service
+from app.services.artifact_store import artifact_store
+from app.services.deployment_service import deployment_service
+from app.services.generation_job_service import generation_job_service
+from app.services.lazy import Lazy
+from app.services.repositories import (
+    RepositoryUnavailableError, deployment_repository, generation_repository
+)
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationUsage(NamedTuple):
+    generation_id: str
+    mtime: float
+    size: int  # allocated bytes, hardlinked files counting for their share
+    has_dir: bool
+
+
+def directory_usage(path: str) -> int:
+    """Allocated bytes under ``path``, found with scandir alone.
+
+    A file with several hardlinks, such as one shared with the artifact
+    store, counts for its share of the blocks, so the shares of all links
+    add up to what the file really uses.
+    """
+    total = 0
+    pending = [path]
+    while pending:
+        with os.scandir(pending.pop()) as it:
+            for entry in it:
+                stat = entry.stat(follow_symlinks=False)
+                total += stat.st_blocks * 512 // max(stat.st_nlink, 1)
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+    return total
+
+
+class RetentionService:
+    """Keeps the generation output directory bounded.
+
+    A sweep removes unprotected generations older than the maximum age,
+    then the oldest remaining ones until the total is under the byte
+    budget. Protected are generations a live deployment was made from or
+    that are being deployed, jobs still running (and what regenerations
+    copy from), and the newest N of every agent type. Removing a
+    generation deletes its directory, releases its manifest to the
+    artifact store's gc and drops its cached download archives. A sweep is
+    skipped when MongoDB cannot say which generations are deployed.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="generation-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(settings.GENERATION_RETENTION_INTERVAL_SECONDS):
+            try:
+                self.sweep()
+            except RepositoryUnavailableError as e:
+                logger.warning(f"Skipping generation retention sweep, MongoDB unavailable: {e}")
+            except Exception as e:
+                logger.error(f"Generation retention sweep failed: {e}", exc_info=True)
+
+    def scan(self) -> Dict[str, GenerationUsage]:
+        """Every generation on disk, whether as a directory or only as an artifact manifest"""
+        usage: Dict[str, GenerationUsage] = {}
+        with os.scandir(deployment_service.output_base_dir) as it:
+            for entry in it:
+                # Dot entries are directories being materialised
+                if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                usage[entry.name] = GenerationUsage(entry.name, stat.st_mtime,
+                                                    directory_usage(entry.path) + stat.st_blocks * 512, True)
+        # Pruned generations: their files are blobs, which the artifact store's gc accounts for
+        if settings.ARTIFACT_STORE_ENABLED:
+            with os.scandir(artifact_store.manifest_dir) as it:
+                for entry in it:
+                    generation_id = entry.name[:-len(".json")]
+                    if not entry.name.endswith(".json") or generation_id in usage:
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    usage[generation_id] = GenerationUsage(generation_id, stat.st_mtime, stat.st_blocks * 512, False)
+        return usage
+
+    def plan(self, usage: Dict[str, GenerationUsage], protected: Set[str],
+             agent_types: Dict[str, Optional[str]], now: float) -> List[GenerationUsage]:
+        """The generations to remove, oldest first"""
+        newest_first = sorted(usage.values(), key=lambda u: u.mtime, reverse=True)
+        keep = set(protected)
+        per_type: Dict[Optional[str], int] = defaultdict(int)
+        for item in newest_first:
+            agent_type = agent_types.get(item.generation_id)
+            if per_type[agent_type] < settings.GENERATION_RETENTION_KEEP_LAST_PER_AGENT_TYPE:
+                per_type[agent_type] += 1
+                keep.add(item.generation_id)
+
+        max_age = settings.GENERATION_RETENTION_MAX_AGE_HOURS * 3600
+        doomed: List[GenerationUsage] = []
+        remaining: List[GenerationUsage] = []
+        for item in reversed(newest_first):
+            if item.generation_id in keep:
+                continue
+            if max_age > 0 and now - item.mtime > max_age:
+                doomed.append(item)
+            else:
+                remaining.append(item)
+
+        max_bytes = settings.GENERATION_RETENTION_MAX_TOTAL_BYTES
+        if max_bytes > 0:
+            total = sum(u.size for u in usage.values()) - sum(u.size for u in doomed)
+            for item in remaining:
+                if total <= max_bytes:
+                    break
+                doomed.append(item)
+                total -= item.size
+        return doomed
+
+    def sweep(self) -> Dict[str, Any]:
+        """Apply the retention policy once; raises RepositoryUnavailableError without touching anything"""
+        with self._lock:
+            started = time.perf_counter()
+            usage = self.scan()
+            if not usage:
+                return {"generations": 0, "removed": 0, "freed_bytes": 0}
+            # Read before the records: a deploy that finishes in between is recorded by then
+            deploying = deployment_service.deploying_generation_ids()
+            # Both lookups first: without them nothing is known to be safe to delete
+            protected = deployment_repository.live_generation_ids()
+            agent_types = generation_repository.agent_types(list(usage))
+            protected |= deploying | generation_job_service.active_generation_ids()
+
+            freed = 0
+            doomed = self.plan(usage, protected, agent_types, time.time())
+            for item in doomed:
+                freed += item.size + self._remove(item)
+            if doomed and settings.ARTIFACT_STORE_ENABLED:
+                artifact_store.gc()
+
+            result = {
+                "generations": len(usage),
+                "protected": len(protected & usage.keys()),
+                "removed": len(doomed),
+                "freed_bytes": freed,
+                "total_bytes": sum(u.size for u in usage.values()) - sum(u.size for u in doomed),
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            if doomed:
+                logger.info(f"Generation retention removed {len(doomed)} of {len(usage)} generations, "
+                            f"{freed} bytes freed")
+            return result
+
+    @staticmethod
+    def _remove(item: GenerationUsage) -> int:
+        """Delete one generation everywhere; returns the bytes freed beyond its directory"""
+        if item.has_dir:
+            shutil.rmtree(deployment_service.output_base_dir / item.generation_id, ignore_errors=True)
+        if settings.ARTIFACT_STORE_ENABLED:
+            artifact_store.remove(item.generation_id)
+        return archive_service.drop(item.generation_id)
+
+
+retention_service = Lazy(RetentionService)
@@ -0,0 +1,77 @@
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterable, Optional, Sequence
+
+
+class Stage:
+    """A pipeline step that runs once all stages it depends on have finished.
+
+    ``run`` is called with a dict mapping each dependency name to that
+    stage's return value.
+    """
+
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], Any], depends_on: Sequence[str] = ()):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, depends_on={self.depends_on!r})"
+
+
+def run_stage_graph(stages: Iterable[Stage], executor: Executor,
+                    progress: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    """Run stages on ``executor``, starting each one as soon as its dependencies finish.
+
+    Independent stages run concurrently. Returns every stage's result keyed by
+    name. If a stage raises, stages that have not started are cancelled, the
+    in-flight ones are allowed to finish, and the exception is re-raised.
+    Every stage gets a final status either way: those that never ran are
+    reported "skipped".
+    """
+    pending = {stage.name: stage for stage in stages}
+    for stage in pending.values():
+        missing = [dep for dep in stage.depends_on if dep not in pending]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages {missing}")
+
+    results: Dict[str, Any] = {}
+    running: Dict[Future, Stage] = {}
+
+    def report(name: str, status: str):
+        if progress:
+            progress(name, status)
+
+    while pending or running:
+        ready = [stage for stage in pending.values() if all(dep in results for dep in stage.depends_on)]
+        for stage in ready:
+            del pending[stage.name]
+            report(stage.name, "running")
+            deps = {dep: results[dep] for dep in stage.depends_on}
+            running[executor.submit(stage.run, deps)] = stage
+
+        if not running:
+            raise ValueError(f"Dependency cycle between stages {sorted(pending)}")
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage = running.pop(future)
+            try:
+                results[stage.name] = future.result()
+            except Exception:
+                report(stage.name, "failed")
+                for other in running:
+                    other.cancel()
+                wait(running)
+                for other, other_stage in running.items():
+                    if other.cancelled():
+                        report(other_stage.name, "skipped")
+                    elif other.exception() is not None:
+                        report(other_stage.name, "failed")
+                    else:
+                        report(other_stage.name, "completed")
+                for other_stage in pending.values():
+                    report(other_stage.name, "skipped")
+                raise
+            report(stage.name, "completed")
+
+    return results
@@ -73,46 +73,153 @@ class TemplateService:
 
 template_service = TemplateService()
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, Optional, Iterable, Iterator, List, Sequence, Tuple
+from app.config import settings
+from app.services.lazy import Lazy
+import multiprocessing
+import threading
+import math
 import os
 
+if TYPE_CHECKING:
+    from jinja2 import FileSystemBytecodeCache, Template
+
+
+# Bumped when compiled templates change without their source changing
+BYTECODE_VERSION = 2
+
 
 class TemplateService:
+    # Built-in template names, named after the file each one renders
+    K8S_DEPLOYMENT = "kubernetes/deployment.yaml"
+    K8S_SERVICE = "kubernetes/service.yaml"
+    DOCKERFILE = "Dockerfile"
+    GITHUB_ACTIONS = ".github/workflows/deploy.yml"
+    TERRAFORM_EKS = "terraform/main.tf"
+    
     def __init__(self):
+        # Deferred so importing the app does not pay for jinja2 until something renders
+        from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemLoader
         template_dir = Path(__file__).parent.parent / "templates"
         self.env = Environment(
-            loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(),
+            # Files in app/templates override the built-in templates of the same name
+            loader=ChoiceLoader([
+                FileSystemLoader(template_dir),
+                DictLoader(self._builtin_templates()),
+            ]),
+            # YAML, Dockerfiles and HCL are not HTML; escaping would turn the
+            # image placeholder <registry> into &lt;registry&gt; and break the manifests
+            autoescape=False,
             trim_blocks=True,
-            lstrip_blocks=True
+            lstrip_blocks=True,
+            auto_reload=False,
+            bytecode_cache=self._bytecode_cache(),
         )
+        self._templates: Dict[str, "Template"] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _bytecode_cache() -> Optional["FileSystemBytecodeCache"]:
+        """Share compiled templates between worker processes and restarts"""
+        from jinja2 import FileSystemBytecodeCache
+        if not settings.TEMPLATE_BYTECODE_CACHE_DIR:
+            return None
+        try:
+            os.makedirs(settings.TEMPLATE_BYTECODE_CACHE_DIR, exist_ok=True)
+            # Cache keys only cover the template source, so bump the pattern
+            # whenever Environment options that change compiled code do
+            return FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR,
+                                           pattern=f"__paragon_jinja_v{BYTECODE_VERSION}_%s.cache")
+        except OSError:
+            return None
+    
+    def _builtin_templates(self) -> Dict[str, str]:
+        return {
+            self.K8S_DEPLOYMENT: self._get_k8s_deployment_template(),
+            self.K8S_SERVICE: self._get_k8s_service_template(),
+            self.DOCKERFILE: self._get_dockerfile_template(),
+            self.GITHUB_ACTIONS: self._get_github_actions_template(),
+            self.TERRAFORM_EKS: self._get_terraform_eks_template(),
+        }
+    
+    def get_template(self, name: str) -> "Template":
+        """Return a compiled template, compiling it on first use"""
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = self.env.get_template(name)
+                    self._templates[name] = template
+        return template
+    
+    def warm(self):
+        """Compile every known template ahead of the first render"""
+        for name in self.env.list_templates():
+            self.get_template(name)
+    
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        return self.get_template(name).render(**context)
+    
+    def render_bundle(self, contexts: Iterable[Dict[str, Any]], template_names: Sequence[str],
+                      common: Optional[Dict[str, Any]] = None,
+                      processes: Optional[int] = None) -> Iterator[Tuple[str, bytes]]:
+        """Render every template for every context, yielding (path, bytes) pairs.
+        
+        ``common`` holds values shared by the whole fleet; each context only
+        needs what differs per app (at least ``app_name`` and ``namespace``)
+        and may override common values. Output paths are
+        ``<namespace>/<app_name>/<template name>`` unless a context sets
+        ``output_prefix``. Batches of TEMPLATE_BUNDLE_PROCESS_THRESHOLD contexts
+        or more, or any batch when ``processes`` is given, are rendered on a
+        process pool; results are yielded in input order either way.
+        """
+        common = common or {}
+        template_names = list(template_names)
+        contexts = [{**common, **context} for context in contexts]
+        for name in template_names:
+            self.get_template(name)
+        
+        if processes is None and len(contexts) >= settings.TEMPLATE_BUNDLE_PROCESS_THRESHOLD:
+            processes = os.cpu_count() or 1
+        if not processes or processes < 2 or len(contexts) < 2:
+            for context in contexts:
+                yield from self._render_context(context, template_names)
+            return
+        
+        chunk_size = max(1, math.ceil(len(contexts) / (processes * 4)))
+        chunks = [contexts[i:i + chunk_size] for i in range(0, len(contexts), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            for rendered in pool.map(_render_bundle_chunk, chunks, [template_names] * len(chunks)):
+                yield from rendered
+    
+    def _render_context(self, context: Dict[str, Any], template_names: List[str]) -> Iterator[Tuple[str, bytes]]:
+        prefix = context.get("output_prefix") or f"{context['namespace']}/{context['app_name']}"
+        for name in template_names:
+            yield f"{prefix}/{name}", self.get_template(name).render(**context).encode("utf-8")
     
     def render_kubernetes_deployment(self, context: Dict[str, Any]) -> str:
         """Render Kubernetes deployment manifest"""
-        template = self.env.from_string(self._get_k8s_deployment_template())
-        return template.render(**context)
+        return self.render(self.K8S_DEPLOYMENT, context)
     
     def render_kubernetes_service(self, context: Dict[str, Any]) -> str:
         """Render Kubernetes service manifest"""
-        template = self.env.from_string(self._get_k8s_service_template())
-        return template.render(**context)
+        return self.render(self.K8S_SERVICE, context)
     
     def render_dockerfile(self, context: Dict[str, Any]) -> str:
         """Render Dockerfile"""
-        template = self.env.from_string(self._get_dockerfile_template())
-        return template.render(**context)
+        return self.render(self.DOCKERFILE, context)
     
     def render_github_actions(self, context: Dict[str, Any]) -> str:
         """Render GitHub Actions workflow"""
-        template = self.env.from_string(self._get_github_actions_template())
-        return template.render(**context)
+        return self.render(self.GITHUB_ACTIONS, context)
     
     def render_terraform_eks(self, context: Dict[str, Any]) -> str:
         """Render Terraform EKS configuration"""
-        template = self.env.from_string(self._get_terraform_eks_template())
-        return template.render(**context)
+        return self.render(self.TERRAFORM_EKS, context)
     
     def _get_k8s_deployment_template(self) -> str:
         return """apiVersion: apps/v1
@@ -298,4 +405,9 @@ module "vpc" {
 """
 
 
-template_service = TemplateService()
\ No newline at end of file
+def _render_bundle_chunk(contexts: List[Dict[str, Any]], template_names: List[str]) -> List[Tuple[str, bytes]]:
+    """Process pool entry point; renders with the worker's own TemplateService"""
+    return [pair for context in contexts for pair in template_service._render_context(context, template_names)]
+
+
+template_service = Lazy(TemplateService)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, Optional
+from app.services.lazy import Lazy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -130,4 +131,4 @@ class TerraformService:
             return None
 
 
-terraform_service = TerraformService()
\ No newline at end of file
+terraform_service = Lazy(TerraformService)
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Benchmark: disk blocks and inodes used by generation outputs with and without the artifact store.
+
+Writes ``--generations`` output directories the way DeploymentService does
+(rendered Dockerfile, Kubernetes, Terraform, CI/CD and monitoring files for
+a handful of agent types, plus a unique main.py and README), measures them,
+ingests them into an ArtifactStore on the same filesystem and measures
+again, first with the directories kept as links to the blobs, then with
+them pruned as ARTIFACT_PRUNE_GENERATION_DIRS does. Usage counts each
+inode once, as ``du`` does, so hardlinks to a shared blob are not counted
+twice. Nothing touches the configured directories; everything lives in a
+temporary directory.
+
+    cd back-end && python -m benchmarks.bench_artifact_store [--generations 500] [--mode hardlink]
+"""
+from pathlib import Path
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from app.config import settings
+from app.schemas import CloudProvider
+from app.services.lazy import resolve
+
+AGENT_TYPES = ["customer_support", "content_writer", "data_analyst", "custom"]
+
+
+def usage(*roots: Path):
+    """(allocated bytes, inodes) under ``roots``, each inode counted once"""
+    seen = set()
+    allocated = 0
+    for root in roots:
+        for directory, dirnames, filenames in os.walk(root):
+            for name in dirnames + filenames:
+                stat = os.lstat(os.path.join(directory, name))
+                if (stat.st_dev, stat.st_ino) in seen:
+                    continue
+                seen.add((stat.st_dev, stat.st_ino))
+                allocated += stat.st_blocks * 512
+    return allocated, len(seen)
+
+
+def write_generation(service, output_dir: Path, agent_type: str):
+    """The same files a generation writes, without the LLM calls"""
+    app_name = f"{agent_type}-agent"
+    parsed = {"agent_type": agent_type, "scale_requirements": {"replicas": 1}}
+    output_dir.mkdir(parents=True)
+    (output_dir / "main.py").write_text(f"# {uuid.uuid4()}\nfrom fastapi import FastAPI\napp = FastAPI()\n" * 40)
+    service._write_requirements(output_dir, agent_type)
+    service._write_dockerfile(output_dir, app_name)
+    service._write_kubernetes_manifests(output_dir, app_name, parsed)
+    service._write_readme(output_dir, app_name, parsed, CloudProvider.AWS)
+    service._write_terraform(output_dir, app_name)
+    service._write_cicd(output_dir, app_name)
+    service._write_monitoring(output_dir, app_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=500, help="generation directories to write")
+    parser.add_argument("--mode", default="hardlink", choices=["hardlink", "reflink", "copy"])
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+    from app.services.deployment_service import deployment_service
+    service = resolve(deployment_service)
+
+    with tempfile.TemporaryDirectory(prefix="bench_artifacts_") as tmp:
+        generations = Path(tmp) / "generations"
+        settings.ARTIFACT_STORE_DIR = str(Path(tmp) / "store")
+        settings.ARTIFACT_MATERIALIZE_MODE = args.mode
+        from app.services.artifact_store import ArtifactStore
+        store = ArtifactStore()
+
+        ids = [str(uuid.uuid4()) for _ in range(args.generations)]
+        for i, generation_id in enumerate(ids):
+            write_generation(service, generations / generation_id, AGENT_TYPES[i % len(AGENT_TYPES)])
+        before_bytes, before_inodes = usage(generations)
+
+        started = time.perf_counter()
+        for generation_id in ids:
+            store.ingest(generation_id, generations / generation_id)
+        ingest_seconds = time.perf_counter() - started
+        linked = usage(generations, store.root)
+        shutil.rmtree(generations)
+        pruned = usage(store.root)
+
+        started = time.perf_counter()
+        for generation_id in ids[:50]:
+            store.materialize(generation_id, generations / generation_id)
+        materialize_seconds = (time.perf_counter() - started) / min(len(ids), 50)
+
+        for generation_id in ids[: len(ids) // 2]:
+            store.remove(generation_id)
+        started = time.perf_counter()
+        collected = store.gc(grace_seconds=0)
+        gc_seconds = time.perf_counter() - started
+
+        stats = store.stats()
+
+    print(f"{args.generations} generations, mode {args.mode}")
+    print(f"{'':<16}{'before':>10}{'linked':>10}{'ratio':>8}{'pruned':>10}{'ratio':>8}")
+    for label, index, scale in (("allocated KiB", 0, 1024), ("inodes", 1, 1)):
+        before = (before_bytes, before_inodes)[index]
+        print(f"{label:<16}{before / scale:>10.0f}"
+              f"{linked[index] / scale:>10.0f}{before / linked[index]:>8.1f}"
+              f"{pruned[index] / scale:>10.0f}{before / pruned[index]:>8.1f}")
+    print(f"\ningest {ingest_seconds / args.generations * 1000:.2f} ms and materialize "
+          f"{materialize_seconds * 1000:.2f} ms per generation")
+    print(f"gc of half the manifests removed {collected['removed']} blobs in {gc_seconds * 1000:.1f} ms; "
+          f"{stats['blobs']} blobs left for {stats['files']} files, dedup ratio {stats['dedup_ratio']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Micro-benchmark: per-request cost of request logging before/after sampling and the queue sink.
+
+"before" is the former ``log_requests`` middleware: every request logs its
+full header dict, and POST bodies are read and decoded up front, with the
+handler formatting and writing on the event loop. "after" is
+RequestLoggingMiddleware behind the QueueHandler/QueueListener pipeline,
+at the configured sample rate and with every request logged. Both write to
+a sink that discards output, so only the in-process cost is measured. The
+app is driven directly over ASGI, without sockets.
+
+    cd back-end && python -m benchmarks.bench_request_logging [--requests 2000]
+"""
+from logging.handlers import QueueListener
+import argparse
+import asyncio
+import logging
+import queue
+import time
+
+from fastapi import FastAPI, Request
+
+from app.config import settings
+from app.logging_config import JSONFormatter, _DeferredQueueHandler
+from app.middleware import RequestLoggingMiddleware
+
+HEADERS = [
+    (b"host", b"localhost:8000"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) bench"),
+    (b"accept", b"application/json"),
+    (b"accept-encoding", b"gzip, deflate, br"),
+    (b"authorization", b"Bearer " + b"x" * 64),
+    (b"content-type", b"application/json"),
+]
+
+CASES = [("GET", 0), ("POST", 1024), ("POST", 64 * 1024), ("POST", 1024 * 1024)]
+
+
+class _Discard:
+    def write(self, _):
+        pass
+
+    def flush(self):
+        pass
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items")
+    async def list_items():
+        return {"ok": True}
+
+    @app.post("/items")
+    async def create_item(request: Request):
+        # Read the body in chunks, as a streaming upload handler would
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    if variant == "before":
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            logger = logging.getLogger(__name__)
+            logger.info(f"Incoming request: {request.method} {request.url}")
+            logger.info(f"Headers: {dict(request.headers)}")
+            if request.method == "POST":
+                body = await request.body()
+                try:
+                    logger.info(f"Request body: {body.decode()}")
+                except Exception:
+                    logger.info("Could not decode request body")
+            return await call_next(request)
+    elif variant.startswith("after"):
+        app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+def configure(variant: str):
+    """Install the log pipeline the variant ran with; returns a listener to stop, if any"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    sink = logging.StreamHandler(_Discard())
+    if variant == "before":
+        sink.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(sink)
+        return None
+    sink.setFormatter(JSONFormatter())
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    listener = QueueListener(log_queue, sink)
+    listener.start()
+    return listener
+
+
+async def drive(app: FastAPI, method: str, body_size: int, requests: int) -> float:
+    """Mean seconds per request for ``requests`` calls made straight into the ASGI app"""
+    body = b"a" * body_size
+    chunk_size = 64 * 1024
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": "/items", "raw_path": b"/items", "query_string": b"",
+        "root_path": "", "headers": HEADERS + [(b"content-length", str(body_size).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 8000),
+    }
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+
+        async def receive():
+            if chunks:
+                chunk = chunks.pop(0)
+                return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+            return {"type": "http.disconnect"}
+
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per case and variant")
+    args = parser.parse_args()
+
+    variants = ["none", "before", "after", "after (all logged)"]
+    results = {}
+    configured_rate = settings.REQUEST_LOG_SAMPLE_RATE
+    for variant in variants:
+        settings.REQUEST_LOG_SAMPLE_RATE = 1.0 if variant == "after (all logged)" else configured_rate
+        listener = configure(variant)
+        app = build_app(variant)
+        for method, size in CASES:
+            requests = args.requests // 10 if size > 64 * 1024 else args.requests
+            # Best of three damps scheduler and GC noise
+            results[(variant, method, size)] = min(
+                asyncio.run(drive(app, method, size, requests)) for _ in range(3))
+        if listener:
+            listener.stop()
+    settings.REQUEST_LOG_SAMPLE_RATE = configured_rate
+
+    print(f"overhead per request in microseconds over no logging middleware "
+          f"(sample rate {configured_rate})")
+    print(f"{'request':<16}" + "".join(f"{v:>22}" for v in variants[1:]))
+    for method, size in CASES:
+        base = results[("none", method, size)]
+        row = "".join(f"{(results[(v, method, size)] - base) * 1e6:>22.1f}" for v in variants[1:])
+        print(f"{method + ' ' + str(size // 1024) + 'KiB':<16}{row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: how long a fresh process takes to become ready to serve.
+
+Each run is a new interpreter, so nothing is warm but the OS page cache.
+"import" is ``import main`` (routers, middleware, settings), "startup" the
+app's startup handlers, and "ready" the two together; that is the time
+before an autoscaled replica can take traffic. The first-use table shows
+what the lazy services cost when a request finally needs them, work that
+used to happen during import. MongoDB is connected on a background thread
+started by startup, so its cost may already be paid by the time it is
+measured here.
+
+    cd back-end && python -m benchmarks.bench_startup [--runs 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Services built on first use, and the module that provides each
+SERVICES = [
+    ("app.services.template_service", "template_service"),
+    ("app.services.docker_service", "docker_service"),
+    ("app.services.llm_service", "llm_service"),
+    ("app.services.llm_service", "async_llm_service"),
+    ("app.services.kubernetes_service", "kubernetes_service"),
+    ("app.services.mongo_service", "mongo_service"),
+    ("app.services.deployment_service", "deployment_service"),
+]
+
+CHILD = """
+import asyncio, importlib, json, logging, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+ready = time.perf_counter()
+logging.disable(logging.CRITICAL)
+from app.services.lazy import resolve
+first_use = {}
+for module, name in SERVICES:
+    service = getattr(importlib.import_module(module), name)
+    t = time.perf_counter()
+    try:
+        resolve(service)
+    except Exception:
+        pass
+    first_use[name] = time.perf_counter() - t
+print(json.dumps({"import": imported - started, "startup": ready - imported,
+                  "ready": ready - started, "first_use": first_use}))
+"""
+
+
+def run_once(skip_first_use: bool) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    # The exporter and watchers started in the background are not part of readiness
+    env.setdefault("KUBERNETES_WATCH_ENABLED", "false")
+    env.setdefault("METRICS_ROLLUP_ENABLED", "false")
+    services = [] if skip_first_use else SERVICES
+    code = f"SERVICES = {services!r}\n" + CHILD
+    completed = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="fresh processes to time")
+    args = parser.parse_args()
+
+    # The first run also pays for writing .pyc files; discard it
+    run_once(skip_first_use=True)
+    runs = [run_once(skip_first_use=False) for _ in range(args.runs)]
+
+    print(f"median of {args.runs} fresh processes, milliseconds")
+    for phase in ("import", "startup", "ready"):
+        values = [r[phase] * 1000 for r in runs]
+        print(f"{phase:<10}{statistics.median(values):>10.1f}  (min {min(values):.1f}, max {max(values):.1f})")
+    print("\nfirst use of each lazy service, after startup")
+    for _, name in SERVICES:
+        print(f"{name:<22}{statistics.median(r['first_use'][name] * 1000 for r in runs):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark: template renders per second before/after the compiled registry.
+
+"before" re-parses the template source with ``env.from_string`` on every
+render, as TemplateService used to; "after" renders through the registry.
+
+    cd back-end && python -m benchmarks.bench_templates [--seconds 2]
+"""
+import argparse
+import time
+
+from jinja2 import Environment
+
+from app.services.template_service import template_service
+
+CONTEXT = {
+    "app_name": "customer_support-agent",
+    "namespace": "default",
+    "version": "v1",
+    "replicas": 2,
+    "image": "<registry>/customer_support-agent:latest",
+    "port": 8000,
+    "env_vars": {"LOG_LEVEL": "info", "MODEL": "openai/gpt-oss-120b"},
+    "memory_request": "256Mi",
+    "cpu_request": "100m",
+    "memory_limit": "512Mi",
+    "cpu_limit": "500m",
+    "service_type": "LoadBalancer",
+    "cluster_name": "customer_support-agent-cluster",
+    "aws_region": "us-east-1",
+    "min_nodes": 1,
+    "max_nodes": 5,
+    "desired_nodes": 2,
+    "instance_type": "t3.medium",
+    "ecr_repository": "customer_support-agent",
+}
+
+
+def measure(render, seconds: float) -> float:
+    renders = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        render()
+        renders += 1
+    return renders / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent per template and mode")
+    args = parser.parse_args()
+
+    sources = template_service._builtin_templates()
+    uncached_env = Environment(autoescape=False, trim_blocks=True, lstrip_blocks=True)
+
+    print(f"{'template':<32}{'before/s':>12}{'after/s':>12}{'speedup':>10}")
+    for name, source in sources.items():
+        try:
+            expected = uncached_env.from_string(source).render(**CONTEXT)
+        except Exception as e:
+            print(f"{name:<32}skipped: {e}")
+            continue
+        assert expected == template_service.render(name, CONTEXT)
+        before = measure(lambda: uncached_env.from_string(source).render(**CONTEXT), args.seconds)
+        after = measure(lambda: template_service.render(name, CONTEXT), args.seconds)
+        print(f"{name:<32}{before:>12.0f}{after:>12.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
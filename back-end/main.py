@@ -1,10 +1,13 @@
 # main.py
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.routers.generation import router as generation_router
 from app.routers.deployments import router as deployments_router
 from app.routers.agents import router as agents_router
 from app.routers.metrics import router as metrics_router
-from app.services.mongodb_exporter import MongoDBExporter
+from app.middleware import PrometheusMiddleware, RequestLoggingMiddleware
+from app.logging_config import configure_logging, shutdown_logging
+from app.config import settings
 import threading
 import logging
 
@@ -18,23 +21,15 @@ async def root():
 async def test():
     return {"message": "Test endpoint is working!"}
 
-# Middleware for logging requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger = logging.getLogger(__name__)
-    logger.info(f"Incoming request: {request.method} {request.url}")
-    logger.info(f"Headers: {dict(request.headers)}")
-    
-    # Log request body for POST requests
-    if request.method == "POST":
-        body = await request.body()
-        try:
-            logger.info(f"Request body: {body.decode()}")
-        except:
-            logger.info("Could not decode request body")
-    
-    response = await call_next(request)
-    return response
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Sync: collecting the exporter's metrics may query MongoDB
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# Sampled, structured request logs; formatting happens on the log listener thread
+app.add_middleware(RequestLoggingMiddleware)
+if settings.HTTP_METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
 
 # Include routers
 app.include_router(generation_router)
@@ -44,19 +39,91 @@ app.include_router(metrics_router)
 
 # Start Prometheus metrics exporter in a separate thread
 def start_metrics_exporter():
-    from app.config import settings
+    from app.services.mongodb_exporter import MongoDBExporter
+    from app.services.mongo_service import mongo_service
     exporter = MongoDBExporter(
-        mongo_uri=settings.MONGODB_URL,
-        db_name=f"{settings.MONGODB_DB}_metrics",
-        port=8001
+        db=mongo_service.metrics_db,
+        port=8001,
+        app_db=mongo_service.db
     )
     exporter.run()
 
-# Start the exporter in a separate thread
-threading.Thread(target=start_metrics_exporter, daemon=True).start()
+def start_background_services():
+    """Connect clients and start watchers off the startup path, so the app is ready at once.
+    
+    Runs on its own thread; each service is built here on first use, which
+    also imports pymongo, yaml and the Kubernetes client only now.
+    """
+    logger = logging.getLogger(__name__)
+    
+    def start(name: str, action):
+        # One failing service (MongoDB down, no cluster) must not keep the others from starting
+        try:
+            action()
+        except Exception as e:
+            logger.error(f"Failed to start {name}: {e}", exc_info=True)
+    
+    def connect_mongo():
+        from app.services.mongo_service import mongo_service
+        mongo_service.connect()
+    
+    def start_kube_watch():
+        from app.services.kube_watch_service import kube_watch_service
+        kube_watch_service.start()
+    
+    def start_metrics_rollup():
+        from app.services.metrics_rollup_service import metrics_rollup_service
+        metrics_rollup_service.start()
+    
+    def start_artifact_gc():
+        from app.services.artifact_store import artifact_store
+        artifact_store.start()
+    
+    def start_retention():
+        from app.services.retention_service import retention_service
+        retention_service.start()
+    
+    start("MongoDB client", connect_mongo)
+    if settings.KUBERNETES_WATCH_ENABLED:
+        start("Kubernetes watch", start_kube_watch)
+    if settings.METRICS_ROLLUP_ENABLED:
+        start("metrics rollup", start_metrics_rollup)
+    if settings.ARTIFACT_STORE_ENABLED and settings.ARTIFACT_GC_INTERVAL_SECONDS > 0:
+        start("artifact gc", start_artifact_gc)
+    if settings.GENERATION_RETENTION_ENABLED:
+        start("generation retention", start_retention)
+    # Last: in change-stream mode this keeps the thread
+    start("metrics exporter", start_metrics_exporter)
 
 @app.on_event("startup")
 async def startup_event():
-    logging.basicConfig(level=logging.INFO)
+    configure_logging()
     logger = logging.getLogger(__name__)
-    logger.info("Starting ParagonAI Agent Deployment Platform")
\ No newline at end of file
+    logger.info("Starting ParagonAI Agent Deployment Platform")
+    
+    # Started here rather than at import, so importing main has no side effects
+    threading.Thread(target=start_background_services, name="background-services", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Only tear down services that were actually built
+    from app.services.lazy import built
+    from app.services.kube_watch_service import kube_watch_service
+    if built(kube_watch_service):
+        kube_watch_service.stop()
+    from app.services.metrics_rollup_service import metrics_rollup_service
+    if built(metrics_rollup_service):
+        metrics_rollup_service.stop()
+    from app.services.retention_service import retention_service
+    if built(retention_service):
+        retention_service.stop()
+    from app.services.artifact_store import artifact_store
+    if built(artifact_store):
+        artifact_store.stop()
+    from app.services.llm_service import async_llm_service
+    if built(async_llm_service):
+        await async_llm_service.aclose()
+    from app.services.mongo_service import mongo_service
+    if built(mongo_service):
+        mongo_service.close()
+    shutdown_logging()
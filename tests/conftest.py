@@ -0,0 +1,197 @@
+from pathlib import Path
+import json
+import os
+import sys
+import tempfile
+
+BACK_END = Path(__file__).resolve().parent.parent / "back-end"
+sys.path.insert(0, str(BACK_END))
+
+# Settings are read once on import, so they have to be in place before app is imported
+_scratch = tempfile.mkdtemp(prefix="paragon_tests_")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("ARTIFACT_STORE_DIR", os.path.join(_scratch, "artifacts"))
+os.environ.setdefault("GENERATION_ARCHIVE_CACHE_DIR", os.path.join(_scratch, "archives"))
+
+from datetime import datetime
+from typing import Dict, Optional
+import time
+
+import pytest
+
+from app.models import Generation
+from app.services.lazy import resolve
+
+
+class GenerationRecords:
+    """Generation records kept in a dict, standing in for the MongoDB-backed repository"""
+
+    def __init__(self):
+        self.records: Dict[str, Generation] = {}
+
+    def insert(self, record: Generation) -> Generation:
+        self.records[record.id] = record
+        return record
+
+    def update(self, record_id: str, fields, push=None) -> Optional[Generation]:
+        record = self.records.get(record_id)
+        if record is None:
+            return None
+        fields = {"updated_at": datetime.utcnow(), **fields}
+        self.records[record_id] = record.model_copy(update=fields)
+        return self.records[record_id]
+
+    def get(self, record_id: str) -> Optional[Generation]:
+        return self.records.get(record_id)
+
+    def latest_success(self, idempotency_key: str, since: datetime) -> Optional[Generation]:
+        matches = [r for r in self.records.values()
+                   if r.idempotency_key == idempotency_key and r.status == "success" and r.updated_at >= since]
+        return max(matches, key=lambda r: r.updated_at, default=None)
+
+    def agent_types(self, generation_ids):
+        return {gid: self.records[gid].agent_type for gid in generation_ids if gid in self.records}
+
+
+@pytest.fixture
+def generation_records(monkeypatch) -> GenerationRecords:
+    from app.services.repositories import generation_repository
+    records = GenerationRecords()
+    repository = resolve(generation_repository)
+    for name in ("insert", "update", "get", "latest_success", "agent_types"):
+        monkeypatch.setattr(repository, name, getattr(records, name))
+    return records
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """An empty generation output directory for DeploymentService"""
+    from app.services.deployment_service import deployment_service
+    path = tmp_path / "generations"
+    path.mkdir()
+    monkeypatch.setattr(resolve(deployment_service), "output_base_dir", path)
+    return path
+
+
+@pytest.fixture
+def job_service(generation_records, output_dir):
+    """A GenerationJobService of its own, persisting into ``generation_records``"""
+    from app.services.generation_job_service import GenerationJobService
+    service = GenerationJobService(max_workers=2, max_pending=8, history_size=50)
+    yield service
+    service._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def wait_finished(job, records: Optional[GenerationRecords] = None, timeout: float = 5.0):
+    """Block until ``job`` finished and, with ``records``, its final state was persisted"""
+    deadline = time.monotonic() + timeout
+    while not (job.finished and (records is None or records.records[job.generation_id].status == job.status.value)):
+        assert time.monotonic() < deadline, f"generation {job.generation_id} did not finish"
+        time.sleep(0.01)
+
+
+class FakeKubeAPI:
+    """Just enough of a Kubernetes API server, as an httpx.MockTransport handler.
+
+    Objects are kept by their REST path. Server-side apply stores the body
+    as sent, merge and JSON patches are applied to the stored object, and a
+    collection path lists the objects under it.
+    """
+
+    def __init__(self):
+        self.objects: Dict[str, dict] = {}
+        self.requests = []
+        self.unreachable = False
+        self._uids = 0
+
+    def put(self, path: str, obj: dict) -> dict:
+        self._uids += 1
+        obj.setdefault("metadata", {}).setdefault("uid", f"uid-{self._uids}")
+        self.objects[path] = obj
+        return obj
+
+    def handler(self, request):
+        import httpx
+        self.requests.append(request)
+        if self.unreachable:
+            raise httpx.ConnectError("connection refused", request=request)
+        path, method = request.url.path, request.method
+        content_type = request.headers.get("content-type", "")
+        if method == "GET":
+            if path in self.objects:
+                return httpx.Response(200, json=self.objects[path])
+            items = [obj for key, obj in self.objects.items() if key.rsplit("/", 1)[0] == path]
+            if items or path.rsplit("/", 1)[-1].endswith("s"):
+                return httpx.Response(200, json={"items": items})
+        elif method == "DELETE":
+            if path in self.objects:
+                del self.objects[path]
+                return httpx.Response(200, json={"kind": "Status", "status": "Success"})
+        elif method == "POST":
+            body = json.loads(request.content)
+            target = f"{path}/{body['metadata']['name']}"
+            if target in self.objects:
+                return httpx.Response(409, json={"message": "already exists"})
+            return httpx.Response(201, json=self.put(target, body))
+        elif method == "PATCH":
+            body = json.loads(request.content)
+            if content_type == "application/apply-patch+yaml":
+                previous = self.objects.get(path, {}).get("metadata", {})
+                body.setdefault("metadata", {}).setdefault("uid", previous.get("uid"))
+                return httpx.Response(200, json=self.put(path, body))
+            if path.endswith("/scale") and path[: -len("/scale")] in self.objects:
+                self.objects[path[: -len("/scale")]]["spec"]["replicas"] = body["spec"]["replicas"]
+                return httpx.Response(200, json=body)
+            if path in self.objects:
+                if content_type == "application/json-patch+json":
+                    _json_patch(self.objects[path], body)
+                else:
+                    _merge_patch(self.objects[path], body)
+                return httpx.Response(200, json=self.objects[path])
+        return httpx.Response(404, json={"message": f"{path} not found"})
+
+
+def _merge_patch(target: dict, patch: dict):
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_patch(target[key], value)
+        else:
+            target[key] = value
+
+
+def _json_patch(target: dict, operations):
+    for operation in operations:
+        *parents, last = [part.replace("~1", "/").replace("~0", "~") for part in operation["path"][1:].split("/")]
+        node = target
+        for part in parents:
+            node = node[part]
+        if operation["op"] == "remove":
+            del node[last]
+        else:
+            node[last] = operation["value"]
+
+
+@pytest.fixture
+def kube_api():
+    return FakeKubeAPI()
+
+
+@pytest.fixture
+def kube_client(kube_api):
+    import httpx
+    from app.services.kube_api_client import KubeAPIClient
+    client = KubeAPIClient("https://kube.test", transport=httpx.MockTransport(kube_api.handler))
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def kube_service(kube_client):
+    """A KubernetesService talking to ``kube_api``"""
+    from app.services.kubernetes_service import KubernetesService
+    service = KubernetesService()
+    service.backend = "api"
+    service._api, service._api_resolved = kube_client, True
+    return service
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from app.config import settings
+from app.services.artifact_store import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIFACT_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "ARTIFACT_MATERIALIZE_MODE", "hardlink")
+    return ArtifactStore()
+
+
+def write_generation(root, generation_id, files):
+    directory = root / generation_id
+    for relative, content in files.items():
+        (directory / relative).parent.mkdir(parents=True, exist_ok=True)
+        (directory / relative).write_text(content)
+    return directory
+
+
+def test_identical_files_share_one_blob(store, tmp_path):
+    first = write_generation(tmp_path, "g1", {"Dockerfile": "FROM python", "main.py": "one"})
+    second = write_generation(tmp_path, "g2", {"Dockerfile": "FROM python", "main.py": "two"})
+
+    assert store.ingest("g1", first)["new_blobs"] == 2
+    assert store.ingest("g2", second)["new_blobs"] == 1
+    assert os.path.samefile(first / "Dockerfile", second / "Dockerfile")
+    assert store.stats()["blobs"] == 3
+
+
+def test_materialize_rebuilds_a_pruned_generation(store, tmp_path):
+    directory = write_generation(tmp_path, "g1", {"main.py": "code", "k8s/deployment.yaml": "kind: Deployment"})
+    store.ingest("g1", directory)
+    for path in sorted(directory.rglob("*"), reverse=True):
+        path.unlink() if path.is_file() else path.rmdir()
+    directory.rmdir()
+
+    assert store.materialize("g1", directory) == directory
+    assert (directory / "k8s" / "deployment.yaml").read_text() == "kind: Deployment"
+    assert store.materialize("unknown", tmp_path / "unknown") is None
+
+
+def test_gc_keeps_referenced_blobs(store, tmp_path):
+    store.ingest("kept", write_generation(tmp_path, "kept", {"shared": "same", "own": "kept"}))
+    store.ingest("gone", write_generation(tmp_path, "gone", {"shared": "same", "own": "gone"}))
+    assert store.remove("gone")
+
+    collected = store.gc(grace_seconds=0)
+
+    assert collected["removed"] == 1
+    assert collected["kept"] == 2
+    assert sorted(store.manifest("kept")) == ["own", "shared"]
+    for digest, _ in store.manifest("kept").values():
+        assert store.blob_path(digest).exists()
+
+
+def test_gc_keeps_unreferenced_blobs_inside_the_grace_window(store, tmp_path):
+    store.ingest("g1", write_generation(tmp_path, "g1", {"main.py": "code"}))
+    store.remove("g1")
+
+    assert store.gc(grace_seconds=600) == {"removed": 0, "reclaimed_bytes": 0, "kept": 1}
+    assert store.gc(grace_seconds=0)["removed"] == 1
+    assert store.stats()["blobs"] == 0
@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+import main
+from app.services.deployment_service import deployment_service
+from app.services.lazy import resolve
+from app.services.repositories import deployment_repository
+
+REQUEST = {"generation_id": "g1", "cloud_provider": "aws", "namespace": "agents"}
+
+
+@pytest.fixture
+def deployed(monkeypatch):
+    """deploy_to_kubernetes succeeding, with the generation IDs it was called for"""
+    calls = []
+
+    def deploy(generation_id, namespace, replicas):
+        assert generation_id in deployment_service.deploying_generation_ids()
+        calls.append(generation_id)
+        return {"status": "deployed", "app_name": "customer_support-agent", "endpoint": "10.0.0.1"}
+
+    monkeypatch.setattr(resolve(deployment_service), "deploy_to_kubernetes", deploy)
+    return calls
+
+
+@pytest.mark.parametrize("error", [DuplicateKeyError("duplicate _id"), OperationFailure("not authorized", 13)])
+def test_database_error_after_rollout_still_reports_the_deployment(
+        deployed, generation_records, monkeypatch, error):
+    def insert(record):
+        raise error
+
+    monkeypatch.setattr(resolve(deployment_repository), "insert", insert)
+
+    response = TestClient(main.app).post("/deployments/", json=REQUEST)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "running"
+    assert deployed == ["g1"]
+
+
+def test_generation_is_protected_until_its_deployment_is_recorded(deployed, generation_records, monkeypatch):
+    protected_while_recording = []
+
+    def insert(record):
+        protected_while_recording.append(record.generation_id in deployment_service.deploying_generation_ids())
+        return record
+
+    monkeypatch.setattr(resolve(deployment_repository), "insert", insert)
+
+    response = TestClient(main.app).post("/deployments/", json=REQUEST)
+
+    assert response.status_code == 200
+    assert protected_while_recording == [True]
+    assert deployment_service.deploying_generation_ids() == set()
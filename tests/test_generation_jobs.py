@@ -0,0 +1,31 @@
+from app.schemas import GenerateRequest
+from app.services.deployment_service import deployment_service
+from app.services.lazy import resolve
+
+from conftest import wait_finished
+
+
+def fake_generation(output_dir, tokens=()):
+    def generate(generation_id, progress=None, on_token=None, **kwargs):
+        target = output_dir / generation_id
+        target.mkdir()
+        (target / "main.py").write_text("".join(tokens))
+        progress("agent_code", "running")
+        for token in tokens:
+            on_token("agent_code", token)
+        progress("agent_code", "completed")
+        return {"status": "success", "files_generated": ["main.py"], "output_path": str(target), "stages": {}}
+    return generate
+
+
+def test_finished_job_keeps_progress_events_but_not_tokens(job_service, output_dir, monkeypatch):
+    tokens = [f"token {i} " for i in range(200)]
+    monkeypatch.setattr(resolve(deployment_service), "generate_full_deployment", fake_generation(output_dir, tokens))
+
+    job, _ = job_service.submit(GenerateRequest(prompt="A support agent"))
+    wait_finished(job)
+
+    events = [item["event"] for item in job.events]
+    assert "token" not in events
+    assert events == ["status", "stage", "stage", "done"]
+    assert (output_dir / job.generation_id / "main.py").read_text() == "".join(tokens)
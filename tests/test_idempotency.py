@@ -0,0 +1,156 @@
+import importlib
+import shutil
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.config import settings
+from app.services.deployment_service import deployment_service
+from app.services.generation_job_service import GenerationJobService
+from app.services.lazy import resolve
+
+from conftest import wait_finished
+
+# app.routers re-exports the router under the module's name
+generation_router = importlib.import_module("app.routers.generation")
+
+REQUEST = {"prompt": "A customer support agent", "cloud_provider": "aws"}
+
+
+class FakeGeneration:
+    """Stands in for generate_full_deployment, counting runs and holding them until released"""
+
+    def __init__(self, output_dir, status="success"):
+        self.output_dir = output_dir
+        self.status = status
+        self.runs = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, generation_id, **kwargs):
+        self.runs += 1
+        self.release.wait(5)
+        if self.status != "success":
+            return {"status": "failed", "error": "LLM unavailable", "files_generated": []}
+        (self.output_dir / generation_id).mkdir()
+        (self.output_dir / generation_id / "main.py").write_text("app = None\n")
+        return {"status": "success", "files_generated": ["main.py"], "stages": {}}
+
+
+@pytest.fixture
+def generation(output_dir, monkeypatch):
+    fake = FakeGeneration(output_dir)
+    monkeypatch.setattr(resolve(deployment_service), "generate_full_deployment", fake)
+    return fake
+
+
+@pytest.fixture
+def client(job_service, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_IDEMPOTENCY_ENABLED", True)
+    monkeypatch.setattr(generation_router, "generation_job_service", job_service)
+    return TestClient(main.app)
+
+
+def post(client, key=None, **overrides):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post("/generate/", json={**REQUEST, **overrides}, headers=headers)
+
+
+def test_in_flight_duplicate_attaches_to_the_running_job(client, job_service, generation):
+    generation.release.clear()
+    first = post(client)
+    duplicate = post(client, prompt="  A customer   support agent ")
+    generation.release.set()
+
+    assert first.status_code == duplicate.status_code == 202
+    assert duplicate.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert duplicate.json()["generation_id"] == first.json()["generation_id"]
+    wait_finished(job_service.get(first.json()["generation_id"]))
+    assert generation.runs == 1
+
+
+def test_completed_duplicate_is_replayed_with_200(client, job_service, generation, generation_records):
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]), generation_records)
+
+    duplicate = post(client, key="order-42")
+
+    assert duplicate.status_code == 200
+    assert duplicate.headers["Idempotent-Replayed"] == "true"
+    assert duplicate.json()["generation_id"] == first.json()["generation_id"]
+    assert duplicate.json()["files_generated"] == ["main.py"]
+    assert generation.runs == 1
+
+
+def test_completed_generation_is_replayed_from_mongodb_after_a_restart(
+        client, job_service, generation, generation_records, monkeypatch):
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]), generation_records)
+    monkeypatch.setattr(generation_router, "generation_job_service",
+                        GenerationJobService(max_workers=1, max_pending=8, history_size=50))
+
+    duplicate = post(client, key="order-42")
+
+    assert duplicate.status_code == 200
+    assert duplicate.json()["generation_id"] == first.json()["generation_id"]
+    assert generation.runs == 1
+
+
+def test_failed_generation_is_not_replayed(client, job_service, generation, generation_records):
+    generation.status = "failed"
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]), generation_records)
+
+    retry = post(client, key="order-42")
+
+    assert retry.status_code == 202
+    assert "Idempotent-Replayed" not in retry.headers
+    assert retry.json()["generation_id"] != first.json()["generation_id"]
+
+
+def test_expired_generation_is_not_replayed(client, job_service, generation, generation_records, monkeypatch):
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]), generation_records)
+    monkeypatch.setattr(settings, "GENERATION_IDEMPOTENCY_TTL_SECONDS", 0)
+
+    retry = post(client, key="order-42")
+
+    assert retry.status_code == 202
+    assert retry.json()["generation_id"] != first.json()["generation_id"]
+
+
+def test_generation_without_output_is_not_replayed(client, job_service, generation, generation_records, output_dir):
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]), generation_records)
+    shutil.rmtree(output_dir / first.json()["generation_id"])
+
+    retry = post(client, key="order-42")
+
+    assert retry.status_code == 202
+    assert retry.json()["generation_id"] != first.json()["generation_id"]
+    assert generation.runs == 2
+
+
+def test_key_reused_with_another_payload_is_rejected(client, job_service, generation):
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]))
+
+    conflict = post(client, key="order-42", prompt="A content writer")
+
+    assert conflict.status_code == 422
+    assert generation.runs == 1
+
+
+def test_expired_key_can_be_reused_with_another_payload(client, job_service, generation, generation_records,
+                                                        monkeypatch):
+    first = post(client, key="order-42")
+    wait_finished(job_service.get(first.json()["generation_id"]), generation_records)
+    monkeypatch.setattr(settings, "GENERATION_IDEMPOTENCY_TTL_SECONDS", 0)
+
+    reused = post(client, key="order-42", prompt="A content writer")
+
+    assert reused.status_code == 202
+    assert reused.json()["generation_id"] != first.json()["generation_id"]
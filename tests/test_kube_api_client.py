@@ -0,0 +1,79 @@
+import json
+import subprocess
+
+from app.services import kubernetes_service as kubernetes_module
+from app.services.kube_api_client import resource_path
+
+DEPLOYMENT_PATH = "/apis/apps/v1/namespaces/default/deployments/web"
+
+
+def deployment(image: str = "web:1"):
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": "web", "namespace": "default"},
+        "spec": {
+            "selector": {"matchLabels": {"app": "web"}},
+            "template": {"metadata": {"labels": {"app": "web"}},
+                         "spec": {"containers": [{"name": "web", "image": image}]}},
+        },
+    }
+
+
+def test_apply_is_a_server_side_apply_patch(kube_api, kube_client):
+    kube_client.apply(deployment())
+
+    request = kube_api.requests[-1]
+    assert request.method == "PATCH"
+    assert request.url.path == DEPLOYMENT_PATH
+    assert request.headers["content-type"] == "application/apply-patch+yaml"
+    assert dict(request.url.params) == {"fieldManager": "paragon", "force": "true"}
+    assert json.loads(request.content)["spec"]["template"]["spec"]["containers"][0]["image"] == "web:1"
+    assert kube_client.get(DEPLOYMENT_PATH)["metadata"]["name"] == "web"
+
+
+def test_delete_removes_the_object(kube_api, kube_client, kube_service):
+    kube_client.apply(deployment())
+
+    assert kube_service.delete_resource("deployment", "web", "default")
+    assert kube_api.requests[-1].method == "DELETE"
+    assert kube_client.get(DEPLOYMENT_PATH) is None
+    assert not kube_service.delete_resource("deployment", "web", "default")
+
+
+def test_rollback_restores_the_previous_replica_set_template(kube_api, kube_client, kube_service):
+    kube_client.apply(deployment("web:2"))
+    live = kube_api.objects[DEPLOYMENT_PATH]
+    live["metadata"]["annotations"] = {"deployment.kubernetes.io/revision": "2"}
+    for revision, image in ((1, "web:1"), (2, "web:2")):
+        template = deployment(image)["spec"]["template"]
+        template["metadata"]["labels"]["pod-template-hash"] = f"hash{revision}"
+        kube_api.put(resource_path("apps/v1", "ReplicaSet", "default", f"web-{revision}"), {
+            "metadata": {"name": f"web-{revision}", "labels": {"app": "web"},
+                         "annotations": {"deployment.kubernetes.io/revision": str(revision)},
+                         "ownerReferences": [{"uid": live["metadata"]["uid"]}]},
+            "spec": {"template": template},
+        })
+
+    assert kube_service.rollback_deployment("web", "default")
+
+    patch = kube_api.requests[-1]
+    assert patch.headers["content-type"] == "application/json-patch+json"
+    template = kube_client.get(DEPLOYMENT_PATH)["spec"]["template"]
+    assert template["spec"]["containers"][0]["image"] == "web:1"
+    assert "pod-template-hash" not in template["metadata"]["labels"]
+
+
+def test_unreachable_api_falls_back_to_kubectl(kube_api, kube_service, monkeypatch):
+    commands = []
+
+    def run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    monkeypatch.setattr(kubernetes_module.subprocess, "run", run)
+    kube_api.unreachable = True
+
+    assert kube_service.delete_resource("deployment", "web", "default")
+    assert kube_api.requests, "the API should have been tried first"
+    assert commands == [["kubectl", "delete", "deployment", "web", "-n", "default"]]
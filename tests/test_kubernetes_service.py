@@ -0,0 +1,103 @@
+import subprocess
+
+import yaml
+
+from app.services import kubernetes_service as kubernetes_module
+from app.services.kube_api_client import resource_path
+from app.services.kubernetes_service import APPLIED_HASH_ANNOTATION
+
+DEPLOYMENT_PATH = resource_path("apps/v1", "Deployment", "agents", "web")
+NAMESPACE_PATH = resource_path("v1", "Namespace", None, "agents")
+
+
+def write_manifest(tmp_path, image="web:1"):
+    path = tmp_path / "deployment.yaml"
+    path.write_text(yaml.safe_dump({
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": "web"},
+        "spec": {
+            "selector": {"matchLabels": {"app": "web"}},
+            "template": {"metadata": {"labels": {"app": "web"}},
+                         "spec": {"containers": [{"name": "web", "image": image}]}},
+        },
+    }))
+    return [str(path)]
+
+
+def test_unchanged_objects_are_skipped(kube_service, tmp_path):
+    manifests = write_manifest(tmp_path)
+    assert kube_service.apply_manifests(manifests, namespace="agents")["applied"] == [
+        "Namespace/agents", "Deployment/agents/web"]
+
+    result = kube_service.apply_manifests(manifests, namespace="agents")
+    assert result["applied"] == []
+    assert result["unchanged"] == ["Namespace/agents", "Deployment/agents/web"]
+
+
+def test_objects_deleted_elsewhere_are_recreated(kube_api, kube_service, tmp_path):
+    manifests = write_manifest(tmp_path)
+    kube_service.apply_manifests(manifests, namespace="agents")
+    del kube_api.objects[NAMESPACE_PATH]
+    del kube_api.objects[DEPLOYMENT_PATH]
+
+    result = kube_service.apply_manifests(manifests, namespace="agents")
+    assert result["applied"] == ["Namespace/agents", "Deployment/agents/web"]
+    assert NAMESPACE_PATH in kube_api.objects and DEPLOYMENT_PATH in kube_api.objects
+
+
+def test_delete_then_redeploy_applies_again_with_kubectl(kube_service, tmp_path, monkeypatch):
+    commands = []
+
+    def run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+
+    monkeypatch.setattr(kubernetes_module.subprocess, "run", run)
+    kube_service.backend = "kubectl"
+    manifests = write_manifest(tmp_path)
+    kube_service.apply_manifests(manifests, namespace="agents")
+    assert kube_service.apply_manifests(manifests, namespace="agents")["applied"] == []
+
+    assert kube_service.delete_resource("deployment", "web", "agents")
+    result = kube_service.apply_manifests(manifests, namespace="agents")
+    assert result["applied"] == ["Deployment/agents/web"]
+    assert result["unchanged"] == ["Namespace/agents"]
+
+    assert kube_service.delete_resource("namespace", "agents")
+    assert kube_service.apply_manifests(manifests, namespace="agents")["applied"] == [
+        "Namespace/agents", "Deployment/agents/web"]
+
+
+def test_rollback_then_redeploy_applies_again(kube_api, kube_service, tmp_path):
+    kube_service.apply_manifests(write_manifest(tmp_path, "web:1"), namespace="agents")
+    manifests = write_manifest(tmp_path, "web:2")
+    kube_service.apply_manifests(manifests, namespace="agents")
+    live = kube_api.objects[DEPLOYMENT_PATH]
+    live["metadata"]["annotations"]["deployment.kubernetes.io/revision"] = "2"
+    for revision, image in ((1, "web:1"), (2, "web:2")):
+        kube_api.put(resource_path("apps/v1", "ReplicaSet", "agents", f"web-{revision}"), {
+            "metadata": {"name": f"web-{revision}", "labels": {"app": "web"},
+                         "annotations": {"deployment.kubernetes.io/revision": str(revision)},
+                         "ownerReferences": [{"uid": live["metadata"]["uid"]}]},
+            "spec": {"template": {"metadata": {"labels": {"app": "web"}},
+                                  "spec": {"containers": [{"name": "web", "image": image}]}}},
+        })
+
+    assert kube_service.rollback_deployment("web", "agents")
+    rolled_back = kube_api.objects[DEPLOYMENT_PATH]
+    assert rolled_back["spec"]["template"]["spec"]["containers"][0]["image"] == "web:1"
+    assert APPLIED_HASH_ANNOTATION not in rolled_back["metadata"]["annotations"]
+
+    result = kube_service.apply_manifests(manifests, namespace="agents")
+    assert result["applied"] == ["Deployment/agents/web"]
+    assert kube_api.objects[DEPLOYMENT_PATH]["spec"]["template"]["spec"]["containers"][0]["image"] == "web:2"
+
+
+def test_scale_then_redeploy_applies_again(kube_api, kube_service, tmp_path):
+    manifests = write_manifest(tmp_path)
+    kube_service.apply_manifests(manifests, namespace="agents")
+
+    assert kube_service.scale_deployment("web", 5, "agents")
+    assert APPLIED_HASH_ANNOTATION not in kube_api.objects[DEPLOYMENT_PATH]["metadata"]["annotations"]
+    assert kube_service.apply_manifests(manifests, namespace="agents")["applied"] == ["Deployment/agents/web"]
@@ -0,0 +1,19 @@
+import asyncio
+
+from app.services.llm_service import AsyncLLMService
+
+
+def test_each_instance_limits_concurrency_on_its_own_event_loop():
+    async def contend(service):
+        # Waiting on a full semaphore binds it to the running loop
+        async with service.semaphore:
+            async def hold():
+                async with service.semaphore:
+                    await asyncio.sleep(0)
+            await asyncio.gather(*(hold() for _ in range(service.semaphore._value + 1)))
+        await service.http_client.aclose()
+
+    first, second = AsyncLLMService(), AsyncLLMService()
+    assert first.semaphore is not second.semaphore
+    asyncio.run(contend(first))
+    asyncio.run(contend(second))
@@ -0,0 +1,25 @@
+from types import SimpleNamespace
+
+from app.services.mongodb_exporter import MongoDBExporter
+
+
+class Collection:
+    def __init__(self, running=0):
+        self.running = running
+
+    def count_documents(self, query):
+        assert query == {"status": "running"}
+        return self.running
+
+    def aggregate(self, pipeline):
+        return []
+
+
+def test_active_deployments_are_counted_in_the_application_database():
+    metrics_db = SimpleNamespace(request_metrics=Collection(), deployments=Collection(running=0))
+    app_db = SimpleNamespace(deployments=Collection(running=3))
+    exporter = MongoDBExporter(metrics_db, mode="poll", register=False, app_db=app_db)
+
+    gauges = {family.name: family for family in exporter.collect()}
+
+    assert gauges["active_deployments"].samples[0].value == 3
@@ -0,0 +1,136 @@
+import importlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+from app.config import settings
+from app.schemas import GenerateRequest
+from app.services import deployment_service as deployment_module
+from app.services.artifact_store import ArtifactStore
+
+from conftest import wait_finished
+
+
+class StubLLM:
+    """Answers like the LLM service, counting the calls made"""
+
+    def __init__(self):
+        self.calls = []
+
+    def parse_deployment_prompt(self, prompt):
+        self.calls.append("parse_prompt")
+        return {"agent_type": "customer_support", "scale_requirements": {"replicas": 2}}
+
+    def generate_agent_code(self, agent_type, requirements, on_token=None):
+        self.calls.append("agent_code")
+        code = f"# {agent_type} agent\nfrom fastapi import FastAPI\napp = FastAPI()\n"
+        if on_token:
+            on_token(code)
+        return code
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    stub = StubLLM()
+    monkeypatch.setattr(deployment_module, "llm_service", stub)
+    return stub
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIFACT_STORE_ENABLED", True)
+    monkeypatch.setattr(settings, "ARTIFACT_STORE_DIR", str(tmp_path / "store"))
+    store = ArtifactStore()
+    monkeypatch.setattr(deployment_module, "artifact_store", store)
+    return store
+
+
+def generate(job_service, generation_records, **fields):
+    job, _ = job_service.submit(GenerateRequest(prompt="A customer support agent", **fields))
+    wait_finished(job, generation_records)
+    assert job.status.value == "success", job.error
+    return job
+
+
+def regenerate(job_service, generation_records, generation_id, changes):
+    job, replayed = job_service.regenerate(generation_id, changes)
+    assert not replayed
+    wait_finished(job, generation_records)
+    assert job.status.value == "success", job.error
+    return job
+
+
+def statuses(job):
+    return {stage["name"]: stage["status"] for stage in job.stages}
+
+
+def test_toggling_monitoring_reuses_everything_else(job_service, generation_records, output_dir, llm, store):
+    first = generate(job_service, generation_records, enable_monitoring=False)
+    assert llm.calls == ["parse_prompt", "agent_code"]
+
+    second = regenerate(job_service, generation_records, first.generation_id, {"enable_monitoring": True})
+
+    assert llm.calls == ["parse_prompt", "agent_code"]
+    stages = statuses(second)
+    assert stages.pop("monitoring") == "completed"
+    assert set(stages.values()) == {"reused"}
+    added = set(second.files_generated) - set(first.files_generated)
+    assert added and all(relative.startswith("monitoring/") for relative in added)
+    # Reused files are links to the earlier generation's, not copies
+    for relative in first.files_generated:
+        assert os.path.samefile(output_dir / first.generation_id / relative, output_dir / second.generation_id / relative)
+    assert generation_records.get(second.generation_id).base_generation_id == first.generation_id
+
+
+def test_changing_the_cloud_provider_reruns_only_what_depends_on_it(job_service, generation_records, llm, store):
+    first = generate(job_service, generation_records, cloud_provider="aws")
+
+    second = regenerate(job_service, generation_records, first.generation_id, {"cloud_provider": "gcp"})
+
+    assert llm.calls == ["parse_prompt", "agent_code", "agent_code"]
+    stages = statuses(second)
+    assert stages["parse_prompt"] == "reused"
+    assert stages["agent_code"] == stages["readme"] == "completed"
+    assert "terraform" not in stages
+
+
+def test_regenerating_a_pruned_generation_rebuilds_its_files_first(
+        job_service, generation_records, output_dir, llm, store, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIFACT_PRUNE_GENERATION_DIRS", True)
+    first = generate(job_service, generation_records, enable_monitoring=False)
+    assert not (output_dir / first.generation_id).exists()
+    assert store.manifest(first.generation_id) is not None
+
+    second = regenerate(job_service, generation_records, first.generation_id, {"enable_monitoring": True})
+
+    assert llm.calls == ["parse_prompt", "agent_code"]
+    assert statuses(second)["agent_code"] == "reused"
+    manifest = store.manifest(second.generation_id)
+    assert manifest["main.py"] == store.manifest(first.generation_id)["main.py"]
+    assert "monitoring" in {relative.split("/")[0] for relative in manifest}
+
+
+@pytest.fixture
+def client(job_service, monkeypatch):
+    monkeypatch.setattr(importlib.import_module("app.routers.generation"), "generation_job_service", job_service)
+    return TestClient(main.app, raise_server_exceptions=False)
+
+
+def test_unknown_generation_is_404(client, generation_records):
+    response = client.post("/generate/unknown/regenerate", json={"enable_monitoring": True})
+
+    assert response.status_code == 404
+
+
+def test_unexpected_key_error_is_not_reported_as_a_missing_generation(client, job_service, monkeypatch):
+    def regenerate(generation_id, changes, key_header=None):
+        return {}["stage_outputs"]
+
+    monkeypatch.setattr(job_service, "regenerate", regenerate)
+
+    response = client.post("/generate/g1/regenerate", json={"enable_monitoring": True})
+
+    assert response.status_code == 500
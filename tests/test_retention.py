@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from app.config import settings
+from app.models import Generation
+from app.services.deployment_service import deployment_service
+from app.services.generation_job_service import generation_job_service
+from app.services.lazy import resolve
+from app.services.repositories import RepositoryUnavailableError, deployment_repository
+from app.services.retention_service import GenerationUsage, RetentionService
+
+HOUR = 3600
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_RETENTION_MAX_AGE_HOURS", 24)
+    monkeypatch.setattr(settings, "GENERATION_RETENTION_MAX_TOTAL_BYTES", 0)
+    monkeypatch.setattr(settings, "GENERATION_RETENTION_KEEP_LAST_PER_AGENT_TYPE", 1)
+
+
+def usage(*items):
+    return {item.generation_id: item for item in items}
+
+
+def removed(doomed):
+    return [item.generation_id for item in doomed]
+
+
+def test_old_generations_go_but_the_newest_of_each_agent_type_stays(policy):
+    generations = usage(
+        GenerationUsage("old-support", NOW - 50 * HOUR, 100, True),
+        GenerationUsage("older-support", NOW - 60 * HOUR, 100, True),
+        GenerationUsage("old-writer", NOW - 70 * HOUR, 100, True),
+        GenerationUsage("new-support", NOW - HOUR, 100, True),
+    )
+    agent_types = {"old-support": "support", "older-support": "support", "new-support": "support",
+                   "old-writer": "writer"}
+
+    doomed = RetentionService().plan(generations, set(), agent_types, NOW)
+
+    assert removed(doomed) == ["older-support", "old-support"]
+
+
+def test_protected_generations_are_never_removed(policy):
+    generations = usage(
+        GenerationUsage("deployed", NOW - 90 * HOUR, 100, True),
+        GenerationUsage("running", NOW - 80 * HOUR, 100, True),
+        GenerationUsage("stale", NOW - 70 * HOUR, 100, True),
+        GenerationUsage("newest", NOW - HOUR, 100, True),
+    )
+    agent_types = dict.fromkeys(generations, "support")
+
+    doomed = RetentionService().plan(generations, {"deployed", "running"}, agent_types, NOW)
+
+    assert removed(doomed) == ["stale"]
+
+
+def test_byte_budget_removes_the_oldest_first(policy, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_RETENTION_MAX_AGE_HOURS", 0)
+    monkeypatch.setattr(settings, "GENERATION_RETENTION_MAX_TOTAL_BYTES", 250)
+    generations = usage(*(GenerationUsage(f"g{age}", NOW - age * HOUR, 100, True) for age in (1, 2, 3, 4, 5)))
+
+    doomed = RetentionService().plan(generations, {"g5"}, {}, NOW)
+
+    # g1 is the newest of its (unknown) agent type; g5 is protected and still counts towards the total
+    assert removed(doomed) == ["g4", "g3", "g2"]
+
+
+@pytest.fixture
+def on_disk(output_dir, generation_records, policy, monkeypatch):
+    """Four generations of one agent type in the output directory, all but the newest past the maximum age"""
+    monkeypatch.setattr(settings, "ARTIFACT_STORE_ENABLED", False)
+    now = time.time()
+    for i, generation_id in enumerate(["deployed", "running", "stale", "newest"]):
+        directory = output_dir / generation_id
+        directory.mkdir()
+        (directory / "main.py").write_text("print('hello')\n" * 100)
+        age = (90 - 30 * i) * HOUR if generation_id != "newest" else 0
+        os.utime(directory, (now - age, now - age))
+        generation_records.insert(Generation(_id=generation_id, prompt="A support agent", agent_type="support",
+                                             cloud_provider="aws", status="success"))
+    monkeypatch.setattr(resolve(generation_job_service), "active_generation_ids", lambda: {"running"})
+    return output_dir
+
+
+def test_sweep_spares_deployed_and_running_generations(on_disk, monkeypatch):
+    monkeypatch.setattr(resolve(deployment_repository), "live_generation_ids", lambda: {"deployed"})
+
+    result = RetentionService().sweep()
+
+    assert result["removed"] == 1
+    assert sorted(os.listdir(on_disk)) == ["deployed", "newest", "running"]
+
+
+def test_sweep_removes_nothing_without_mongodb(on_disk, monkeypatch):
+    def unavailable():
+        raise RepositoryUnavailableError("no servers")
+
+    monkeypatch.setattr(resolve(deployment_repository), "live_generation_ids", unavailable)
+
+    with pytest.raises(RepositoryUnavailableError):
+        RetentionService().sweep()
+    assert sorted(os.listdir(on_disk)) == ["deployed", "newest", "running", "stale"]
+
+
+def test_sweep_spares_a_generation_being_deployed(on_disk, monkeypatch):
+    monkeypatch.setattr(resolve(deployment_repository), "live_generation_ids", lambda: {"deployed"})
+
+    with deployment_service.deploying("stale"):
+        result = RetentionService().sweep()
+
+    assert result["removed"] == 0
+    assert "stale" not in deployment_service.deploying_generation_ids()
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+
+from app.services.stage_graph import Stage, run_stage_graph
+
+
+def test_runs_stages_after_their_dependencies():
+    order = []
+
+    def step(name, value):
+        def run(deps):
+            order.append(name)
+            return value + sum(deps.values())
+        return run
+
+    stages = [
+        Stage("c", step("c", 100), depends_on=["a", "b"]),
+        Stage("a", step("a", 1)),
+        Stage("b", step("b", 10), depends_on=["a"]),
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = run_stage_graph(stages, executor)
+    assert results == {"a": 1, "b": 11, "c": 112}
+    assert order == ["a", "b", "c"]
+
+
+def test_failure_gives_every_stage_a_final_status():
+    slow_started = threading.Event()
+    release = threading.Event()
+    statuses = {}
+
+    def fail(deps):
+        slow_started.wait(5)
+        release.set()
+        raise RuntimeError("boom")
+
+    def slow(deps):
+        slow_started.set()
+        release.wait(5)
+        return "slow"
+
+    stages = [
+        Stage("fail", fail),
+        Stage("slow", slow),
+        Stage("after_fail", lambda deps: None, depends_on=["fail"]),
+        Stage("after_slow", lambda deps: None, depends_on=["slow", "fail"]),
+    ]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(RuntimeError, match="boom"):
+            run_stage_graph(stages, executor, lambda name, status: statuses.__setitem__(name, status))
+    assert statuses == {
+        "fail": "failed",
+        "slow": "completed",
+        "after_fail": "skipped",
+        "after_slow": "skipped",
+    }
+
+
+def test_unknown_dependency_is_rejected():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError, match="unknown stages"):
+            run_stage_graph([Stage("a", lambda deps: None, depends_on=["missing"])], executor)
@@ -0,0 +1,34 @@
+import main
+from app.config import settings
+from app.services.artifact_store import artifact_store
+from app.services.kube_watch_service import kube_watch_service
+from app.services.lazy import resolve
+from app.services.metrics_rollup_service import metrics_rollup_service
+from app.services.mongo_service import mongo_service
+from app.services.retention_service import retention_service
+
+
+def test_a_failing_service_does_not_stop_the_others(monkeypatch):
+    started = []
+
+    def fail():
+        raise ConnectionError("unreachable")
+
+    def record(name):
+        return lambda *args, **kwargs: started.append(name)
+
+    monkeypatch.setattr(settings, "KUBERNETES_WATCH_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_ROLLUP_ENABLED", True)
+    monkeypatch.setattr(settings, "ARTIFACT_STORE_ENABLED", True)
+    monkeypatch.setattr(settings, "ARTIFACT_GC_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(settings, "GENERATION_RETENTION_ENABLED", True)
+    monkeypatch.setattr(resolve(mongo_service), "connect", fail)
+    monkeypatch.setattr(resolve(kube_watch_service), "start", fail)
+    monkeypatch.setattr(resolve(metrics_rollup_service), "start", record("rollup"))
+    monkeypatch.setattr(resolve(artifact_store), "start", record("artifact gc"))
+    monkeypatch.setattr(resolve(retention_service), "start", record("retention"))
+    monkeypatch.setattr(main, "start_metrics_exporter", record("exporter"))
+
+    main.start_background_services()
+
+    assert started == ["rollup", "artifact gc", "retention", "exporter"]